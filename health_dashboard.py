@@ -1,39 +1,45 @@
+from startup_profiler import PROFILER  # first: starts the startup clock
 import sys
 import random
-import time 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QProgressBar, QVBoxLayout, QHBoxLayout, QWidget, QFrame, QGridLayout)
-from PyQt5.QtCore import QTimer, QTime, QDate, Qt, QByteArray
+from PyQt5.QtCore import QTime, QDate, Qt
 from PyQt5.QtGui import QIcon, QPixmap
-from PyQt5.QtSvg import QSvgWidget
-import pyqtgraph as pg
 
 from speedometer import Speedometer
-from music_player import MusicPlayerWidget  
 from opencv_widget import CameraWidget
-import re
-import numpy as np
+from render_scheduler import RENDER_DEBUG, RenderScheduler
+from icon_cache import svg_pixmap
+# pyqtgraph, numpy (vitals) and the music player are imported in build_deferred_panels, after the first paint
+
+PROFILER.mark("imports")
 
 fixed_width = 500
-slice_number = 3
-points_to_plot = 500
+history_points = 30 * 600  # rPPG samples kept: 10 minutes at 30 Hz
+plot_window_sec = 10  # seconds of rPPG shown; older history is clipped, not drawn
+
 
 class HealthDashboard(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Car Health Panel")
-        logo_icon = QIcon("icons/logo.jpeg")  
+        # every widget update runs on one display-rate tick (see render_scheduler.py)
+        self.scheduler = RenderScheduler.for_screen(QApplication.primaryScreen(), self)
 
-        # 2 different buffers for x and y data
-        self.buffer_time = []
-        self.buffer_y = []
-
-        # x and y data for plotting
-        self.y_data = []
-        self.x_data = []
+        # OpenCV camera widget, first: its thread loads the pipeline and connects while the rest is built
+        self.camera_widget = CameraWidget(camera_index=0, scheduler=self.scheduler)
+        self.camera_widget.setMinimumSize(700, 350)
+        self.camera_widget.data_signal.connect(self.update_from_camera)
+        self.camera_widget.thread.pipeline_ready.connect(lambda t: PROFILER.mark("pipeline ready", at=t))
+        self.camera_widget.thread.frame_received.connect(self.first_camera_frame)
+        self.camera_widget.thread.latency_updated.connect(self.update_latency)
+        self.latency = None  # last send-to-result latency snapshot (ms), shown on the next tick
+        logo_icon = QIcon("icons/logo.jpeg")  
 
-        # start time for x axis with a defined step
-        self.begin_time = 0
-        self.step_size = 10
+        # rPPG history and heart rate from the camera pipeline, redrawn only when they changed;
+        # the history, chart and song panel are built right after the first paint
+        self.vitals = None
+        self.plot_widget = None
+        self.rppg_curve = None
         self.setWindowIcon(logo_icon)
         self.setGeometry(100, 100, 600, 400)
         self.setStyleSheet("""background-color: #0e1117; color: #f5f5f5;font-family: 'Segoe UI'; font-size: 18px;""")
@@ -50,46 +56,30 @@ class HealthDashboard(QMainWindow):
         self.date_label.setAlignment(Qt.AlignCenter)
 
         # Heart Icon and label
-        with open("icons/heart-rate-svgrepo-com.svg", "r") as f:
-            svg_content = f.read()
-        self.heart_icon = QSvgWidget()  # path to your SVG
-        svg_content = re.sub(r'fill="[^"]+"', 'fill="red"', svg_content)
-        self.heart_icon.load(QByteArray(svg_content.encode()))
-        self.heart_icon.setFixedSize(40, 40)  # set icon size
+        self.heart_icon = self.svg_icon("icons/heart-rate-svgrepo-com.svg", "red", 40)
         self.heart_label = QLabel("Heart Rate: -- bpm")
         self.heart_label.setFixedWidth(fixed_width)
         self.heart_label.setStyleSheet("font-size: 40px;")
 
 
         # Breathing Icon and label
-        with open("icons/lungs-svgrepo-com(1).svg", "r") as f:
-            svg_content = f.read()
-        self.breathing_icon = QSvgWidget()  # path to your SVG
-        self.breathing_icon.load(QByteArray(svg_content.encode()))
-        self.breathing_icon.setFixedSize(40, 40)  # set icon size
+        self.breathing_icon = self.svg_icon("icons/lungs-svgrepo-com(1).svg", None, 40)
         self.breathing_label = QLabel("Breathing Rate: 20 bpm")
         self.breathing_label.setFixedWidth(fixed_width)
         self.breathing_label.setStyleSheet("font-size: 40px;")
 
         # Oxygen Icon and label
-        with open("icons/oxygen-svgrepo-com.svg", "r") as f:
-            svg_content = f.read()
-        self.oxygen_icon = QSvgWidget()  # path to your SVG
-        svg_content = re.sub(r'fill="[^"]+"', 'fill="blue"', svg_content)
-        self.oxygen_icon.load(QByteArray(svg_content.encode()))
-        self.oxygen_icon.setFixedSize(40, 40)  # set icon size
+        self.oxygen_icon = self.svg_icon("icons/oxygen-svgrepo-com.svg", "blue", 40)
         self.oxygen_label = QLabel("Oxygen Level: 70 %")
         self.oxygen_label.setFixedWidth(fixed_width)
         self.oxygen_label.setStyleSheet("font-size: 40px;")
 
+        # Server latency label (send-to-result, from the camera pipeline)
+        self.latency_label = QLabel("Latency: -- ms")
+        self.latency_label.setStyleSheet("font-size: 20px; color: #777b7e;")
 
-        # Fuel icon and progress bar
-        with open("icons/fuel-svgrepo-com.svg", "r") as f:
-            svg_content = f.read()
-        self.fuel_icon = QSvgWidget()  # path to your SVG
-        svg_content = svg_content.replace('fill="#000000"', 'fill="#00ff00"')
-        self.fuel_icon.load(QByteArray(svg_content.encode()))
-        self.fuel_icon.setFixedSize(30, 30)  # set icon size
+        # Fuel icon and progress bar (its only fill is the black one)
+        self.fuel_icon = self.svg_icon("icons/fuel-svgrepo-com.svg", "#00ff00", 30)
         self.fuel_bar = QProgressBar()
         self.fuel_bar.setStyleSheet("""
     QProgressBar {
@@ -112,17 +102,47 @@ class HealthDashboard(QMainWindow):
         self.speed_label = QLabel("SPEED")
         self.speed_label.setAlignment(Qt.AlignRight)
         self.speed_label.setStyleSheet("font-size: 20px; color: #777b7e;")   
-        self.speedometer = Speedometer()
+        self.speedometer = Speedometer(scheduler=self.scheduler)
         self.speedometer.setMinimumSize(250, 250)
 
+        self.init_ui()
+        self.update_time_date()  # Initial time/date update
+
+        self.scheduler.register("clock", self.update_time_date, interval_ms=5000)  # update every 5 seconds
+        self.scheduler.register("rppg", self.check_buffer)  # on new camera data, at most once per frame
+        self.scheduler.register("latency", self.show_latency)  # on each matched server result
+        self.scheduler.watch_paint("speedometer", self.speedometer)
+        if RENDER_DEBUG:
+            self.scheduler.show_overlay(self)
+        self.scheduler.start()
+        PROFILER.mark("window built")
+        PROFILER.watch_first_paint(self, self.build_deferred_panels)
+        PROFILER.start()
+
+    def build_deferred_panels(self) -> None:
+        """The rPPG history and chart and the song panel, built once the window is on screen"""
+        if self.vitals is not None:
+            return
+        import pyqtgraph as pg
+        from vitals import Vitals  # python_demo/, put on sys.path by opencv_widget
+        from music_player import MusicPlayerWidget
+
+        self.vitals = Vitals(history_points)
+
         # PyQtGraph chart for real-time rPPG data
-        self.plot_widget = pg.PlotWidget()
-        self.plot_widget.setBackground("#0e1117")
-        self.plot_widget.setYRange(-5, 5)
-        self.plot_widget.setLabel('bottom', 'Time', units='s')  
-        self.plot_widget.setLabel('left', 'rPPG', units='a.u.')   # Y-axis label
+        plot_widget = pg.PlotWidget()
+        plot_widget.setBackground("#0e1117")
+        plot_widget.setYRange(-5, 5)
+        plot_widget.setLabel('bottom', 'Time', units='s')  
+        plot_widget.setLabel('left', 'rPPG', units='a.u.')   # Y-axis label
         pen = pg.mkPen(color="#00ffea", width=3)
-        self.rppg_curve = self.plot_widget.plot([], [], pen=pen)
+        self.rppg_curve = plot_widget.plot([], [], pen=pen)
+        self.rppg_curve.setClipToView(True)  # only the visible window is turned into a path
+        self.rppg_curve.setDownsampling(auto=True, method="peak")
+        plot_widget.enableAutoRange(axis="x", enable=False)
+        self.chart_layout.addWidget(plot_widget)
+        self.plot_widget = plot_widget
+        self.scheduler.watch_paint("rppg plot", self.plot_widget)
 
         # Song-Player widget
         self.image_label = QLabel()
@@ -132,23 +152,18 @@ class HealthDashboard(QMainWindow):
         self.image_label.setFixedSize(550, 300) 
         self.music_player = MusicPlayerWidget()
         self.music_player.setMaximumHeight(200)
+        self.media_layout.addWidget(self.image_label)
+        self.media_layout.addWidget(self.music_player)
 
-        
-
-        self.init_ui()
-        self.update_time_date()  # Initial time/date update
-
-
-        timer = QTimer(self)
-        timer.timeout.connect(self.update_time_date)
-        timer.start(5000)  # update every 5 seconds
-
-
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_buffer)
-        self.timer.start(50)  # check every 50 ms
+        PROFILER.mark("panels ready")
 
 
+    def svg_icon(self, path: str, color, size: int) -> QLabel:
+        """Recolored SVG icon, rendered once into a cached pixmap (see icon_cache.py)"""
+        icon = QLabel()
+        icon.setPixmap(svg_pixmap(path, color, size, size, QApplication.instance().devicePixelRatio()))
+        icon.setFixedSize(size, size)  # set icon size
+        return icon
 
     def init_ui(self):
         container = QWidget()
@@ -180,6 +195,7 @@ class HealthDashboard(QMainWindow):
         oxygen_layout.addWidget(self.oxygen_icon)
         oxygen_layout.addWidget(self.oxygen_label)
         layout.addLayout(oxygen_layout)
+        layout.addWidget(self.latency_label)
 
         # Wrapping the layout in a frame
         frame = QFrame()
@@ -205,54 +221,72 @@ class HealthDashboard(QMainWindow):
         frame.setStyleSheet("background-color: #1a1d24; border-radius: 15px; padding: 10px;")
         container_layout.addWidget(frame, 1, 1, 1, 1)
 
-        # bottom right  chart layout
+        # bottom right  chart layout (the plot is added by build_deferred_panels)
         layout = QVBoxLayout()
-        layout.addWidget(self.plot_widget)
+        self.chart_layout = layout
         frame = QFrame()
         frame.setLayout(layout)
         container_layout.addWidget(frame, 2, 1, 1, 2)
         frame.setStyleSheet("background-color: #1a1d24; border-radius: 15px; padding: 10px;")
 
-        # top left image and music player layout
+        # top left image and music player layout (filled by build_deferred_panels)
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignCenter)
-        layout.addWidget(self.image_label)
-        layout.addWidget(self.music_player)
+        self.media_layout = layout
         container_layout.addLayout(layout, 1, 0, 1, 1)
 
-        # OpenCV camera widget
-        self.camera_widget = CameraWidget(camera_index=0)
-        self.camera_widget.setMinimumSize(700, 350)
-        self.camera_widget.data_signal.connect(self.update_from_camera)
+        # OpenCV camera widget (created first, in __init__)
         container_layout.addWidget(self.camera_widget, 1, 2)  
 
 
         container.setLayout(container_layout)
         self.setCentralWidget(container)
 
-    def update_from_camera(self, rppg_list, rppg_timestamps, heart_rate) -> None:
-        """Updating the buffer from camera data"""
-        if rppg_list:
-            self.buffer_y.extend(rppg_list)
-            self.buffer_time.extend(np.linspace(self.begin_time, self.begin_time + self.step_size, len(rppg_list)))
-            self.begin_time += self.step_size
-            self.heart_label.setText(f"Heart Rate: {heart_rate} bpm")
+    def update_from_camera(self, rppg, rppg_timestamps, heart_rate) -> None:
+        """Updating the buffer from camera data (only samples not received before)"""
+        if self.vitals is None:  # a result before the first paint: build the panels now
+            self.build_deferred_panels()
+        self.vitals.add(rppg, rppg_timestamps, heart_rate)
+        if len(rppg):
+            PROFILER.mark("first rPPG result")
+        self.scheduler.request("rppg")
+
+    def update_latency(self, snap: dict) -> None:
+        self.latency = snap
+        self.scheduler.request("latency")
+
+    def show_latency(self) -> None:
+        snap = self.latency
+        if snap is not None:
+            self.latency_label.setText(f"Latency: {snap['last']:.0f} ms (p50 {snap['p50']:.0f} / p95 {snap['p95']:.0f} ms)")
+
+    def first_camera_frame(self, qt_image) -> None:
+        PROFILER.mark("first camera frame")
+        self.camera_widget.thread.frame_received.disconnect(self.first_camera_frame)
             
     def check_buffer(self) -> None:
-        """Check the buffer and update the plot if enough data is available"""
-        if len(self.buffer_time) > 1:
-            self.y_data.extend(self.buffer_y[:slice_number])
-            self.x_data.extend(np.array(self.buffer_time[:slice_number]).tolist())
-
-            del self.buffer_y[:slice_number]
-            del self.buffer_time[:slice_number]
-            if len(self.x_data) > points_to_plot:
-                # Slicing the data
-                self.x_data = self.x_data[-points_to_plot:]
-                self.y_data = self.y_data[-points_to_plot:]
-            self.rppg_curve.setData(self.x_data, self.y_data)
-
-
+        """Show the latest heart rate and redraw the plot if new samples arrived since the last tick"""
+        vitals = self.vitals
+        if vitals is None:
+            return
+        if vitals.hr_changed:
+            vitals.hr_changed = False
+            self.heart_label.setText(f"Heart Rate: {vitals.hr} bpm")
+        if not vitals.dirty:
+            return
+        vitals.dirty = False
+        x, y = vitals.series.view()  # views into the ring, no copies
+        self.rppg_curve.setData(x, y)
+        end = vitals.series.last_time()
+        self.plot_widget.setXRange(end - plot_window_sec, end, padding=0)
+
+
+
+    def keyPressEvent(self, event) -> None:
+        if event.key() == Qt.Key_F12:
+            self.scheduler.toggle_overlay(self)
+        else:
+            super().keyPressEvent(event)
 
     def update_time_date(self) -> None:
         """Update the time and date labels + fuel bar"""
@@ -0,0 +1,30 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+from PyQt5.QtCore import QByteArray, QRectF, Qt
+from PyQt5.QtGui import QPainter, QPixmap
+from PyQt5.QtSvg import QSvgRenderer
+
+
+@lru_cache(maxsize=None)
+def svg_data(path: str, color: Optional[str] = None) -> QByteArray:
+    """SVG file contents with every ``fill`` set to ``color`` (unchanged if None); read once per (path, color)."""
+    with open(path, "r") as f:
+        svg_content = f.read()
+    if color is not None:
+        svg_content = re.sub(r'fill="[^"]+"', f'fill="{color}"', svg_content)
+    return QByteArray(svg_content.encode())
+
+
+@lru_cache(maxsize=None)
+def svg_pixmap(path: str, color: Optional[str], width: int, height: int, dpr: float = 1.0) -> QPixmap:
+    """The (recolored) SVG rendered once into a pixmap, so showing it is a blit instead of a vector render."""
+    pixmap = QPixmap(max(1, int(width * dpr)), max(1, int(height * dpr)))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.Antialiasing)
+    QSvgRenderer(svg_data(path, color)).render(painter, QRectF(0, 0, width, height))
+    painter.end()
+    return pixmap
@@ -1,147 +1,100 @@
-
 import asyncio
-import base64
-import uuid
-import time
-import os
-import cv2
-import numpy as np
-import websockets
-import orjson
-from collections import deque
-
-from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
+import sys
+from pathlib import Path
+from time import perf_counter
+
+from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QSizePolicy
 from PyQt5.QtCore import Qt, pyqtSignal, QThread
 from PyQt5.QtGui import QImage, QPixmap
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# ---------------- Config ----------------
-BACKEND_WS_BASE = os.getenv("BACKEND_WS_BASE", "CAIRE_WS_ENDPOINT")
-API_KEY = os.getenv("API_KEY", "YOUR_CAIRE_API_KEY")
-FPS = float(os.getenv("FPS", "30"))  # GUI frame rate
-JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "70"))
-FRAME_BUFFER_SIZE = int(os.getenv("FRAME_BUFFER_SIZE", "30"))  # max frames to buffer
+# The Qt-independent pipeline and its config (env) live in python_demo/pipeline.py. It (with cv2,
+# numpy and websockets) is imported on the camera thread, so it loads while the window is built.
+sys.path.insert(0, str(Path(__file__).resolve().parent / "python_demo"))
 
 
 # ---------------- Helpers ----------------
-def build_ws_url():
-    from urllib.parse import urlencode
-    params = {"api_key": API_KEY, "client": "qtClient"}
-    return f"{BACKEND_WS_BASE.rstrip('/')}/?{urlencode(params)}"
-
-def encode_frame_jpeg(frame: np.ndarray, quality: int) -> str:
-    ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
-    if not ok:
-        raise RuntimeError("JPEG encoding failed")
-    return base64.b64encode(buf.tobytes()).decode("ascii")
-
-def build_payload(datapt_id: str, timestamp: str, frame_b64: str):
-    return {
-        "datapt_id": datapt_id,
-        "state": "stream",
-        "timestamp": timestamp,
-        "frame_data": frame_b64,
-        "advanced": True,
-    }
+def preview_image(frame, width: int, height: int) -> QImage:
+    """``frame`` (BGR) fitted into width x height, as an RGB QImage that owns its pixels."""
+    import cv2  # already loaded by the pipeline on this thread
+    h, w = frame.shape[:2]
+    scale = min(width / float(w), height / float(h))
+    if scale > 0 and abs(scale - 1.0) > 1e-3:
+        interp = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        frame = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=interp)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)  # new buffer; the camera frame is left untouched
+    h, w, ch = rgb.shape
+    # the only copy: Qt owns the pixels, so the image outlives ``rgb`` on its way to the GUI thread
+    return QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888).copy()
 
 class CameraThread(QThread):
-    """Thread to capture video frames and communicate with the server."""
+    """Runs the capture/stream pipeline on its own event loop and re-emits its output as Qt signals."""
     frame_received = pyqtSignal(QImage)
     server_message = pyqtSignal(str)
-    data_received = pyqtSignal(list, list, str)
+    data_received = pyqtSignal(object, object, str)  # new rPPG samples, their timestamps (float64 arrays), HR
+    latency_updated = pyqtSignal(dict)  # send-to-result latency snapshot (ms)
+    pipeline_ready = pyqtSignal(float)  # perf_counter() once the pipeline is imported and built
 
     def __init__(self, camera_index=0):
         super().__init__()
-        self.camera_index = camera_index
-        self.running = True
         self.loop = None
-        self.frame_buffer = deque(maxlen=FRAME_BUFFER_SIZE)
+        self.preview_size = (640, 480)  # device pixels, set by the widget
+        self.preview_pending = False  # a preview frame is queued to the GUI and not shown yet
+        self.camera_index = camera_index
+        self.pipeline = None  # built in run(), off the GUI thread
+        self.stopping = False
 
     def stop(self):
-        self.running = False
+        self.stopping = True
+        if self.pipeline is not None:
+            self.pipeline.stop()
         self.wait()
 
-    def handle_server_message(self, msg: str):
-        try:
-            data = orjson.loads(msg)
-            rppg = data.get("advanced", {}).get("rppg", [])[-256:]
-            rppg_timestamps = data.get("advanced", {}).get("rppg_timestamps", [])[-256:]
-            heart_rate = str(data.get("inference", {}).get("hr", ""))
-            if rppg:
-                # Send the rPPG data to the QWidget
-                self.data_received.emit(rppg, rppg_timestamps, heart_rate)
-        except Exception as e:
-            print("Error parsing server message:", e)
-
-
-
-    # ---------------- Send frames to server ----------------
+    def emit_result(self, result):
+        self.data_received.emit(result.rppg, result.timestamps, result.hr)
 
-    async def send_frames(self, ws): 
-        cap = cv2.VideoCapture(self.camera_index) 
-        if not cap.isOpened(): 
-            self.server_message.emit("Cannot open camera")
-            return
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, FPS)
-        start = time.perf_counter()
-        frame_count = 0
-        while self.running:
-            next_time = start + frame_count / FPS
-            ret, frame = cap.read()
-            if not ret:
-                await asyncio.sleep(0.01)
-                continue
-
-            # Convert frame to Qt image
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb.shape
-            qt_image = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
-            self.frame_received.emit(qt_image)
-
-            # Encode and send to server
-            b64 = encode_frame_jpeg(frame, JPEG_QUALITY)
-            payload = build_payload(str(uuid.uuid4()), str(time.time()), b64)
-            await ws.send(orjson.dumps(payload).decode("utf-8"))
-            frame_count += 1
-            await asyncio.sleep(max(0, next_time - time.perf_counter()))
-        cap.release()
-
-
-    # ---------------- Receive server messages ----------------
-    async def listen_to_server(self, ws):
-        try:
-            async for msg in ws:
-                if isinstance(msg, (bytes, bytearray)):
-                    msg = msg.decode("utf-8", errors="ignore")
-                self.handle_server_message(msg)
-        except Exception as e:
-            self.server_message.emit(f"Server connection closed: {e}")
+    # ---------------- Preview ----------------
+    def set_preview_size(self, width: int, height: int):
+        """Called from the GUI thread when the video label is resized."""
+        self.preview_size = (max(1, int(width)), max(1, int(height)))
 
-    # ---------------- WebSocket task ----------------
-    async def websocket_task(self):
-        ws_url = build_ws_url()
-        self.server_message.emit(f"Connecting to {ws_url}")
+    def preview_shown(self):
+        """Called from the GUI thread once the last preview frame is on screen."""
+        self.preview_pending = False
 
-        async with websockets.connect(ws_url, max_size=2**22, compression=None) as ws:
-            self.server_message.emit("Connected to server")
-
-            sender = asyncio.create_task(self.send_frames(ws))
-            listener = asyncio.create_task(self.listen_to_server(ws))
-            done, pending = await asyncio.wait( [sender, listener], return_when=asyncio.FIRST_EXCEPTION )
-
-            for task in pending:
-                task.cancel()
+    def emit_preview(self, frame) -> bool:
+        """Scale and convert on the capture thread; skip the frame if the GUI has not shown the last one."""
+        if self.preview_pending:
+            return False
+        width, height = self.preview_size
+        self.preview_pending = True
+        self.frame_received.emit(preview_image(frame, width, height))
+        return True
 
     # ---------------- Run thread ----------------
     def run(self):
+        try:
+            from pipeline import Pipeline
+            self.pipeline = Pipeline(
+                self.camera_index,
+                client="qtClient",
+                on_result=self.emit_result,
+                on_preview=self.emit_preview,
+                on_message=self.server_message.emit,
+                on_latency=self.latency_updated.emit,
+            )
+        except Exception as e:
+            self.server_message.emit(f"Pipeline error: {e}")
+            return
+        self.pipeline_ready.emit(perf_counter())
+        if self.stopping:  # closed while the pipeline was loading
+            self.pipeline.stop()
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
         try:
-            self.loop.run_until_complete(self.websocket_task())
+            self.loop.run_until_complete(self.pipeline.run())
         except Exception as e:
             self.server_message.emit(f"WebSocket error: {e}")
         finally:
@@ -154,12 +107,16 @@ class CameraThread(QThread):
 # ---------------- Camera Widget ----------------
 class CameraWidget(QWidget):
     """Widget to display camera feed and handle communication within a QThread."""
-    data_signal = pyqtSignal(list, list, str)
+    data_signal = pyqtSignal(object, object, str)
 
-    def __init__(self, camera_index=0):
+    def __init__(self, camera_index=0, scheduler=None):
         super().__init__()
+        self.scheduler = scheduler  # RenderScheduler: frames are shown on its tick instead of on arrival
+        self.pending_image = None
         self.video_label = QLabel()
         self.video_label.setAlignment(Qt.AlignCenter)
+        self.video_label.setMinimumSize(1, 1)
+        self.video_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)  # frames never resize the layout
         self.video_label.setStyleSheet("""
             QLabel {
                 border-radius: 15px;
@@ -171,25 +128,43 @@ class CameraWidget(QWidget):
         layout.addWidget(self.video_label)
         self.setLayout(layout)
 
+        if scheduler is not None:
+            scheduler.register("camera", self.show_frame)
+            scheduler.watch_paint("camera", self.video_label)
+
         self.thread = CameraThread(camera_index)
         self.thread.frame_received.connect(self.update_frame)
         self.thread.server_message.connect(self.display_message)
         self.thread.data_received.connect(self.forward_data)
         self.thread.start()
 
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        dpr = self.video_label.devicePixelRatioF()
+        self.thread.set_preview_size(self.video_label.width() * dpr, self.video_label.height() * dpr)
+
     def forward_data(self, rppg, rppg_timestamps, heart_rate):
-        """Forward the received data via signal to the main widget."""
+        """Forward the new samples (NumPy arrays) via signal to the main widget."""
         self.data_signal.emit(rppg, rppg_timestamps, heart_rate)
 
     def update_frame(self, qt_image):
-        """Update the video frame on the UI"""
-        pix = QPixmap.fromImage(qt_image).scaled(
-            self.video_label.width(),
-            self.video_label.height(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
+        """Update the video frame on the UI (already scaled to the label by the camera thread)"""
+        if self.scheduler is None:
+            self.show_image(qt_image)
+            return
+        self.pending_image = qt_image
+        self.scheduler.request("camera")
+
+    def show_frame(self):
+        if self.pending_image is not None:
+            qt_image, self.pending_image = self.pending_image, None
+            self.show_image(qt_image)
+
+    def show_image(self, qt_image):
+        pix = QPixmap.fromImage(qt_image)
+        pix.setDevicePixelRatio(self.video_label.devicePixelRatioF())
         self.video_label.setPixmap(pix)
+        self.thread.preview_shown()
 
     def display_message(self, msg):
         # log or show messages if needed
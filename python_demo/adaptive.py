@@ -0,0 +1,162 @@
+import os
+from time import perf_counter
+from typing import Callable, Optional
+
+
+def write_buffer_size(ws) -> int:
+    """Bytes queued in the websocket's transport but not yet on the wire."""
+    transport = getattr(ws, "transport", None)
+    try:
+        return int(transport.get_write_buffer_size()) if transport is not None else 0
+    except Exception:
+        return 0
+
+
+class AdaptiveController:
+    """Step JPEG quality, resolution and frame rate down under congestion and back up when clear.
+
+    Senders report every send (duration and transport buffer depth) and every
+    matched result latency. Once per ``interval`` the controller looks at the
+    worst values seen and either steps one knob down (quality first, then
+    scale, then fps), or, after ``recover_after`` clean intervals, steps one
+    knob back up in reverse order. Every decision is logged.
+    """
+
+    def __init__(
+        self,
+        max_quality: int,
+        max_fps: float,
+        min_quality: int = 40,
+        min_scale: float = 0.5,
+        min_fps: float = 10.0,
+        quality_step: int = 10,
+        scale_step: float = 0.125,
+        fps_step: float = 5.0,
+        buffer_high: int = 256 * 1024,
+        send_high: float = 0.030,
+        latency_high: float = 1.0,
+        interval: float = 1.0,
+        recover_after: int = 3,
+        log: Callable[[str], None] = print,
+    ):
+        self.max_quality, self.min_quality, self.quality_step = int(max_quality), int(min_quality), int(quality_step)
+        self.min_scale, self.scale_step = float(min_scale), float(scale_step)
+        self.max_fps, self.min_fps, self.fps_step = float(max_fps), float(min_fps), float(fps_step)
+        self.buffer_high, self.send_high, self.latency_high = buffer_high, send_high, latency_high
+        self.interval, self.recover_after = interval, recover_after
+        self.log = log
+
+        self.quality = self.max_quality
+        self.scale = 1.0
+        self.fps = self.max_fps
+        self.decisions = 0
+        self._credit = 0.0
+        self._clean = 0
+        self._next_eval = perf_counter() + interval
+        self._reset_window()
+
+    def _reset_window(self):
+        self._buffer = 0
+        self._send = 0.0
+        self._latency: Optional[float] = None
+
+    # -------------------- Observations --------------------
+    def observe_send(self, duration: float, buffered: int):
+        self._buffer = max(self._buffer, buffered)
+        self._send = max(self._send, duration)
+        self.maybe_update()
+
+    def observe_latency(self, seconds: Optional[float]):
+        if seconds is not None:
+            self._latency = seconds if self._latency is None else max(self._latency, seconds)
+
+    def admit(self, source_fps: float) -> bool:
+        """Frame-rate gate for a source producing ``source_fps``: True if this frame should be sent."""
+        self._credit += min(1.0, self.fps / source_fps) if source_fps > 0 else 1.0
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            return True
+        return False
+
+    # -------------------- Decisions --------------------
+    def maybe_update(self, now: Optional[float] = None) -> bool:
+        now = perf_counter() if now is None else now
+        if now < self._next_eval:
+            return False
+        self._next_eval = now + self.interval
+        latency = self._latency
+        congested = (
+            self._buffer > self.buffer_high
+            or self._send > self.send_high
+            or (latency is not None and latency > self.latency_high)
+        )
+        clear = (
+            self._buffer <= self.buffer_high // 4
+            and self._send <= self.send_high / 2
+            and (latency is None or latency <= self.latency_high / 2)
+        )
+        why = (f"buffer {self._buffer / 1024:.0f} KiB, send {1000 * self._send:.0f} ms, "
+               f"latency {'-' if latency is None else f'{1000 * latency:.0f} ms'}")
+        self._reset_window()
+
+        changed = False
+        if congested:
+            self._clean = 0
+            changed = self._step_down(why)
+        elif clear:
+            self._clean += 1
+            if self._clean >= self.recover_after:
+                self._clean = 0
+                changed = self._step_up(why)
+        else:
+            self._clean = 0
+        return changed
+
+    def _decide(self, direction: str, knob: str, old, new, why: str) -> bool:
+        self.decisions += 1
+        self.log(f"adapt: {direction} {knob} {old} -> {new} ({why})")
+        return True
+
+    def _step_down(self, why: str) -> bool:
+        if self.quality > self.min_quality:
+            old, self.quality = self.quality, max(self.min_quality, self.quality - self.quality_step)
+            return self._decide("down", "quality", old, self.quality, why)
+        if self.scale > self.min_scale:
+            old, self.scale = self.scale, max(self.min_scale, round(self.scale - self.scale_step, 3))
+            return self._decide("down", "scale", old, self.scale, why)
+        if self.fps > self.min_fps:
+            old, self.fps = self.fps, max(self.min_fps, self.fps - self.fps_step)
+            return self._decide("down", "fps", old, self.fps, why)
+        return False
+
+    def _step_up(self, why: str) -> bool:
+        if self.fps < self.max_fps:
+            old, self.fps = self.fps, min(self.max_fps, self.fps + self.fps_step)
+            return self._decide("up", "fps", old, self.fps, why)
+        if self.scale < 1.0:
+            old, self.scale = self.scale, min(1.0, round(self.scale + self.scale_step, 3))
+            return self._decide("up", "scale", old, self.scale, why)
+        if self.quality < self.max_quality:
+            old, self.quality = self.quality, min(self.max_quality, self.quality + self.quality_step)
+            return self._decide("up", "quality", old, self.quality, why)
+        return False
+
+    def summary(self) -> str:
+        return (f"adaptive: quality {self.quality}, scale {self.scale:.3f}, fps {self.fps:.1f} "
+                f"after {self.decisions} decisions")
+
+    @classmethod
+    def from_env(cls, max_quality: int, max_fps: float, log: Callable[[str], None] = print) -> "AdaptiveController":
+        """Bounds and thresholds from ADAPT_* environment variables."""
+        env = os.getenv
+        return cls(
+            max_quality=int(env("ADAPT_MAX_QUALITY", str(max_quality))),
+            max_fps=float(env("ADAPT_MAX_FPS", str(max_fps))),
+            min_quality=int(env("ADAPT_MIN_QUALITY", "40")),
+            min_scale=float(env("ADAPT_MIN_SCALE", "0.5")),
+            min_fps=float(env("ADAPT_MIN_FPS", "10")),
+            buffer_high=int(env("ADAPT_BUFFER_HIGH_KB", "256")) * 1024,
+            send_high=float(env("ADAPT_SEND_HIGH_MS", "30")) / 1000.0,
+            latency_high=float(env("ADAPT_LATENCY_HIGH_MS", "1000")) / 1000.0,
+            log=log,
+        )
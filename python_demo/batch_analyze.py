@@ -0,0 +1,254 @@
+"""Score many recorded sessions offline with the local rPPG engine.
+
+Every directory under BATCH_ROOT that holds a frame store or timestamped PNGs
+is a session. Sessions are cut into chunks of BATCH_CHUNK frames; decode and
+face-ROI extraction for all chunks run on a process pool, and each session's
+signal extraction is queued to the same pool as soon as its last chunk is in.
+Results go to BATCH_OUT/<session>.json plus summary.csv. Sessions whose JSON
+already matches the recording are skipped, so an interrupted run resumes.
+"""
+import csv
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+import orjson
+
+from framestore import FrameStoreReader, is_framestore, list_timestamped_pngs
+from rppg_local import LocalRppg, analyze
+
+# -------------------- Config (env overridable) --------------------
+BATCH_ROOT       = Path(os.getenv("BATCH_ROOT", "sessions"))
+BATCH_OUT        = Path(os.getenv("BATCH_OUT", "batch_results"))
+BATCH_WORKERS    = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 4)))
+BATCH_CHUNK      = int(os.getenv("BATCH_CHUNK", "600"))        # frames per decode/ROI job
+BATCH_WINDOW_SEC = float(os.getenv("BATCH_WINDOW_SEC", "10"))  # sliding HR window
+BATCH_STEP_SEC   = float(os.getenv("BATCH_STEP_SEC", "1"))     # sliding HR step
+FPS              = float(os.getenv("FPS", "30"))
+METHOD           = os.getenv("LOCAL_RPPG_METHOD", "pos").lower()
+
+SUMMARY_FIELDS = ("session", "frames", "face_frames", "duration_s", "hr", "hr_min", "hr_max", "status")
+
+
+# -------------------- Sessions --------------------
+class Session:
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.name = str(directory.relative_to(BATCH_ROOT)) if directory != BATCH_ROOT else directory.name
+        self.out = BATCH_OUT / (self.name.replace(os.sep, "__") + ".json")
+        self.decoded = 0
+        self.trace = (0.0, 0.0, 0)  # first ts, last ts, frames with a face
+        if is_framestore(directory):
+            self.kind = "store"
+            store = FrameStoreReader(directory)
+            self.count = len(store)
+            self.last_ts = float(store.timestamps[-1]) if self.count else 0.0
+            store.close()
+            self.pngs = None
+        else:
+            self.kind = "png"
+            self.pngs = [str(p) for p in list_timestamped_pngs(directory)]
+            self.count = len(self.pngs)
+            self.last_ts = float(Path(self.pngs[-1]).stem) if self.pngs else 0.0
+
+    @property
+    def signature(self) -> list:
+        """Changes whenever frames are added to the recording."""
+        return [self.kind, self.count, self.last_ts]
+
+    def chunks(self) -> list:
+        out = []
+        for lo in range(0, self.count, BATCH_CHUNK):
+            hi = min(self.count, lo + BATCH_CHUNK)
+            out.append((lo, hi) if self.kind == "store" else self.pngs[lo:hi])
+        return out
+
+    def load_result(self) -> Optional[dict]:
+        try:
+            result = orjson.loads(self.out.read_bytes())
+        except (OSError, ValueError):
+            return None
+        return result if result.get("signature") == self.signature else None
+
+
+def find_sessions(root: Path) -> list:
+    sessions = []
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames.sort()
+        d = Path(dirpath)
+        if is_framestore(d) or list_timestamped_pngs(d):
+            sessions.append(Session(d))
+    return sessions
+
+
+# -------------------- Pool jobs --------------------
+def extract_chunk(directory: str, kind: str, items) -> tuple:
+    """Decode a run of frames and return (timestamps, face-ROI mean RGB rows, frames decoded)."""
+    engine = LocalRppg(FPS, METHOD)
+    ts, rgb, decoded = [], [], 0
+    if kind == "store":
+        store = FrameStoreReader(directory)
+        lo, hi = items
+        frames = ((float(store.timestamps[i]), store.data(i)) for i in range(lo, hi))
+    else:
+        store = None
+        frames = ((float(Path(p).stem), np.fromfile(p, dtype=np.uint8)) for p in items)
+    try:
+        for t, data in frames:
+            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                continue
+            decoded += 1
+            mean = engine.roi_mean(img)
+            if mean is not None:
+                ts.append(t)
+                rgb.append(mean.tolist())
+    finally:
+        if store is not None:
+            store.close()
+    return ts, rgb, decoded
+
+
+def analyze_session(ts: list, rgb: list) -> dict:
+    """Whole-session estimate plus a sliding-window HR series."""
+    result = analyze(ts, rgb, FPS, METHOD)
+    series = []
+    if ts:
+        t = np.asarray(ts)
+        x = np.asarray(rgb)
+        end = t[0] + BATCH_WINDOW_SEC
+        while end <= t[-1] + 1e-9:
+            keep = (t >= end - BATCH_WINDOW_SEC) & (t < end)
+            win = analyze(t[keep], x[keep], FPS, METHOD)
+            if win is not None and win["inference"]["hr"] != "":
+                series.append({"t": round(float(end), 3), "hr": win["inference"]["hr"]})
+            end += BATCH_STEP_SEC
+    return {"result": result, "hr_series": series}
+
+
+# -------------------- Output --------------------
+def write_json(path: Path, obj: dict):
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_bytes(orjson.dumps(obj))
+    os.replace(tmp, path)
+
+
+def summary_row(session: Session, out: dict) -> dict:
+    hrs = [p["hr"] for p in out.get("hr_series", [])]
+    result = out.get("result") or {}
+    duration = (out["last_ts"] - out["first_ts"]) if out.get("face_frames") else 0.0
+    return {
+        "session": session.name,
+        "frames": out.get("frames", 0),
+        "face_frames": out.get("face_frames", 0),
+        "duration_s": round(duration, 1),
+        "hr": (result.get("inference") or {}).get("hr", ""),
+        "hr_min": min(hrs) if hrs else "",
+        "hr_max": max(hrs) if hrs else "",
+        "status": out.get("status", ""),
+    }
+
+
+def print_table(rows: list):
+    widths = {f: max(len(f), *(len(str(r[f])) for r in rows)) for f in SUMMARY_FIELDS}
+    print("  ".join(f"{f:<{widths[f]}}" for f in SUMMARY_FIELDS))
+    for r in rows:
+        print("  ".join(f"{str(r[f]):<{widths[f]}}" for f in SUMMARY_FIELDS))
+
+
+# -------------------- Main --------------------
+def main():
+    sessions = find_sessions(BATCH_ROOT)
+    if not sessions:
+        print(f"No sessions found under {BATCH_ROOT}/ (frames.idx store or timestamped .png files)")
+        return
+    BATCH_OUT.mkdir(parents=True, exist_ok=True)
+
+    done = {}
+    todo = []
+    for s in sessions:
+        prev = s.load_result()
+        if prev is not None:
+            done[s.name] = prev
+        else:
+            todo.append(s)
+    print(f">> {len(sessions)} sessions, {len(done)} already scored, {len(todo)} to go "
+          f"({BATCH_WORKERS} workers, {BATCH_CHUNK} frames/chunk)")
+
+    start = time.perf_counter()
+    frames_total = 0
+    with ProcessPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+        pending = {}  # future -> (kind, session, chunk index)
+        parts = {}    # session name -> list of chunk results
+        for s in todo:
+            chunks = s.chunks()
+            parts[s.name] = [None] * len(chunks)
+            for i, items in enumerate(chunks):
+                pending[pool.submit(extract_chunk, str(s.directory), s.kind, items)] = ("chunk", s, i)
+            if not chunks:
+                pending[pool.submit(analyze_session, [], [])] = ("analyze", s, 0)
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                kind, s, i = pending.pop(fut)
+                try:
+                    value = fut.result()
+                except Exception as e:
+                    print(f">> {s.name}: failed ({e!r})")
+                    parts.pop(s.name, None)
+                    err = {"session": s.name, "signature": None, "status": f"error: {e!r}"}  # retried next run
+                    write_json(s.out, err)
+                    done[s.name] = err
+                    continue
+                if kind == "chunk":
+                    if s.name not in parts:
+                        continue  # another chunk of this session already failed
+                    parts[s.name][i] = value
+                    if all(p is not None for p in parts[s.name]):
+                        ts = [t for p in parts[s.name] for t in p[0]]
+                        rgb = [c for p in parts[s.name] for c in p[1]]
+                        s.decoded = sum(p[2] for p in parts[s.name])
+                        s.trace = (ts[0], ts[-1], len(ts)) if ts else (0.0, 0.0, 0)
+                        pending[pool.submit(analyze_session, ts, rgb)] = ("analyze", s, 0)
+                        del parts[s.name]
+                else:
+                    first_ts, last_ts, face_frames = s.trace
+                    out = {
+                        "session": s.name,
+                        "signature": s.signature,
+                        "method": METHOD,
+                        "fps": FPS,
+                        "frames": s.decoded,
+                        "face_frames": face_frames,
+                        "first_ts": first_ts,
+                        "last_ts": last_ts,
+                        "status": "ok" if value["result"] is not None else "too short / no face",
+                        **value,
+                    }
+                    write_json(s.out, out)
+                    done[s.name] = out
+                    frames_total += out["frames"]
+                    print(f">> [{len(done)}/{len(sessions)}] {s.name}: {out['frames']} frames, "
+                          f"HR {summary_row(s, out)['hr'] or '-'} bpm")
+    elapsed = time.perf_counter() - start
+
+    rows = [summary_row(s, done[s.name]) for s in sessions if s.name in done]
+    with open(BATCH_OUT / "summary.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    if rows:
+        print()
+        print_table(rows)
+    if todo:
+        print(f"\n>> scored {len(todo)} sessions ({frames_total} frames) in {elapsed:.1f}s "
+              f"= {frames_total / elapsed if elapsed > 0 else 0.0:.0f} frames/s; summary in {BATCH_OUT}/summary.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Cost and accuracy of streaming vs full-window heart-rate estimation.
+
+Feeds the same synthetic face-ROI RGB trace (known, drifting heart rate,
+jittered frame times, sensor noise) to:
+
+- full:   ``rppg_local.analyze`` over the last window on every frame
+- fft:    the streaming pulse signal, plus an FFT over the window on every frame
+- stream: ``StreamingHr`` on every frame, including ``estimate()`` (the
+  sliding-DFT heart rate plus the new, already scaled pulse samples), i.e.
+  everything ``Pipeline.run_local`` pays per frame
+
+and prints per-frame cost (mean / p99 µs) and HR error against the truth for
+each window length in BENCH_WINDOWS.
+"""
+import os
+from time import perf_counter
+
+import numpy as np
+
+from hr_stream import StreamingHr
+from latency import percentile
+from rppg_local import analyze, heart_rate
+
+# -------------------- Config (env overridable) --------------------
+FPS           = float(os.getenv("FPS", "30"))
+BENCH_SECONDS = float(os.getenv("BENCH_SECONDS", "60"))
+BENCH_WINDOWS = [float(w) for w in os.getenv("BENCH_WINDOWS", "5,10,20,30").split(",")]
+BENCH_SEED    = int(os.getenv("BENCH_SEED", "0"))
+
+
+def synthetic_trace(seconds: float, fps: float, seed: int = 0):
+    """Timestamps, (N, 3) RGB means and the true HR (bpm) per frame."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fps)
+    ts = 1.7e9 + np.arange(n) / fps + rng.normal(0, 0.003, n)  # capture jitter
+    ts.sort()
+    hr = 70 + 12 * np.sin(2 * np.pi * ts / 90.0)  # slow drift between 58 and 82 bpm
+    phase = 2 * np.pi * np.cumsum(np.r_[0, np.diff(ts)] * hr / 60.0)
+    pulse = np.sin(phase) + 0.3 * np.sin(2 * phase + 0.4)
+    motion = 0.02 * np.sin(2 * np.pi * 0.15 * ts)  # slow illumination / motion
+    skin = np.array([0.33, 0.77, 0.53]) * 0.003     # pulsatile strength per channel (R, G, B)
+    base = np.array([160.0, 110.0, 90.0])
+    rgb = base * (1 + motion[:, None] + pulse[:, None] * skin + rng.normal(0, 0.0015, (n, 3)))
+    return ts, rgb, hr
+
+
+def stats(times: list, errors: list) -> str:
+    us = sorted(1e6 * t for t in times)
+    err = np.abs(np.asarray(errors)) if errors else np.array([np.nan])
+    return (f"{np.mean(us):9.1f} {percentile(us, 99):9.1f}   "
+            f"{np.nanmean(err):6.2f} {np.nanpercentile(err, 95):6.2f}")
+
+
+def bench(window: float, ts, rgb, hr):
+    n = int(window * FPS)
+    warm = n  # score only once every method has a full window
+    full_t, full_e = [], []
+    fft_t, fft_e = [], []
+    stream_t, stream_e = [], []
+
+    engine = StreamingHr(FPS, window_sec=window, update_every=10**9)  # a full readout on every frame below
+    pulse = []
+    for i in range(len(ts)):
+        t0 = perf_counter()
+        engine.add_sample(ts[i], rgb[i])
+        res = engine.estimate()
+        stream_t.append(perf_counter() - t0)
+        est = res["inference"]["hr"] if res is not None and res["inference"]["hr"] != "" else None
+        if i >= warm and est is not None:
+            stream_e.append(est - hr[i])
+        pulse.append(engine.last_pulse)
+
+        t0 = perf_counter()
+        est = heart_rate(np.asarray(pulse[-n:]), FPS)
+        fft_t.append(perf_counter() - t0)
+        if i >= warm and est is not None:
+            fft_e.append(est - hr[i])
+
+        if i >= warm:
+            t0 = perf_counter()
+            res = analyze(ts[i - n + 1:i + 1], rgb[i - n + 1:i + 1], FPS)
+            full_t.append(perf_counter() - t0)
+            if res is not None and res["inference"]["hr"] != "":
+                full_e.append(res["inference"]["hr"] - hr[i])
+
+    print(f"window {window:4.0f}s ({n} frames)")
+    print(f"  {'':8} {'mean µs':>9} {'p99 µs':>9}   {'MAE':>6} {'p95 err':>7}")
+    print(f"  {'full':8} {stats(full_t, full_e)}")
+    print(f"  {'fft':8} {stats(fft_t, fft_e)}")
+    print(f"  {'stream':8} {stats(stream_t, stream_e)}")
+
+
+def main():
+    ts, rgb, hr = synthetic_trace(BENCH_SECONDS, FPS, BENCH_SEED)
+    print(f">> {len(ts)} frames @ {FPS} fps, true HR {hr.min():.0f}-{hr.max():.0f} bpm; per-frame cost and |HR error| (bpm)")
+    for w in BENCH_WINDOWS:
+        bench(w, ts, rgb, hr)
+
+
+if __name__ == "__main__":
+    main()
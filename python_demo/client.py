@@ -1,12 +1,12 @@
 import asyncio
 import base64
 import os
-import re
+import signal
 import uuid
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 from time import perf_counter
-from typing import Union
+from typing import Optional, Union
 
 import numpy as np
 import cv2
@@ -14,6 +14,16 @@ import websockets
 import orjson
 import contextlib
 
+from adaptive import AdaptiveController, write_buffer_size
+from face_roi import FaceCropper, SavingsMeter, crop_and_encode, scale_image
+from framing import backend_url, build_payload, pack_frame
+from framestore import FrameStoreReader, StoredFrame, is_framestore, list_timestamped_pngs as pngs_in
+from frame_cache import FrameCache
+from latency import LatencyTracker
+from live import Archiver, CameraSource, LiveFrame
+from pacer import Pacer
+from resume import RECONNECT_ERRORS, Backoff, ReconnectStats, ReplayBuffer
+
 # -------------------- Config (env overridable) --------------------
 BACKEND_WS_BASE   = os.getenv("BACKEND_WS_BASE", "ws://3.67.186.245:8003/ws/")
 API_KEY           = os.getenv("API_KEY", "ntqjQ-88IStVpZAipH8rfgYL3XW_btZVhBM1J1mOZyI")
@@ -22,80 +32,283 @@ FPS               = float(os.getenv("FPS", "30"))
 CLIENT            = os.getenv("CLIENT", "pythonClient")
 OBJECT_ID         = os.getenv("OBJECT_ID", "")
 CALLBACK_URL      = os.getenv("CALLBACK_URL", "")   
+REPLAY_FROM       = os.getenv("REPLAY_FROM", "")  # frame store only: start timestamp, or seconds from the first frame
+REPLAY_TO         = os.getenv("REPLAY_TO", "")    # frame store only: end timestamp, or seconds from the first frame
+
+# Live mode: stream straight from a camera instead of replaying IMAGES_DIR
+SOURCE            = os.getenv("SOURCE", "replay").lower()  # "replay" | "camera"
+CAMERA_INDEX      = int(os.getenv("CAMERA_INDEX", "0"))
+RES_WIDTH         = int(os.getenv("RES_WIDTH", "640"))
+RES_HEIGHT        = int(os.getenv("RES_HEIGHT", "480"))
+LIVE_DURATION_SEC = float(os.getenv("LIVE_DURATION_SEC", "0"))  # 0 = until Ctrl+C
+ARCHIVE_DIR       = os.getenv("ARCHIVE_DIR", "")  # camera only: also record into this frame store ("" = off)
+ARCHIVE_QUEUE     = int(os.getenv("ARCHIVE_QUEUE", "120"))  # frames the archive writer may fall behind by
+ARCHIVE_EXISTING  = os.getenv("ARCHIVE_EXISTING", "fail").lower()  # store already in ARCHIVE_DIR: "fail" | "append" | "overwrite"
 
 # Performance/transport knobs
 FRAME_FORMAT      = os.getenv("FRAME_FORMAT", "jpeg").lower()  # "raw" | "jpeg"
 JPEG_QUALITY      = int(os.getenv("JPEG_QUALITY", "75"))
 ENC_WORKERS       = int(os.getenv("ENC_WORKERS", str(os.cpu_count() or 4)))
+ENC_WINDOW        = int(os.getenv("ENC_WINDOW", str(ENC_WORKERS * 2)))  # max encode jobs in flight
 QUEUE_MAXSIZE     = int(os.getenv("QUEUE_MAXSIZE", "512"))
 WS_MAX_SIZE       = 2**22  # 4 MiB
 WS_TEXT_FRAMES    = os.getenv("WS_TEXT_FRAMES", "1") not in ("0", "false", "False")
+WIRE_FORMAT       = os.getenv("WIRE_FORMAT", "json").lower()  # "json" | "binary" (see framing.py)
+LATENCY_REPORT_EVERY = int(os.getenv("LATENCY_REPORT_EVERY", "10"))  # print latency stats every N results
+RECONNECT         = os.getenv("RECONNECT", "1") not in ("0", "false", "False")
+RECONNECT_INITIAL = float(os.getenv("RECONNECT_INITIAL", "0.5"))    # first backoff delay (s)
+RECONNECT_MAX_DELAY = float(os.getenv("RECONNECT_MAX_DELAY", "15")) # backoff cap (s)
+RECONNECT_MAX_ATTEMPTS = int(os.getenv("RECONNECT_MAX_ATTEMPTS", "0"))  # 0 = retry forever
+RESUME_BUFFER_SEC = float(os.getenv("RESUME_BUFFER_SEC", "3"))      # frames re-sent after reconnect
+ADAPTIVE          = os.getenv("ADAPTIVE", "0") not in ("0", "false", "False")  # see adaptive.py for ADAPT_* bounds
 
-# -------------------- Files & encoding --------------------
-_TS_PNG = re.compile(r"^\d+(?:\.\d+)?\.png$")  # matches 1747154380.5511632.png
+# Face-ROI crop before JPEG encoding (jpeg format only)
+ROI_CROP          = os.getenv("ROI_CROP", "0") not in ("0", "false", "False")
+ROI_MARGIN        = float(os.getenv("ROI_MARGIN", "0.25"))  # fraction of face box added per side
+ROI_SIZE          = int(os.getenv("ROI_SIZE", "192"))       # crop is resized to ROI_SIZE x ROI_SIZE
+ROI_STATS_EVERY   = int(os.getenv("ROI_STATS_EVERY", "30")) # full-frame size sampled every N frames
+ROI_DETECT_EVERY  = int(os.getenv("ROI_DETECT_EVERY", "10")) # face detector every N frames, tracked in between (1 = every frame)
+ROI_TRACK_MIN_CONF = float(os.getenv("ROI_TRACK_MIN_CONF", "0.5"))  # re-detect when tracking confidence drops below
+
+ROI_CROPPER = FaceCropper(ROI_MARGIN, ROI_SIZE, detect_every=ROI_DETECT_EVERY, min_confidence=ROI_TRACK_MIN_CONF) if ROI_CROP else None
+ROI_METER   = SavingsMeter(ROI_STATS_EVERY)
+
+# Persistent cache of encoded frames for repeated replays (opt-in: "" = off)
+FRAME_CACHE_DIR    = os.getenv("FRAME_CACHE_DIR", "")
+FRAME_CACHE_MAX_MB = float(os.getenv("FRAME_CACHE_MAX_MB", "2048"))
+
+FRAME_CACHE: Optional[FrameCache] = None  # opened by open_frame_cache(), not on import
+
+def open_frame_cache() -> Optional[FrameCache]:
+    """The frame cache in FRAME_CACHE_DIR (created on first use), or None if it is off."""
+    global FRAME_CACHE
+    if FRAME_CACHE is None and FRAME_CACHE_DIR:
+        FRAME_CACHE = FrameCache(FRAME_CACHE_DIR, int(FRAME_CACHE_MAX_MB * 2**20))
+    return FRAME_CACHE
 
+# -------------------- Files & encoding --------------------
 def list_timestamped_pngs() -> list[Path]:
-    paths = [p for p in Path(IMAGES_DIR).glob("*.png") if _TS_PNG.match(p.name)]
-    paths.sort(key=lambda p: float(p.stem) if p.stem.replace('.', '', 1).isdigit() else 0.0)
-    return paths
+    return pngs_in(IMAGES_DIR)
+
+def _replay_bound(value: str, first_ts: float):
+    if not value:
+        return None
+    v = float(value)
+    return v if v > 1e9 else first_ts + v  # small values are offsets into the recording
+
+def list_frames() -> list:
+    """Frames to replay: a frame store (frames.idx/frames.bin) if present, else timestamped PNGs."""
+    if is_framestore(IMAGES_DIR):
+        store = FrameStoreReader(IMAGES_DIR)
+        if not len(store):
+            return []
+        first = float(store.timestamps[0])
+        return store.frames(_replay_bound(REPLAY_FROM, first), _replay_bound(REPLAY_TO, first))
+    return list_timestamped_pngs()
 
-def get_size_from_image(path: Path) -> tuple[int, int]:
-    img = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), cv2.IMREAD_COLOR)
+def decode_image(src) -> Optional[np.ndarray]:
+    if isinstance(src, LiveFrame):
+        return src.image
+    return cv2.imdecode(read_encoded(src), cv2.IMREAD_COLOR)
+
+def read_encoded(src) -> np.ndarray:
+    """Encoded image bytes of a PNG path or a StoredFrame, as a uint8 array."""
+    if isinstance(src, StoredFrame):
+        return np.frombuffer(src.data(), dtype=np.uint8)
+    return np.fromfile(str(src), dtype=np.uint8)
+
+def get_size_from_image(path) -> tuple[int, int]:
+    img = decode_image(path)
     if img is None:
         return 640, 480
     h, w = img.shape[:2]
     return (w, h)
 
-def b64_raw(path: Path) -> str:
-    data = np.fromfile(str(path), dtype=np.uint8)
-    return base64.b64encode(data.tobytes()).decode("ascii")
+def raw_bytes(path) -> bytes:
+    if isinstance(path, LiveFrame):
+        ok, buf = cv2.imencode(".png", path.image, [int(cv2.IMWRITE_PNG_COMPRESSION), 1])
+        if not ok:
+            raise RuntimeError(f"Failed to encode PNG: {path.name}")
+        return buf.tobytes()
+    return read_encoded(path).tobytes()
+
+def locate_frame(path) -> tuple:
+    """Decoded image and its face box (ROI_CROP only).
 
-def b64_jpeg(path: Path, quality: int) -> str:
-    img = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), cv2.IMREAD_COLOR)
+    The tracker follows the face from one call to the next, so this runs once
+    per frame in capture order (on the single locator thread in
+    ``encoder_producer``); the encode workers only crop to the box.
+    """
+    img = decode_image(path)
     if img is None:
         raise RuntimeError(f"Failed to read image: {path}")
-    ok, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    return img, ROI_CROPPER.face(img)
+
+def jpeg_bytes(path, quality: int, scale: float = 1.0, located: Optional[tuple] = None) -> bytes:
+    if ROI_CROPPER is not None:
+        img, face = located if located is not None else locate_frame(path)
+        return crop_and_encode(img, quality, ROI_CROPPER, face, ROI_METER, scale)
+    img = decode_image(path)
+    if img is None:
+        raise RuntimeError(f"Failed to read image: {path}")
+    ok, buf = cv2.imencode(".jpg", scale_image(img, scale), [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
     if not ok:
         raise RuntimeError(f"Failed to encode JPEG: {path}")
-    return base64.b64encode(buf.tobytes()).decode("ascii")
+    return buf.tobytes()
+
+def b64_raw(path) -> str:
+    return base64.b64encode(raw_bytes(path)).decode("ascii")
+
+def b64_jpeg(path, quality: int) -> str:
+    return base64.b64encode(jpeg_bytes(path, quality)).decode("ascii")
+
+def encode_params(quality: int, scale: float, located: Optional[tuple] = None) -> tuple:
+    """Everything besides the source that changes the encoded bytes (part of the cache key)."""
+    if FRAME_FORMAT == "raw":
+        return ("raw",)
+    roi = None
+    if ROI_CROPPER is not None:
+        face = located[1] if located is not None else None
+        roi = (ROI_MARGIN, ROI_SIZE, None if face is None else tuple(int(v) for v in face))
+    return ("jpeg", int(quality), float(scale), roi)
+
+def _encode(path, quality: int, scale: float, located: Optional[tuple] = None) -> bytes:
+    if FRAME_FORMAT == "raw":
+        return raw_bytes(path)
+    return jpeg_bytes(path, quality, scale, located)
+
+def frame_bytes(path, quality: int = JPEG_QUALITY, scale: float = 1.0, located: Optional[tuple] = None) -> bytes:
+    """Encoded frame per FRAME_FORMAT; warm cache hits skip decode/encode entirely.
+
+    With ROI_CROP, ``located`` is ``locate_frame(path)`` and the face box is part
+    of the cache key, so a hit only skips the crop and encode.
+    """
+    if FRAME_CACHE is None or isinstance(path, LiveFrame):
+        return _encode(path, quality, scale, located)
+    if ROI_CROPPER is not None and FRAME_FORMAT == "jpeg" and located is None:
+        located = locate_frame(path)
+    key = FRAME_CACHE.key(path, encode_params(quality, scale, located))
+    data = FRAME_CACHE.get(key)
+    if data is None:
+        data = _encode(path, quality, scale, located)
+        FRAME_CACHE.put(key, data)
+    elif ROI_CROPPER is not None and FRAME_FORMAT == "jpeg":
+        ROI_METER.record(len(data), cached=True)  # a cropped frame all the same, just not encoded now
+    return data
+
+def b64_frame(path, quality: int = JPEG_QUALITY, scale: float = 1.0, located: Optional[tuple] = None) -> str:
+    return base64.b64encode(frame_bytes(path, quality, scale, located)).decode("ascii")
+
+def _timed(fn, *args):
+    t0 = perf_counter()
+    out = fn(*args)
+    return out, perf_counter() - t0
+
+async def encoder_producer(paths, q: asyncio.Queue, loop: asyncio.AbstractEventLoop,
+                           controller: Optional[AdaptiveController] = None) -> dict:
+    """Encode on a thread pool with up to ENC_WINDOW jobs in flight.
 
-async def encoder_producer(paths, q: asyncio.Queue, loop: asyncio.AbstractEventLoop):
-    """Offload encoding to threads and feed an asyncio.Queue."""
+    ``paths`` is a list of recorded frames or an async iterable of live ones.
+    Jobs are submitted ahead of time but results are awaited oldest-first, so
+    the queue still receives ``(name, ts, b64)`` tuples in timestamp order
+    (raw bytes instead of base64 when WIRE_FORMAT is "binary").
+    With a controller, each job uses its quality/scale at submit time.
+    With ROI_CROP, frames are decoded and the face located on one extra
+    thread in submit order, so the tracker sees consecutive frames however
+    many workers encode them.
+    Returns encode stats for the end-of-run summary.
+    """
+    fn = frame_bytes if WIRE_FORMAT == "binary" else b64_frame
+    locate = ROI_CROPPER is not None and FRAME_FORMAT == "jpeg"
+
+    window = max(1, ENC_WINDOW)
+    slots = asyncio.Semaphore(window)
+    inflight: asyncio.Queue = asyncio.Queue()  # (source, future) in submit order; None ends
+    encoded = 0
+    busy = 0.0  # summed per-job encode time across workers
+    start = perf_counter()
+
+    async def emitter():
+        # forwards each result as soon as it and everything before it are done
+        nonlocal encoded, busy
+        try:
+            while True:
+                item = await inflight.get()
+                if item is None:
+                    return
+                p, fut = item
+                b64, dt = await fut
+                slots.release()
+                busy += dt
+                encoded += 1
+                await q.put((p.name, p.stem, b64))  # filename (without .png) as timestamp
+        except BaseException:
+            for _ in range(window):
+                slots.release()  # a failed encode must not leave the submitter waiting
+            raise
+
+    async def encode(pool, located, p, quality, scale):
+        if located is not None:
+            located = await located
+        return await loop.run_in_executor(pool, _timed, fn, p, quality, scale, located)
+
+    async def sources():
+        if hasattr(paths, "__aiter__"):
+            async for p in paths:
+                yield p
+        else:
+            for p in paths:
+                yield p
+
+    locator = ThreadPoolExecutor(max_workers=1) if locate else None  # one thread: frames located in submit order
     with ThreadPoolExecutor(max_workers=ENC_WORKERS) as pool:
-        for p in paths:
-            if FRAME_FORMAT == "raw":
-                b64 = await loop.run_in_executor(pool, b64_raw, p)
-            else:
-                b64 = await loop.run_in_executor(pool, b64_jpeg, p, JPEG_QUALITY)
-            ts_str = p.stem  # filename (without .png) as timestamp
-            await q.put((p.name, ts_str, b64))
+        emit_task = asyncio.create_task(emitter())
+        try:
+            async for p in sources():
+                await slots.acquire()
+                if emit_task.done():
+                    break
+                quality, scale = (controller.quality, controller.scale) if controller else (JPEG_QUALITY, 1.0)
+                located = loop.run_in_executor(locator, locate_frame, p) if locator is not None else None
+                inflight.put_nowait((p, asyncio.ensure_future(encode(pool, located, p, quality, scale))))
+            inflight.put_nowait(None)
+            await emit_task  # re-raises an encode failure
+        finally:
+            if not emit_task.done():
+                emit_task.cancel()
+            while not inflight.empty():
+                item = inflight.get_nowait()
+                if item is not None:
+                    item[1].cancel()
+            if locator is not None:
+                locator.shutdown()
     await q.put(None)  # sentinel
 
-# -------------------- WebSocket helpers --------------------
-def build_ws_url() -> str:
-    from urllib.parse import urlencode
-    params = {"api_key": API_KEY, "client": CLIENT}
-    if OBJECT_ID:
-        params["objectId"] = OBJECT_ID
-    if CALLBACK_URL:
-        params["callback_url"] = CALLBACK_URL
-    return f"{BACKEND_WS_BASE.rstrip('/')}/?{urlencode(params)}"
-
-def build_payload(datapt_id: str, state: str, timestamp: str, frame_b64: str, advanced: bool = True) -> dict:
-    # Centralized payload builder — mirrors JS client
+    elapsed = perf_counter() - start
     return {
-        "datapt_id": datapt_id,
-        "state": state,             # "stream" | "end"
-        "advanced": bool(advanced),
-        "timestamp": timestamp,     # from filename stem
-        "frame_data": frame_b64,    # base64
+        "window": window,
+        "workers": ENC_WORKERS,
+        "frames": encoded,
+        "elapsed": elapsed,
+        "fps": encoded / elapsed if elapsed > 0 else 0.0,
+        "ms_per_frame": 1000.0 * busy / encoded if encoded else 0.0,
     }
 
+# -------------------- WebSocket helpers --------------------
+def build_ws_url() -> str:
+    return backend_url(BACKEND_WS_BASE, API_KEY, CLIENT, OBJECT_ID, CALLBACK_URL)
+
 def dump_payload(obj: dict) -> Union[bytes, str]:
     if WS_TEXT_FRAMES:
         return orjson.dumps(obj).decode("utf-8")
     return orjson.dumps(obj)
 
+def encode_message(datapt_id: str, state: str, timestamp: str, frame: Union[bytes, str], advanced: bool = True) -> Union[bytes, str]:
+    """One frame as a wire message: binary header + JPEG, or the JSON payload."""
+    if WIRE_FORMAT == "binary":
+        return pack_frame(datapt_id, state, timestamp, frame, advanced)
+    return dump_payload(build_payload(datapt_id, state, timestamp, frame, advanced))
+
 def _pretty_server_log(msg_obj):
     """Print full server message (no filtering)."""
     try:
@@ -105,8 +318,10 @@ def _pretty_server_log(msg_obj):
     except Exception:
         return f"<< {repr(msg_obj)}"
 
-async def server_listener(ws):
-    """Print messages as they arrive (text or binary)."""
+async def server_listener(ws, tracker: Optional[LatencyTracker] = None,
+                          controller: Optional[AdaptiveController] = None):
+    """Print messages as they arrive (text or binary), tracking send-to-result latency."""
+    matched = 0
     try:
         async for msg in ws:
             if isinstance(msg, (bytes, bytearray)):
@@ -115,18 +330,27 @@ async def server_listener(ws):
                     s = msg.decode("utf-8", errors="ignore")
                     try:
                         obj = orjson.loads(s)
-                        print(_pretty_server_log(obj))
                     except Exception:
                         print("<< (bytes) " + s)
+                        continue
                 except Exception:
                     print(f"<< (binary) {len(msg)} bytes")
+                    continue
             else:
                 # text frames
                 try:
                     obj = orjson.loads(msg)
-                    print(_pretty_server_log(obj))
                 except Exception:
                     print("<< " + msg)
+                    continue
+            print(_pretty_server_log(obj))
+            latency = tracker.on_response(obj) if tracker is not None and isinstance(obj, dict) else None
+            if latency is not None:
+                if controller is not None:
+                    controller.observe_latency(latency)
+                matched += 1
+                if matched % LATENCY_REPORT_EVERY == 0:
+                    print(">> " + tracker.summary())
     except websockets.exceptions.ConnectionClosed:
         pass
 
@@ -134,86 +358,181 @@ async def server_listener(ws):
 async def main():
     if FRAME_FORMAT not in {"raw", "jpeg"}:
         raise ValueError(f"FRAME_FORMAT must be 'raw' or 'jpeg', got: {FRAME_FORMAT}")
+    if WIRE_FORMAT not in {"json", "binary"}:
+        raise ValueError(f"WIRE_FORMAT must be 'json' or 'binary', got: {WIRE_FORMAT}")
+    if SOURCE not in {"replay", "camera"}:
+        raise ValueError(f"SOURCE must be 'replay' or 'camera', got: {SOURCE}")
 
-    paths = list_timestamped_pngs()
-    if not paths:
-        print(f"No timestamped PNGs found under {IMAGES_DIR}/ (e.g. 1747154380.5511632.png)")
-        return
+    loop = asyncio.get_running_loop()
+    live = None
+    if SOURCE == "replay":
+        open_frame_cache()
+    if SOURCE == "camera":
+        try:
+            archive = Archiver(ARCHIVE_DIR, ARCHIVE_QUEUE, ARCHIVE_EXISTING) if ARCHIVE_DIR else None
+        except FileExistsError as e:
+            print(f"{e}; set ARCHIVE_EXISTING=append or ARCHIVE_EXISTING=overwrite, or pick another ARCHIVE_DIR")
+            return
+        if archive is not None and archive.store.existing_frames:
+            action = "appending to" if ARCHIVE_EXISTING == "append" else "overwrote"
+            print(f">> {action} the {archive.store.existing_frames} frames already in {ARCHIVE_DIR}/ "
+                  f"(ARCHIVE_EXISTING={ARCHIVE_EXISTING})")
+        live = CameraSource(CAMERA_INDEX, FPS, RES_WIDTH, RES_HEIGHT, LIVE_DURATION_SEC,
+                            maxsize=max(1, int(FPS)), archive=archive)
+        live.start(loop)
+        with contextlib.suppress(NotImplementedError, RuntimeError):
+            loop.add_signal_handler(signal.SIGINT, live.stop)  # Ctrl+C ends the session with an "end" frame
+        paths = live
+        print(f">> live from camera {CAMERA_INDEX} @ {FPS} FPS"
+              + (f", archiving to {ARCHIVE_DIR}/" if archive is not None else ""))
+    else:
+        paths = list_frames()
+        if not paths:
+            print(f"No frames found under {IMAGES_DIR}/ (frames.idx store or e.g. 1747154380.5511632.png)")
+            return
 
-    # (Optionally) fetch the first image size
-    _w, _h = get_size_from_image(paths[0])
+        # (Optionally) fetch the first image size
+        _w, _h = get_size_from_image(paths[0])
 
     ws_url = build_ws_url()
     print("Connecting to:", ws_url)
 
-    async with websockets.connect(ws_url, max_size=WS_MAX_SIZE, compression=None) as ws:
-        listener_task = asyncio.create_task(server_listener(ws))
+    tracker = LatencyTracker()
+    controller = AdaptiveController.from_env(JPEG_QUALITY, FPS) if ADAPTIVE else None
 
-        loop = asyncio.get_running_loop()
-        q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
-        _ = asyncio.create_task(encoder_producer(paths, q, loop))
+    # a short queue keeps quality/scale changes from lagging behind many pre-encoded frames
+    short_queue = controller is not None or live is not None  # also keeps live latency low
+    q: asyncio.Queue = asyncio.Queue(maxsize=min(QUEUE_MAXSIZE, max(1, int(FPS))) if short_queue else QUEUE_MAXSIZE)
+    encoder_task = asyncio.create_task(encoder_producer(paths, q, loop, controller))
 
-        # prefill ~0.5s
-        prefill_target = max(1, int(FPS * 0.5))
-        stash = []
-        while len(stash) < prefill_target:
-            item = await q.get()
-            if item is None:
-                break
-            stash.append(item)
+    # prefill ~0.5s (replay only; live frames go out as soon as they are encoded)
+    prefill_target = 1 if live is not None else max(1, int(FPS * 0.5))
+    stash = []
+    while len(stash) < prefill_target:
+        item = await q.get()
+        if item is None:
+            break
+        stash.append(item)
 
-        start = perf_counter()
-        sent = 0
-
-        async def send_item(item, state="stream"):
-            _, ts_str, b64 = item
-            payload = build_payload(datapt_id=str(uuid.uuid4()), state=state, timestamp=ts_str, frame_b64=b64, advanced=True)
-            await ws.send(dump_payload(payload))
-
-        # send prefilled
+    async def frames():
         for it in stash:
-            await send_item(it, "stream")
-            sent += 1
-
-            next_time = start + sent / FPS
-            delay = next_time - perf_counter()
-            if delay > 0:
-                await asyncio.sleep(delay)
-            if sent % 60 == 0:
-                elapsed = perf_counter() - start
-                print(f">> sent {sent} frames @ {sent/elapsed:.2f} fps")
-
-        # drain the queue
-        last_item = None
+            yield it
+        if len(stash) < prefill_target:
+            return  # producer already finished during prefill
         while True:
             it = await q.get()
             if it is None:
-                break
-            last_item = it
-            await send_item(it, "stream")
-            sent += 1
+                return
+            yield it
+
+    frame_iter = frames()  # survives reconnects: resumes with the next unsent frame
+    datapt_id = str(uuid.uuid4())  # one per session, kept across reconnects
+    replay = ReplayBuffer(int(FPS * RESUME_BUFFER_SEC))
+    rstats = ReconnectStats()
+    backoff = Backoff(RECONNECT_INITIAL, RECONNECT_MAX_DELAY)
+    pacer = Pacer.from_env(FPS) if live is None else live.pacer  # PACE_POLICY: burst (default) | drop | source
+    start = None
+    sent = 0
+    skipped = 0
+    last_item = None
+    end_sent = False
 
-            next_time = start + sent / FPS
-            delay = next_time - perf_counter()
-            if delay > 0:
-                await asyncio.sleep(delay)
+    while True:
+        try:
+            async with websockets.connect(ws_url, max_size=WS_MAX_SIZE, compression=None) as ws:
+                listener_task = asyncio.create_task(server_listener(ws, tracker, controller))
 
-            if sent % 60 == 0:
-                elapsed = perf_counter() - start
-                print(f">> sent {sent} frames @ {sent/elapsed:.2f} fps")
+                gap = rstats.connected()  # None the first time: not a reconnect
+                backoff.reset()
+                if gap is not None:
+                    if start is not None and live is None:
+                        start += gap  # replay from disk pauses while the link is down
+                        pacer.shift(gap)
+                    resent = await replay.resend(ws)
+                    rstats.replayed += resent
+                    print(f">> reconnected after {gap:.1f}s; re-sent {resent} buffered frames")
+                if start is None:
+                    start = perf_counter()
 
-        # final "end"
-        if last_item is not None:
-            await send_item(last_item, "end")
-        print(">> sent END frame; awaiting server completion...")
+                async def send_item(item, state="stream"):
+                    _, ts_str, frame = item
+                    msg = encode_message(datapt_id, state, ts_str, frame, advanced=True)
+                    entry = None
+                    if state == "stream":
+                        entry = replay.add(ts_str, msg)
+                        tracker.mark_sent(ts_str)  # "end" repeats the last timestamp: keep its frame's send time
+                    t0 = perf_counter()
+                    await ws.send(msg)
+                    if entry is not None:
+                        replay.mark_sent(entry)
+                    if controller is not None:
+                        controller.observe_send(perf_counter() - t0, write_buffer_size(ws))
 
-        try:
-            await asyncio.wait_for(listener_task, timeout=20.0)
-        except asyncio.TimeoutError:
-            listener_task.cancel()
-            with contextlib.suppress(asyncio.CancelledError):
-                await listener_task
-        print("Done.")
+                if not end_sent:
+                    async for it in frame_iter:
+                        last_item = it
+                        # pace on source frames so a reduced send rate still replays in real time
+                        # (live frames are already paced by the capture thread)
+                        if live is None and not await pacer.wait_async(float(it[1])):
+                            continue  # late under PACE_POLICY=drop
+                        if controller is None or controller.admit(FPS):
+                            await send_item(it, "stream")
+                            sent += 1
+                            if sent % 60 == 0:
+                                elapsed = perf_counter() - start
+                                print(f">> sent {sent} frames @ {sent/elapsed:.2f} fps")
+                        else:
+                            skipped += 1
+
+                    # final "end"
+                    if last_item is not None:
+                        await send_item(last_item, "end")
+                    end_sent = True
+                    print(">> sent END frame; awaiting server completion...")
+
+                try:
+                    await asyncio.wait_for(listener_task, timeout=20.0)
+                except asyncio.TimeoutError:
+                    listener_task.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await listener_task
+            break
+        except RECONNECT_ERRORS as e:
+            if not RECONNECT or (RECONNECT_MAX_ATTEMPTS and backoff.attempts >= RECONNECT_MAX_ATTEMPTS):
+                if live is not None:
+                    live.close()  # release the camera and flush the archive
+                raise
+            rstats.disconnected()
+            delay = backoff.next()
+            lost = "connection lost" if rstats.ever_up else "could not connect"
+            print(f">> {lost} ({e!r}); reconnecting in {delay:.1f}s (attempt {backoff.attempts})")
+            await asyncio.sleep(delay)
+
+    enc = await encoder_task
+    if live is not None:
+        live.close()
+    print(f">> encoder: window={enc['window']} workers={enc['workers']} "
+          f"frames={enc['frames']} in {enc['elapsed']:.2f}s "
+          f"({enc['fps']:.1f} fps wall, {enc['ms_per_frame']:.1f} ms/frame per job)")
+    if ROI_CROPPER is not None:
+        print(">> " + ROI_METER.summary())
+        if ROI_CROPPER.tracker is not None:
+            print(">> " + ROI_CROPPER.tracker.summary())
+    if FRAME_CACHE is not None:
+        print(">> " + FRAME_CACHE.summary())
+    if controller is not None:
+        print(f">> {controller.summary()}; {skipped} frames skipped by rate control")
+    if live is not None:
+        print(">> " + live.summary())
+        if live.archive is not None:
+            print(">> " + live.archive.summary())
+    else:
+        print(">> " + pacer.summary())
+    if rstats.reconnects or rstats.failed_connects or replay.lost:
+        print(">> " + rstats.summary(replay.lost))
+    print(">> send-to-result " + tracker.summary())
+    print(tracker.render())
+    print("Done.")
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,281 @@
+import threading
+from time import perf_counter
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]  # x, y, w, h in full-frame pixels
+
+_CASCADE = "haarcascade_frontalface_default.xml"
+
+
+def encode_jpeg(img: np.ndarray, quality: int) -> bytes:
+    ok, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+def _small_gray(img: np.ndarray, width: int):
+    """Grayscale copy at most ``width`` pixels wide, and the scale factor used."""
+    h, w = img.shape[:2]
+    scale = min(1.0, width / float(w))
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return gray, scale
+
+
+# -------------------- Face tracking --------------------
+class FaceTracker:
+    """Run an expensive face detector rarely and follow the box cheaply in between.
+
+    The detector runs on the first frame, every ``detect_every`` frames, and
+    whenever tracking confidence drops below ``min_confidence``. In between,
+    the face patch from the last detection is template-matched (normalised
+    cross-correlation on a ``track_width``-pixel grayscale copy) inside a
+    search area around the previous box. The match score is the confidence.
+
+    Tracking assumes consecutive frames: call ``update`` once per frame, in
+    capture order, from one thread, and hand the box to whatever crops or
+    samples that frame. The lock only keeps ``snapshot`` consistent.
+    """
+
+    def __init__(self, detect: Callable[[np.ndarray], Optional[Box]], detect_every: int = 10,
+                 min_confidence: float = 0.5, search: float = 0.5, track_width: int = 160):
+        self.detect = detect
+        self.detect_every = max(1, int(detect_every))
+        self.min_confidence = float(min_confidence)
+        self.search = float(search)
+        self.track_width = int(track_width)
+        self.box: Optional[Box] = None
+        self.confidence = 0.0
+        self._template: Optional[np.ndarray] = None
+        self._since_detect = 0
+        self._lock = threading.Lock()
+        # Stats
+        self.frames = 0
+        self.detections = 0
+        self.tracked = 0
+        self.lost = 0  # tracking fell below min_confidence
+        self.detect_time = 0.0
+        self.track_time = 0.0
+
+    def update(self, img: np.ndarray) -> Optional[Box]:
+        """Face box (full-frame pixels) in ``img``; the last known box if the face was not found."""
+        with self._lock:
+            self.frames += 1
+            self._since_detect += 1
+            gray, scale = _small_gray(img, self.track_width)
+            if self.box is not None and self._template is not None and self._since_detect < self.detect_every:
+                t0 = perf_counter()
+                box, conf = self._track(gray, scale)
+                self.track_time += perf_counter() - t0
+                self.confidence = conf
+                if conf >= self.min_confidence:
+                    self.box = box
+                    self.tracked += 1
+                    return self.box
+                self.lost += 1
+            self._detect(img, gray, scale)
+            return self.box
+
+    def _detect(self, img: np.ndarray, gray: np.ndarray, scale: float):
+        t0 = perf_counter()
+        face = self.detect(img)
+        self.detect_time += perf_counter() - t0
+        self.detections += 1
+        self._since_detect = 0
+        if face is None:
+            self.confidence = 0.0
+            self._template = None  # re-detect next frame rather than track a stale patch
+            return
+        self.box = face
+        self.confidence = 1.0
+        x, y, w, h = (int(round(v * scale)) for v in face)
+        patch = gray[y:y + h, x:x + w]
+        self._template = patch.copy() if patch.size and min(patch.shape) >= 8 else None
+
+    def _track(self, gray: np.ndarray, scale: float) -> Tuple[Optional[Box], float]:
+        th, tw = self._template.shape
+        x, y, _, _ = (int(round(v * scale)) for v in self.box)
+        pad_x, pad_y = int(tw * self.search), int(th * self.search)
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(gray.shape[1], x + tw + pad_x), min(gray.shape[0], y + th + pad_y)
+        region = gray[y0:y1, x0:x1]
+        if region.shape[0] < th or region.shape[1] < tw:
+            return None, 0.0
+        res = cv2.matchTemplate(region, self._template, cv2.TM_CCOEFF_NORMED)
+        _, conf, _, (mx, my) = cv2.minMaxLoc(res)
+        _, _, w, h = self.box
+        return (int((x0 + mx) / scale), int((y0 + my) / scale), w, h), float(conf)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            frames = max(1, self.frames)
+            return {
+                "frames": self.frames,
+                "detections": self.detections,
+                "detect_rate": self.detections / frames,
+                "lost": self.lost,
+                "confidence": self.confidence,
+                "ms_per_frame": 1000.0 * (self.detect_time + self.track_time) / frames,
+                "detect_ms": 1000.0 * self.detect_time / self.detections if self.detections else 0.0,
+                "track_ms": 1000.0 * self.track_time / self.tracked if self.tracked else 0.0,
+            }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        return (f"face tracker: detector on {s['detections']}/{s['frames']} frames ({100 * s['detect_rate']:.0f}%), "
+                f"{s['lost']} track losses; {s['ms_per_frame']:.2f} ms/frame "
+                f"(detect {s['detect_ms']:.1f} ms, track {s['track_ms']:.2f} ms)")
+
+
+# -------------------- Face crop --------------------
+class FaceCropper:
+    """Find the face, crop it with a margin and resize it to a fixed square.
+
+    Detection runs on a downscaled grayscale copy. With ``detect_every`` > 1 a
+    :class:`FaceTracker` follows the face between detections. When a frame has
+    no face the last known box is reused; until a face has been seen the full
+    frame is passed through unchanged.
+
+    ``face`` (and ``roi``/``crop``, which call it) is stateful and must see the
+    frames in order on one thread. ``crop_box`` is not: workers crop with a box
+    found beforehand.
+    """
+
+    def __init__(self, margin: float = 0.25, size: int = 192, detect_width: int = 320,
+                 detect_every: int = 1, min_confidence: float = 0.5):
+        self.margin = float(margin)
+        self.size = int(size)
+        self.detect_width = int(detect_width)
+        self.last_box: Optional[Box] = None
+        self._local = threading.local()  # CascadeClassifier is not thread-safe
+        self.tracker = FaceTracker(self.detect, detect_every, min_confidence) if detect_every > 1 else None
+
+    def _detector(self) -> cv2.CascadeClassifier:
+        det = getattr(self._local, "detector", None)
+        if det is None:
+            det = cv2.CascadeClassifier(cv2.data.haarcascades + _CASCADE)
+            self._local.detector = det
+        return det
+
+    def detect(self, img: np.ndarray) -> Optional[Box]:
+        """Largest face in ``img`` or None."""
+        gray, scale = _small_gray(img, self.detect_width)
+        faces = self._detector().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+        if len(faces) == 0:
+            return None
+        x, y, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        return (int(x / scale), int(y / scale), int(fw / scale), int(fh / scale))
+
+    def expand(self, box: Box, shape) -> Box:
+        """Square box around ``box`` grown by ``margin`` per side, shifted to fit the frame."""
+        h, w = shape[:2]
+        x, y, bw, bh = box
+        side = int(max(bw, bh) * (1.0 + 2.0 * self.margin))
+        side = max(1, min(side, w, h))
+        cx, cy = x + bw // 2, y + bh // 2
+        x0 = min(max(0, cx - side // 2), w - side)
+        y0 = min(max(0, cy - side // 2), h - side)
+        return (x0, y0, side, side)
+
+    def locate(self, img: np.ndarray) -> Optional[Box]:
+        """Face box in ``img``: tracked between detections if a tracker is set, else detected."""
+        return self.tracker.update(img) if self.tracker is not None else self.detect(img)
+
+    def face(self, img: np.ndarray) -> Optional[Box]:
+        """Face box in ``img``, or the last one seen if there is none (None until the first face)."""
+        box = self.locate(img)
+        if box is not None:
+            self.last_box = box
+        return self.last_box
+
+    def roi(self, img: np.ndarray) -> Optional[Box]:
+        box = self.face(img)
+        return None if box is None else self.expand(box, img.shape)
+
+    def crop_box(self, img: np.ndarray, face: Optional[Box]) -> np.ndarray:
+        """``img`` cropped around ``face`` (from ``face``) and resized; the full frame if None."""
+        if face is None:
+            return img
+        x, y, bw, bh = self.expand(face, img.shape)
+        return cv2.resize(img[y:y + bh, x:x + bw], (self.size, self.size), interpolation=cv2.INTER_AREA)
+
+    def crop(self, img: np.ndarray) -> np.ndarray:
+        return self.crop_box(img, self.face(img))
+
+
+# -------------------- Savings stats --------------------
+class SavingsMeter:
+    """Average bytes saved per frame by cropping.
+
+    Every sent frame is counted; the full-frame JPEG size is only measured on
+    one frame in ``sample_every`` so the comparison costs little extra encoding.
+    Safe to share between encode workers. Frames served from the frame cache
+    are counted with ``record(sent, cached=True)``: their bytes are real, but
+    they were never cropped here, so they are never sampled.
+    """
+
+    def __init__(self, sample_every: int = 30):
+        self.sample_every = max(1, int(sample_every))
+        self._lock = threading.Lock()
+        self._started = 0  # frames that asked should_sample, so concurrent workers never share a slot
+        self.frames = 0
+        self.cached = 0
+        self.sent_bytes = 0
+        self.full_samples = 0
+        self.full_bytes = 0
+
+    def should_sample(self) -> bool:
+        """Call once per encoded frame, before ``record``: True for one frame in ``sample_every``."""
+        with self._lock:
+            sample = self._started % self.sample_every == 0
+            self._started += 1
+            return sample
+
+    def record(self, sent: int, full: Optional[int] = None, cached: bool = False):
+        with self._lock:
+            self.frames += 1
+            self.sent_bytes += sent
+            if cached:
+                self.cached += 1
+            if full is not None:
+                self.full_samples += 1
+                self.full_bytes += full
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.frames or not self.full_samples:
+                return "roi: no frames measured"
+            avg_sent = self.sent_bytes / self.frames
+            avg_full = self.full_bytes / self.full_samples
+            cached = self.cached
+        saved = avg_full - avg_sent
+        pct = 100.0 * saved / avg_full if avg_full else 0.0
+        note = f" ({cached} frames from the frame cache)" if cached else ""
+        return (f"roi: avg {avg_sent / 1024:.1f} KiB/frame sent vs {avg_full / 1024:.1f} KiB full "
+                f"-> saved {saved / 1024:.1f} KiB/frame ({pct:.0f}%){note}")
+
+
+def scale_image(img: np.ndarray, scale: float) -> np.ndarray:
+    if scale >= 1.0:
+        return img
+    h, w = img.shape[:2]
+    return cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def crop_and_encode(img: np.ndarray, quality: int, cropper: FaceCropper, face: Optional[Box],
+                    meter: Optional[SavingsMeter] = None, scale: float = 1.0) -> bytes:
+    """JPEG of the (optionally downscaled) crop around ``face``, recording savings against the full frame on sampled frames.
+
+    ``face`` comes from ``cropper.face`` on the frame-ordered thread, so this is
+    safe to run on any number of encode workers.
+    """
+    full = len(encode_jpeg(img, quality)) if meter is not None and meter.should_sample() else None
+    data = encode_jpeg(scale_image(cropper.crop_box(img, face), scale), quality)
+    if meter is not None:
+        meter.record(len(data), full)
+    return data
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from framestore import StoredFrame
+
+
+class FrameCache:
+    """On-disk cache of encoded frame payloads with an LRU size cap.
+
+    Entries are keyed by the source identity plus the encode parameters:
+
+    - PNG files: resolved path, size and mtime, so edited files miss.
+    - Frame-store frames: store path, offset, length and timestamp. Stores are
+      append-only, so existing frames keep their identity while recording.
+
+    Each entry is its own file under ``directory``; a hit refreshes the file's
+    mtime, and eviction removes the oldest-mtime files first. Safe to use from
+    the encoder thread pool.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._sizes: dict[str, int] = {}
+        self._atime: dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".bin"):
+                st = entry.stat()
+                self._sizes[entry.path] = st.st_size
+                self._atime[entry.path] = st.st_mtime
+        self._total = sum(self._sizes.values())
+
+    @staticmethod
+    def source_id(src) -> tuple:
+        if isinstance(src, StoredFrame):
+            rec = src.store.index[src.index]
+            return ("store", str(src.store.directory.resolve()), int(rec["offset"]), int(rec["length"]), src.ts)
+        st = os.stat(src)
+        return ("file", str(Path(src).resolve()), st.st_size, st.st_mtime_ns)
+
+    def key(self, src, params: tuple) -> str:
+        return hashlib.sha1(repr((self.source_id(src), params)).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return str(self.directory / f"{key}.bin")
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            self._atime[path] = now
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # atomic: readers never see a partial entry
+        with self._lock:
+            self._total += len(data) - self._sizes.get(path, 0)
+            self._sizes[path] = len(data)
+            self._atime[path] = time.time()
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until 10% under the cap (lock held)."""
+        target = int(self.max_bytes * 0.9)
+        for path in sorted(self._atime, key=self._atime.get):
+            if self._total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._total -= self._sizes.pop(path, 0)
+            del self._atime[path]
+            self.evicted += 1
+
+    def summary(self) -> str:
+        with self._lock:
+            lookups = self.hits + self.misses
+            rate = 100.0 * self.hits / lookups if lookups else 0.0
+            return (f"frame cache: {self.hits}/{lookups} hits ({rate:.0f}%), {self.evicted} evicted, "
+                    f"{self._total / 2**20:.1f}/{self.max_bytes / 2**20:.0f} MiB in {self.directory}")
+
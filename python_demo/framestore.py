@@ -0,0 +1,171 @@
+"""Append-only single-file recording container.
+
+A recording directory holds two files:
+
+    frames.bin  encoded images (PNG/JPEG bytes) back to back
+    frames.idx  one fixed-size record per frame: timestamp, offset, length
+
+The index is written after the frame bytes, so a reader only ever sees
+complete frames even while a recording is still being appended to.
+Readers memory-map both files; frames are returned as zero-copy views.
+"""
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+DATA_NAME = "frames.bin"
+INDEX_NAME = "frames.idx"
+
+INDEX_DTYPE = np.dtype([("ts", "<f8"), ("offset", "<u8"), ("length", "<u4")])
+
+EXISTING = ("fail", "append", "overwrite")  # what a writer does with a store already in its directory
+
+
+def is_framestore(path: Union[str, Path]) -> bool:
+    return (Path(path) / INDEX_NAME).is_file()
+
+
+# -------------------- Legacy PNG layout --------------------
+_TS_PNG = re.compile(r"^\d+(?:\.\d+)?\.png$")  # matches 1747154380.5511632.png
+
+
+def list_timestamped_pngs(directory: Union[str, Path]) -> list:
+    """One-PNG-per-frame recordings (``REC_FORMAT=png``), sorted by the timestamp in the name."""
+    paths = [p for p in Path(directory).glob("*.png") if _TS_PNG.match(p.name)]
+    paths.sort(key=lambda p: float(p.stem))
+    return paths
+
+
+# -------------------- Writer --------------------
+class FrameStoreWriter:
+    """Append encoded frames to ``<dir>/frames.bin`` and index them in ``frames.idx``.
+
+    If the directory already holds a recording, ``existing`` decides: "fail"
+    raises ``FileExistsError`` (so two sessions never silently become one),
+    "append" continues it, "overwrite" truncates it. ``existing_frames`` is
+    how many frames were there before.
+    """
+
+    def __init__(self, directory: Union[str, Path], flush_every: int = 30, existing: str = "fail"):
+        if existing not in EXISTING:
+            raise ValueError(f"existing must be one of {EXISTING}, got: {existing}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index_path = self.directory / INDEX_NAME
+        self.existing_frames = index_path.stat().st_size // INDEX_DTYPE.itemsize if index_path.is_file() else 0
+        if self.existing_frames and existing == "fail":
+            raise FileExistsError(f"{self.directory} already holds a recording ({self.existing_frames} frames)")
+        mode = "ab" if existing == "append" else "wb"
+        self._data = open(self.directory / DATA_NAME, mode)
+        self._index = open(index_path, mode)
+        self._offset = self._data.tell()
+        self._record = np.zeros(1, dtype=INDEX_DTYPE)
+        self.flush_every = max(1, int(flush_every))
+        self.count = 0
+
+    def append(self, ts: float, data: Union[bytes, memoryview, np.ndarray]):
+        buf = memoryview(data).cast("B")
+        self._data.write(buf)
+        self._record[0] = (ts, self._offset, buf.nbytes)
+        self._offset += buf.nbytes
+        self._index.write(self._record.tobytes())
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._data.flush()  # data before index; readers also skip entries past EOF
+            self._index.flush()
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -------------------- Reader --------------------
+class StoredFrame:
+    """Reference to one frame in a store; quacks like a ``Path`` for ``.name``/``.stem``."""
+
+    __slots__ = ("store", "index", "ts")
+
+    def __init__(self, store: "FrameStoreReader", index: int, ts: float):
+        self.store = store
+        self.index = index
+        self.ts = ts
+
+    @property
+    def stem(self) -> str:
+        return repr(self.ts)
+
+    @property
+    def name(self) -> str:
+        return f"{self.store.directory.name}#{self.index}"
+
+    def data(self) -> memoryview:
+        return self.store.data(self.index)
+
+
+class FrameStoreReader:
+    """Memory-mapped, random-access view of a recording directory."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._maps = []
+        data_map = self._map(self.directory / DATA_NAME)
+        index_map = self._map(self.directory / INDEX_NAME)
+        self._data = memoryview(data_map) if data_map is not None else memoryview(b"")
+        n = (len(index_map) // INDEX_DTYPE.itemsize) if index_map is not None else 0
+        index = np.frombuffer(index_map, dtype=INDEX_DTYPE, count=n) if n else np.zeros(0, INDEX_DTYPE)
+        # offsets only grow: keep the prefix whose bytes are already in the data file
+        ends = index["offset"] + index["length"]
+        self.index = index[:int(np.searchsorted(ends, len(self._data), side="right"))]
+        self.timestamps = self.index["ts"]
+
+    def _map(self, path: Path) -> Optional[mmap.mmap]:
+        if not path.is_file() or os.path.getsize(path) == 0:
+            return None
+        with open(path, "rb") as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(m)
+        return m
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def data(self, i: int) -> memoryview:
+        rec = self.index[i]
+        off = int(rec["offset"])
+        return self._data[off:off + int(rec["length"])]
+
+    def frame(self, i: int) -> StoredFrame:
+        return StoredFrame(self, i, float(self.timestamps[i]))
+
+    def find(self, ts: float) -> int:
+        """Index of the first frame at or after ``ts``."""
+        return int(np.searchsorted(self.timestamps, ts, side="left"))
+
+    def frames(self, start_ts: Optional[float] = None, end_ts: Optional[float] = None) -> list:
+        """Frames with ``start_ts <= ts < end_ts`` (either bound optional)."""
+        lo = 0 if start_ts is None else self.find(start_ts)
+        hi = len(self) if end_ts is None else self.find(end_ts)
+        return [self.frame(i) for i in range(lo, hi)]
+
+    def __iter__(self) -> Iterator[StoredFrame]:
+        return (self.frame(i) for i in range(len(self)))
+
+    def close(self):
+        self.index = self.timestamps = None
+        self._data = memoryview(b"")
+        for m in self._maps:
+            try:
+                m.close()
+            except BufferError:
+                pass  # frames still referenced elsewhere; freed with them
+        self._maps = []
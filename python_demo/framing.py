@@ -0,0 +1,78 @@
+"""Wire formats for frames, and the backend URL they are sent to.
+
+The JSON payload (``build_payload``) carries the frame base64-encoded. The
+binary format is a fixed header followed by the raw JPEG bytes.
+
+Layout (network byte order, 28 bytes):
+
+    magic      2s   b"RP"
+    version    B    1
+    flags      B    bit 0 = advanced, bit 1 = state "end" (else "stream")
+    datapt_id  16s  UUID bytes
+    timestamp  d    UNIX seconds (float64)
+
+Replaces base64 + JSON for the per-frame payload; one binary websocket
+message carries exactly one frame.
+"""
+import struct
+import uuid
+from typing import Union
+from urllib.parse import urlencode
+
+MAGIC = b"RP"
+VERSION = 1
+FLAG_ADVANCED = 0x01
+FLAG_END = 0x02
+
+HEADER = struct.Struct("!2sBB16sd")
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def backend_url(base: str, api_key: str, client: str, object_id: str = "", callback_url: str = "") -> str:
+    params = {"api_key": api_key, "client": client}
+    if object_id:
+        params["objectId"] = object_id
+    if callback_url:
+        params["callback_url"] = callback_url
+    return f"{base.rstrip('/')}/?{urlencode(params)}"
+
+
+def build_payload(datapt_id: str, state: str, timestamp: str, frame_b64: str, advanced: bool = True) -> dict:
+    # Centralized payload builder — mirrors JS client
+    return {
+        "datapt_id": datapt_id,
+        "state": state,             # "stream" | "end"
+        "advanced": bool(advanced),
+        "timestamp": timestamp,     # from filename stem
+        "frame_data": frame_b64,    # base64
+    }
+
+
+def pack_frame(datapt_id: str, state: str, timestamp: Union[str, float], frame: Buffer, advanced: bool = True) -> bytes:
+    flags = (FLAG_ADVANCED if advanced else 0) | (FLAG_END if state == "end" else 0)
+    header = HEADER.pack(MAGIC, VERSION, flags, uuid.UUID(datapt_id).bytes, float(timestamp))
+    return b"".join((header, frame))
+
+
+def is_binary_frame(buf: Buffer) -> bool:
+    return len(buf) >= HEADER.size and bytes(buf[:2]) == MAGIC
+
+
+def unpack_frame(buf: Buffer) -> dict:
+    """Decode a binary frame into the same fields as the JSON payload.
+
+    ``frame_data`` is a memoryview of the JPEG bytes (no copy).
+    """
+    if not is_binary_frame(buf):
+        raise ValueError("not a binary frame")
+    magic, version, flags, raw_id, ts = HEADER.unpack_from(buf)
+    if version != VERSION:
+        raise ValueError(f"unsupported frame version: {version}")
+    return {
+        "datapt_id": str(uuid.UUID(bytes=raw_id)),
+        "state": "end" if flags & FLAG_END else "stream",
+        "advanced": bool(flags & FLAG_ADVANCED),
+        "timestamp": ts,
+        "frame_data": memoryview(buf)[HEADER.size:],
+    }
@@ -0,0 +1,73 @@
+"""Run the dashboard's camera → backend → HR pipeline with no Qt and no display.
+
+Logs the heart rate and pipeline metrics instead of drawing them; for units
+without a screen. Stops on Ctrl+C / SIGTERM or after HEADLESS_DURATION_SEC.
+Configuration is the same environment (and .env file) the dashboard reads.
+"""
+import asyncio
+import os
+import signal
+from time import perf_counter
+
+try:
+    from dotenv import load_dotenv  # optional here; the dashboard requires it
+    load_dotenv()
+except ImportError:
+    pass
+
+from pipeline import Pipeline  # noqa: E402
+from vitals import Vitals  # noqa: E402
+
+# -------------------- Config (env overridable) --------------------
+CAMERA_INDEX          = int(os.getenv("CAMERA_INDEX", "0"))
+HEADLESS_LOG_SEC      = float(os.getenv("HEADLESS_LOG_SEC", "5"))     # HR line every N seconds
+HEADLESS_DURATION_SEC = float(os.getenv("HEADLESS_DURATION_SEC", "0"))  # 0 = until stopped
+HEADLESS_HISTORY      = 30 * 60  # rPPG samples kept (one minute at 30 Hz)
+
+
+def status_line(vitals: Vitals, pipeline: Pipeline) -> str:
+    lat = pipeline.latency.snapshot()
+    source = "local" if vitals.local else "server"
+    hr = f"{vitals.hr} bpm ({source})" if vitals.hr else "--"
+    link = "connected" if pipeline.ws is not None else "offline"
+    return (f"HR {hr} | {vitals.samples} rPPG samples | {link}, "
+            f"latency p50 {lat['p50']:.0f} / p95 {lat['p95']:.0f} ms | {pipeline.loop_lag.summary()}")
+
+
+async def main_async():
+    pipeline = Pipeline(CAMERA_INDEX, client="headlessClient")
+    vitals = Vitals(HEADLESS_HISTORY)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, pipeline.stop)
+        except (NotImplementedError, RuntimeError):
+            pass  # e.g. Windows: Ctrl+C raises KeyboardInterrupt instead
+    if HEADLESS_DURATION_SEC > 0:
+        loop.call_later(HEADLESS_DURATION_SEC, pipeline.stop)
+
+    async def report():
+        while True:
+            await asyncio.sleep(HEADLESS_LOG_SEC)
+            print(">> " + status_line(vitals, pipeline))
+
+    start = perf_counter()
+    run_task = asyncio.create_task(pipeline.run())
+    report_task = asyncio.create_task(report())
+    try:
+        async for result in pipeline.results():
+            vitals.add(result.rppg, result.timestamps, result.hr, result.local)
+        await run_task  # surfaces capture / connection errors
+    finally:
+        report_task.cancel()
+
+    print(f">> stopped after {perf_counter() - start:.1f}s: " + status_line(vitals, pipeline))
+    print(">> " + pipeline.reconnect_stats.summary(pipeline.frame_buffer.lost))
+
+
+def main():
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
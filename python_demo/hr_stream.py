@@ -0,0 +1,240 @@
+"""Streaming heart-rate estimation with constant work per frame.
+
+``LocalRppg`` recomputes resampling, POS/CHROM and an FFT over the whole
+window on every update, so its cost grows with the window. ``StreamingHr``
+keeps everything incremental instead:
+
+- samples are resampled onto a uniform grid as they arrive (linear, in place)
+- POS/CHROM normalisation uses exponential moving averages, not window means
+- the band-pass is two recursive biquads
+- the spectrum is a sliding DFT over a fixed set of bins in the HR band
+  (1 bpm apart by default), Hann-windowed in the frequency domain
+
+Per grid sample that is O(bins), independent of the window length. Memory is
+the DFT's ring of pulse values and the complex bin state. ``estimate`` only
+returns the samples added since the previous call, scaled by a running RMS
+(about ±1 for a clean pulse), so results stay O(update_every) and a sample
+keeps the value it was first published with.
+"""
+import math
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from face_roi import FaceCropper
+from rppg_local import HR_MAX_BPM, HR_MIN_BPM, LocalRppg, to_response
+
+
+class Biquad:
+    """Second-order band-pass section (RBJ cookbook, 0 dB peak), transposed direct form II."""
+
+    def __init__(self, fs: float, lo: float, hi: float):
+        f0 = math.sqrt(lo * hi)
+        q = f0 / (hi - lo)
+        w0 = 2.0 * math.pi * f0 / fs
+        alpha = math.sin(w0) / (2.0 * q)
+        a0 = 1.0 + alpha
+        self.b0, self.b2 = alpha / a0, -alpha / a0
+        self.a1, self.a2 = -2.0 * math.cos(w0) / a0, (1.0 - alpha) / a0
+        self.z1 = self.z2 = 0.0
+
+    def __call__(self, x: float) -> float:
+        y = self.b0 * x + self.z1
+        self.z1 = -self.a1 * y + self.z2
+        self.z2 = self.b2 * x - self.a2 * y
+        return y
+
+
+class Ema:
+    """Exponential moving mean and variance with time constant ``tau`` samples."""
+
+    def __init__(self, tau: float, size: int = 1):
+        self.k = 1.0 / max(1.0, tau)
+        self.mean = np.zeros(size)
+        self.var = np.zeros(size)
+        self.primed = False
+
+    def __call__(self, x):
+        if not self.primed:
+            self.mean = np.array(x, dtype=np.float64)
+            self.primed = True
+            return
+        d = x - self.mean
+        self.mean = self.mean + self.k * d
+        self.var = (1.0 - self.k) * (self.var + self.k * d * d)
+
+
+class SlidingDft:
+    """Magnitude spectrum of the last ``n`` samples at arbitrary frequencies, O(bins) per sample.
+
+    ``X_t(w) = sum_{m<n} r^m x(t-m) e^{-jwm}`` is updated recursively; the
+    damping ``r`` (just below 1) keeps rounding errors from accumulating.
+    Neighbouring bins at ``w ± 2π/n`` are tracked too so the Hann window can
+    be applied as ``0.5 X(w) - 0.25 X(w-Δ) - 0.25 X(w+Δ)``.
+    """
+
+    def __init__(self, n: int, freqs_hz: np.ndarray, fs: float, r: float = 0.99999):
+        self.n = int(n)
+        self.freqs = np.asarray(freqs_hz, dtype=np.float64)
+        w = 2.0 * np.pi * self.freqs / fs
+        delta = 2.0 * np.pi / self.n
+        omega = np.concatenate([w, w - delta, w + delta])
+        self._rot = r * np.exp(-1j * omega)
+        self._tail = (r ** self.n) * np.exp(-1j * omega * self.n)
+        self._x = np.zeros(len(omega), dtype=np.complex128)
+        self._ring = np.zeros(self.n)
+        self._pos = 0
+        self.count = 0
+
+    def push(self, x: float):
+        old = self._ring[self._pos]
+        self._ring[self._pos] = x
+        self._pos = (self._pos + 1) % self.n
+        self._x = self._rot * self._x + (x - self._tail * old)
+        self.count += 1
+
+    def power(self) -> np.ndarray:
+        k = len(self.freqs)
+        x0, xm, xp = self._x[:k], self._x[k:2 * k], self._x[2 * k:]
+        return np.abs(0.5 * x0 - 0.25 * xm - 0.25 * xp) ** 2
+
+    def peak(self) -> Optional[float]:
+        """Frequency (Hz) of the strongest bin, refined by a parabola through its neighbours."""
+        if self.count < self.n // 2:
+            return None
+        p = self.power()
+        i = int(np.argmax(p))
+        shift = 0.0
+        if 0 < i < len(p) - 1:
+            a, b, c = p[i - 1], p[i], p[i + 1]
+            denom = a - 2 * b + c
+            shift = 0.5 * (a - c) / denom if denom else 0.0
+        step = self.freqs[1] - self.freqs[0] if len(self.freqs) > 1 else 0.0
+        return float(self.freqs[i] + shift * step)
+
+
+class StreamingHr(LocalRppg):
+    """Drop-in ``LocalRppg`` whose per-frame cost does not depend on ``window_sec``."""
+
+    def __init__(self, fps: float, method: str = "pos", window_sec: float = 10.0, min_sec: float = 5.0,
+                 update_every: int = 15, detect_every: int = 10, cropper: Optional[FaceCropper] = None,
+                 resolution_bpm: float = 1.0, norm_sec: float = 1.6):
+        super().__init__(fps, method, window_sec, min_sec, update_every, detect_every, cropper)
+        self.resolution_bpm = float(resolution_bpm)
+        self.norm_sec = float(norm_sec)
+        self._init_state()
+
+    def _init_state(self):
+        fs = self.fps
+        lo, hi = HR_MIN_BPM / 60.0, min(HR_MAX_BPM / 60.0, 0.45 * fs)
+        n = max(8, int(round(self.window_sec * fs)))
+        tau = self.norm_sec * fs
+        self._norm = Ema(tau, 3)                     # channel means for normalisation
+        self._alpha = Ema(tau, 2)                    # spread of the two projections
+        self._bp = [Biquad(fs, lo, hi), Biquad(fs, lo, hi)]
+        self._bp2 = [Biquad(fs, lo, hi), Biquad(fs, lo, hi)]  # CHROM filters its second signal too
+        bins = np.arange(HR_MIN_BPM, 60.0 * hi + 1e-9, self.resolution_bpm) / 60.0
+        self._dft = SlidingDft(n, bins, fs)
+        self._k = 1.0 / n                   # running mean square of the pulse, over about one window
+        self._ms = 0.0
+        self._ms_weight = 0.0               # bias correction while the average warms up
+        self._out_t: deque = deque(maxlen=n)  # grid samples not returned by estimate() yet
+        self._out_v: deque = deque(maxlen=n)
+        self._first_t: Optional[float] = None
+        self._last_t: Optional[float] = None
+        self._last_pulse = 0.0
+        self._prev: Optional[tuple] = None  # last raw sample (ts, rgb)
+        self._next_t: Optional[float] = None  # next grid timestamp
+        self._since_update = 0
+
+    def reset(self):
+        super().reset()
+        self._init_state()
+
+    # -------------------- Per-sample work --------------------
+    def _pulse_value(self, rgb: np.ndarray) -> float:
+        self._norm(rgb)
+        cn = rgb / (self._norm.mean + 1e-9)
+        r, g, b = cn
+        if self.method == "chrom":
+            x = 3.0 * r - 2.0 * g
+            y = 1.5 * r + g - 1.5 * b
+            for f in self._bp:
+                x = f(x)
+            for f in self._bp2:
+                y = f(y)
+            self._alpha(np.array([x, y]))
+            sx, sy = np.sqrt(self._alpha.var)
+            return x - (sx / (sy + 1e-9)) * y
+        s1 = g - b
+        s2 = -2.0 * r + g + b
+        self._alpha(np.array([s1, s2]))
+        sd1, sd2 = np.sqrt(self._alpha.var)
+        h = s1 + (sd1 / (sd2 + 1e-9)) * s2
+        for f in self._bp:
+            h = f(h)
+        return h
+
+    def _push_grid(self, t: float, rgb: np.ndarray):
+        v = self._pulse_value(rgb)
+        self._dft.push(v)
+        self._ms += self._k * (v * v - self._ms)
+        self._ms_weight += self._k * (1.0 - self._ms_weight)
+        rms = math.sqrt(self._ms / self._ms_weight) if self._ms_weight > 0 else 0.0
+        self._out_t.append(t)
+        self._out_v.append(v / (math.sqrt(2.0) * rms) if rms > 0 else 0.0)  # a sine's peak is √2 · RMS
+        if self._first_t is None:
+            self._first_t = t
+        self._last_t = t
+        self._last_pulse = v
+
+    def add_sample(self, ts: float, rgb) -> Optional[dict]:
+        ts = float(ts)
+        rgb = np.asarray(rgb, dtype=np.float64)
+        step = 1.0 / self.fps
+        if self._prev is None:
+            self._push_grid(ts, rgb)
+            self._next_t = ts + step
+            self._since_update += 1
+        else:
+            t0, c0 = self._prev
+            if ts <= t0:
+                return None  # out of order or duplicate
+            if ts - t0 > self.window_sec:
+                self._next_t = ts  # long gap: interpolating across it would be fiction
+            # every grid point in (t0, ts] from a straight line between the two samples
+            while self._next_t <= ts:
+                a = (self._next_t - t0) / (ts - t0)
+                self._push_grid(self._next_t, c0 + a * (rgb - c0))
+                self._next_t += step
+                self._since_update += 1
+        self._prev = (ts, rgb)
+
+        if self._since_update < self.update_every:
+            return None
+        if self._first_t is None or self._last_t - self._first_t < self.min_sec:
+            return None
+        self._since_update = 0
+        return self.estimate()
+
+    # -------------------- Readout --------------------
+    @property
+    def last_pulse(self) -> float:
+        """Most recent band-passed pulse sample."""
+        return self._last_pulse
+
+    def hr(self) -> Optional[float]:
+        """Current heart rate (bpm) from the sliding spectrum; O(bins)."""
+        f = self._dft.peak()
+        return None if f is None else 60.0 * f
+
+    def estimate(self) -> Optional[dict]:
+        """Server-shaped result with the samples added since the last call; O(new samples + bins)."""
+        if not self._out_v:
+            return None
+        ts = np.fromiter(self._out_t, np.float64, len(self._out_t))
+        pulse = np.fromiter(self._out_v, np.float64, len(self._out_v))
+        self._out_t.clear()
+        self._out_v.clear()
+        return to_response(ts, pulse, self.hr(), normalize=False)
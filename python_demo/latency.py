@@ -0,0 +1,182 @@
+import asyncio
+import math
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Optional
+
+# Histogram: log-spaced bins from 0.1 ms to 100 s, ~2% wide
+_BINS_PER_DECADE = 50
+_MIN_S = 1e-4
+_DECADES = 6
+_NBINS = _BINS_PER_DECADE * _DECADES
+
+# Coarse buckets (ms upper edges) for the printed histogram
+_DISPLAY_EDGES_MS = (25, 50, 100, 200, 400, 800, 1600, 3200)
+
+
+def percentile(sorted_vals: list, q: float) -> float:
+    if not sorted_vals:
+        return float("nan")
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+def _bin(seconds: float) -> int:
+    if seconds <= _MIN_S:
+        return 0
+    return min(_NBINS - 1, int(math.log10(seconds / _MIN_S) * _BINS_PER_DECADE))
+
+
+def _bin_mid(i: int) -> float:
+    return _MIN_S * 10 ** ((i + 0.5) / _BINS_PER_DECADE)
+
+
+class LatencyHistogram:
+    """Fixed-size log histogram: constant memory, percentiles within ~2%."""
+
+    def __init__(self):
+        self.counts = [0] * _NBINS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[_bin(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return float("nan")
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return min(_bin_mid(i), self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        """Milliseconds, for logs and UI."""
+        return {
+            "count": self.count,
+            "mean": 1000.0 * self.total / self.count if self.count else float("nan"),
+            "p50": 1000.0 * self.percentile(50),
+            "p95": 1000.0 * self.percentile(95),
+            "p99": 1000.0 * self.percentile(99),
+            "max": 1000.0 * self.max,
+        }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        return (f"latency n={s['count']} p50 {s['p50']:.0f} ms  p95 {s['p95']:.0f} ms  "
+                f"p99 {s['p99']:.0f} ms  max {s['max']:.0f} ms")
+
+    def render(self, width: int = 40) -> str:
+        """Coarse text histogram, one line per bucket."""
+        buckets = [0] * (len(_DISPLAY_EDGES_MS) + 1)
+        for i, c in enumerate(self.counts):
+            if c:
+                ms = 1000.0 * _bin_mid(i)
+                j = next((k for k, edge in enumerate(_DISPLAY_EDGES_MS) if ms < edge), len(_DISPLAY_EDGES_MS))
+                buckets[j] += c
+        peak = max(buckets) or 1
+        lines = []
+        lo = 0
+        for j, c in enumerate(buckets):
+            if j < len(_DISPLAY_EDGES_MS):
+                label = f"{lo:>5}-{_DISPLAY_EDGES_MS[j]:<5}"
+                lo = _DISPLAY_EDGES_MS[j]
+            else:
+                label = f"{lo:>5}+     "
+            lines.append(f"{label} ms |{'#' * int(round(width * c / peak)):<{width}}| {c}")
+        return "\n".join(lines)
+
+
+class LatencyTracker:
+    """Match server results back to frame send times.
+
+    ``mark_sent`` records each frame's send time by its timestamp. When a
+    response arrives, the newest ``advanced.rppg_timestamps`` entry is matched
+    to the latest frame sent at or before it; older pending frames are dropped,
+    so memory stays bounded by the frames in flight.
+    """
+
+    def __init__(self, max_pending: int = 4096, tolerance: float = 0.5):
+        self.tolerance = tolerance  # max gap between result ts and matched frame ts (s)
+        self.hist = LatencyHistogram()
+        self._pending: deque = deque(maxlen=max_pending)  # (frame ts, send perf_counter)
+        self._lock = threading.Lock()
+        self.last: Optional[float] = None
+
+    def mark_sent(self, ts, at: Optional[float] = None):
+        with self._lock:
+            self._pending.append((float(ts), perf_counter() if at is None else at))
+
+    def on_response(self, obj: dict, at: Optional[float] = None) -> Optional[float]:
+        """Record and return send-to-result latency (s), or None if nothing matched."""
+        ts_list = (obj.get("advanced") or {}).get("rppg_timestamps") or []
+        if not ts_list:
+            return None
+        newest = float(ts_list[-1]) + 5e-4  # server echoes timestamps rounded to ms
+        now = perf_counter() if at is None else at
+        match = None
+        with self._lock:
+            while self._pending and self._pending[0][0] <= newest:
+                match = self._pending.popleft()
+            if match is None or newest - match[0] > self.tolerance:
+                return None
+            latency = now - match[1]
+            self.hist.add(latency)
+            self.last = latency
+        return latency
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snap = self.hist.snapshot()
+        snap["last"] = 1000.0 * self.last if self.last is not None else float("nan")
+        return snap
+
+    def summary(self) -> str:
+        with self._lock:
+            return self.hist.summary()
+
+    def render(self) -> str:
+        with self._lock:
+            return self.hist.render()
+
+
+class LoopLagMonitor:
+    """How long the event loop was busy when a task should have woken up.
+
+    ``run`` sleeps ``interval`` seconds at a time and records how late each
+    wake-up is. Anything that blocks the loop (encoding, JSON, a camera read)
+    shows up here as lag of about its own duration.
+    """
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = float(interval)
+        self.hist = LatencyHistogram()
+
+    async def run(self):
+        while True:
+            t0 = perf_counter()
+            await asyncio.sleep(self.interval)
+            self.hist.add(max(0.0, perf_counter() - t0 - self.interval))
+
+    def snapshot(self) -> dict:
+        return self.hist.snapshot()
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        return (f"event loop lag n={s['count']} p50 {s['p50']:.1f} ms  p99 {s['p99']:.1f} ms  "
+                f"max {s['max']:.1f} ms")
@@ -0,0 +1,209 @@
+import asyncio
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+import cv2
+import numpy as np
+
+from framestore import FrameStoreWriter
+from pacer import Pacer
+from record import encode_frame
+
+
+class LiveFrame:
+    """A captured frame in memory; stands in for a PNG path or StoredFrame in the client pipeline."""
+
+    __slots__ = ("ts", "image")
+
+    def __init__(self, ts: float, image: np.ndarray):
+        self.ts = ts
+        self.image = image
+
+    @property
+    def stem(self) -> str:
+        return repr(self.ts)
+
+    @property
+    def name(self) -> str:
+        return f"{self.stem}.live"
+
+
+class LatestSlot:
+    """One-item handoff to the event loop where a newer item replaces a waiting one.
+
+    ``put`` may be called from any thread. ``get`` returns the newest item, so
+    a consumer that falls behind skips stale frames instead of working through
+    a backlog (replaced items are counted). ``put(None)`` ends the stream once
+    the waiting item, if any, has been taken. Create it on the loop's thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._event = asyncio.Event()
+        self._item = None
+        self._full = False
+        self._closed = False
+        self.offered = 0
+        self.superseded = 0
+
+    def put(self, item):
+        self._loop.call_soon_threadsafe(self._put, item)
+
+    def _put(self, item):
+        # runs on the event loop
+        if item is None:
+            self._closed = True
+        else:
+            self.offered += 1
+            if self._full:
+                self.superseded += 1
+            self._item, self._full = item, True
+        self._event.set()
+
+    async def get(self):
+        while not self._full:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        item, self._item, self._full = self._item, None, False
+        return item
+
+
+# -------------------- Archive (side branch) --------------------
+class Archiver:
+    """Write captured frames to a frame store on a background thread.
+
+    ``offer`` never blocks: if the writer falls behind and its queue is full,
+    the frame is left out of the archive (counted) but is still streamed.
+    """
+
+    def __init__(self, directory: Union[str, Path], maxsize: int = 120, existing: str = "fail"):
+        self.store = FrameStoreWriter(directory, existing=existing)  # see FrameStoreWriter for ``existing``
+        self.q: queue.Queue = queue.Queue(maxsize=max(1, int(maxsize)))
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="archive", daemon=True)
+        self._thread.start()
+
+    def offer(self, frame: LiveFrame):
+        try:
+            self.q.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            frame = self.q.get()
+            if frame is None:
+                return
+            try:
+                self.store.append(frame.ts, encode_frame(frame.image))
+                self.written += 1
+            except Exception as e:
+                self.errors += 1
+                print(f">> archive: failed to write frame {frame.stem}: {e}")
+
+    def close(self):
+        self.q.put(None)  # after everything already queued
+        self._thread.join()
+        self.store.close()
+
+    def summary(self) -> str:
+        return f"archive: {self.written} frames written to {self.store.directory}/, {self.dropped} skipped (writer behind)"
+
+
+# -------------------- Camera source --------------------
+class CameraSource:
+    """Capture from a camera on a thread and hand frames to the event loop.
+
+    Iterate with ``async for`` to get :class:`LiveFrame` objects in capture
+    order. Frames that arrive while ``maxsize`` are already waiting are dropped
+    rather than queued, so a slow consumer sees fresh frames, not a backlog.
+    """
+
+    def __init__(self, camera_index: int, fps: float, width: int = 640, height: int = 480,
+                 duration: float = 0.0, maxsize: int = 30, archive: Optional[Archiver] = None):
+        self.camera_index = camera_index
+        self.fps = fps
+        self.width, self.height = width, height
+        self.duration = duration  # seconds; 0 = until stop()
+        self.maxsize = max(1, int(maxsize))
+        self.archive = archive
+        self.pacer = Pacer.from_env(fps, default_policy="drop")
+        self.captured = 0
+        self.dropped = 0
+        self.read_failures = 0
+        self._stop = threading.Event()
+        self._q: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        cap = cv2.VideoCapture(self.camera_index, cv2.CAP_ANY)
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open camera index {self.camera_index}")
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        cap.set(cv2.CAP_PROP_FPS, self.fps)
+        self._loop = loop
+        self._q = asyncio.Queue()
+        self._thread = threading.Thread(target=self._capture, args=(cap,), name="capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _offer(self, frame: Optional[LiveFrame]):
+        # runs on the event loop
+        if frame is not None and self._q.qsize() >= self.maxsize:
+            self.dropped += 1
+            return
+        self._q.put_nowait(frame)
+
+    def _capture(self, cap):
+        deadline = time.perf_counter() + self.duration if self.duration > 0 else None
+        try:
+            while not self._stop.is_set():
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if not self.pacer.wait():
+                    continue
+                ok, image = cap.read()
+                if not ok:
+                    self.read_failures += 1
+                    time.sleep(0.01)
+                    continue
+                frame = LiveFrame(time.time(), image)
+                self.captured += 1
+                if self.archive is not None:
+                    self.archive.offer(frame)
+                self._loop.call_soon_threadsafe(self._offer, frame)
+        finally:
+            cap.release()
+            self._loop.call_soon_threadsafe(self._offer, None)  # end of stream
+
+    async def frames(self):
+        while True:
+            frame = await self._q.get()
+            if frame is None:
+                return
+            yield frame
+
+    def __aiter__(self):
+        return self.frames()
+
+    def close(self):
+        self.stop()
+        if self._thread is not None:
+            self._thread.join()
+        if self.archive is not None:
+            self.archive.close()
+
+    def summary(self) -> str:
+        return (f"camera: {self.captured} frames captured, {self.dropped} dropped (pipeline behind), "
+                f"{self.read_failures} read failures; {self.pacer.summary()}")
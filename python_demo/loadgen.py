@@ -0,0 +1,157 @@
+import asyncio
+import contextlib
+import os
+import uuid
+from time import perf_counter
+
+import orjson
+import websockets
+
+from client import (
+    FPS, IMAGES_DIR, QUEUE_MAXSIZE, WS_MAX_SIZE,
+    build_ws_url, encode_message, encoder_producer, list_frames, open_frame_cache,
+)
+from latency import LatencyHistogram, LatencyTracker, percentile
+from pacer import Pacer
+
+# -------------------- Config (env overridable) --------------------
+LOAD_SESSIONS   = int(os.getenv("LOAD_SESSIONS", "8"))
+LOAD_RAMP_SEC   = float(os.getenv("LOAD_RAMP_SEC", "2"))  # session starts are spread over this
+LOAD_MAX_FRAMES = int(os.getenv("LOAD_MAX_FRAMES", "0"))  # 0 = replay every recorded frame
+
+
+class SessionStats:
+    def __init__(self, idx: int):
+        self.idx = idx
+        self.datapt_id = str(uuid.uuid4())
+        self.sent = 0
+        self.elapsed = 0.0
+        self.responses = 0
+        self.latency = LatencyTracker()
+        self.pacer = Pacer.from_env(FPS)
+        self.error = None
+
+    @property
+    def fps(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+
+# -------------------- Encoding (shared) --------------------
+async def encode_once(paths) -> list:
+    """Encode every frame a single time; all sessions replay the same list."""
+    loop = asyncio.get_running_loop()
+    cache = open_frame_cache()
+    q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+    producer = asyncio.create_task(encoder_producer(paths, q, loop))
+    frames = []
+    while True:
+        item = await q.get()
+        if item is None:
+            break
+        frames.append(item)
+    enc = await producer
+    print(f">> encoded {enc['frames']} frames once in {enc['elapsed']:.2f}s ({enc['fps']:.1f} fps)")
+    if cache is not None:
+        print(">> " + cache.summary())
+    return frames
+
+
+# -------------------- Sessions --------------------
+async def session_listener(ws, stats: SessionStats):
+    try:
+        async for msg in ws:
+            now = perf_counter()
+            try:
+                obj = orjson.loads(msg)
+            except Exception:
+                continue
+            stats.responses += 1
+            stats.latency.on_response(obj, now)
+            if obj.get("state") == "finished":
+                return
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+async def run_session(stats: SessionStats, frames: list, delay: float):
+    await asyncio.sleep(delay)
+    async with websockets.connect(build_ws_url(), max_size=WS_MAX_SIZE, compression=None) as ws:
+        listener = asyncio.create_task(session_listener(ws, stats))
+        start = perf_counter()
+        last = len(frames) - 1
+        for i, (_, ts_str, frame) in enumerate(frames):
+            if not await stats.pacer.wait_async(float(ts_str)) and i != last:
+                continue
+            stats.latency.mark_sent(ts_str)
+            await ws.send(encode_message(stats.datapt_id, "end" if i == last else "stream", ts_str, frame))
+            stats.sent += 1
+        stats.elapsed = perf_counter() - start
+
+        try:
+            await asyncio.wait_for(listener, timeout=20.0)
+        except asyncio.TimeoutError:
+            listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await listener
+
+
+def report(sessions: list, wall: float):
+    ok = [s for s in sessions if s.error is None]
+    total = sum(s.sent for s in sessions)
+    print(f"\n== {len(sessions)} sessions ({len(ok)} ok), target {FPS:.1f} fps each ==")
+    print(f"aggregate send: {total} frames in {wall:.2f}s = {total / wall:.1f} fps")
+    for s in sessions:
+        status = f"error: {s.error}" if s.error is not None else f"{s.fps:6.2f} fps"
+        print(f"  session {s.idx:3d} {s.datapt_id[:8]}  sent {s.sent:6d}  {status}  responses {s.responses}")
+    fps = sorted(s.fps for s in ok)
+    if fps:
+        print(f"per-session fps: min {fps[0]:.2f}  p50 {percentile(fps, 50):.2f}  max {fps[-1]:.2f}")
+    late = LatencyHistogram()
+    for s in ok:
+        late.merge(s.pacer.lateness)
+    if late.count:
+        jitter = sorted(1000.0 * s.pacer.jitter for s in ok)
+        dropped = sum(s.pacer.dropped for s in ok)
+        print(f"send pacing: lateness p50 {1000 * late.percentile(50):.2f} ms  p99 {1000 * late.percentile(99):.2f} ms  "
+              f"max {1000 * late.max:.2f} ms; interval jitter p50 {percentile(jitter, 50):.2f} ms  "
+              f"max {jitter[-1]:.2f} ms; {dropped} frames dropped late")
+    hist = LatencyHistogram()
+    for s in ok:
+        hist.merge(s.latency.hist)
+    if hist.count:
+        print("response " + hist.summary())
+        print(hist.render())
+    else:
+        print("response latency: no responses matched to sent frames")
+
+
+# -------------------- Main --------------------
+async def main():
+    paths = list_frames()
+    if LOAD_MAX_FRAMES > 0:
+        paths = paths[:LOAD_MAX_FRAMES]
+    if not paths:
+        print(f"No frames found under {IMAGES_DIR}/ (frames.idx store or e.g. 1747154380.5511632.png)")
+        return
+
+    frames = await encode_once(paths)
+    print(f"Starting {LOAD_SESSIONS} sessions against {build_ws_url()}")
+
+    sessions = [SessionStats(i) for i in range(LOAD_SESSIONS)]
+    step = LOAD_RAMP_SEC / LOAD_SESSIONS if LOAD_SESSIONS else 0.0
+    start = perf_counter()
+    results = await asyncio.gather(
+        *(run_session(s, frames, i * step) for i, s in enumerate(sessions)),
+        return_exceptions=True,
+    )
+    wall = perf_counter() - start
+    for s, res in zip(sessions, results):
+        if isinstance(res, BaseException):
+            s.error = res
+    report(sessions, wall)
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
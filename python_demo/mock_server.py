@@ -0,0 +1,175 @@
+import asyncio
+import base64
+import math
+import os
+import random
+import uuid
+from collections import deque
+from time import perf_counter
+
+import orjson
+import websockets
+
+from framing import is_binary_frame, unpack_frame
+
+# -------------------- Config (env overridable) --------------------
+MOCK_HOST        = os.getenv("MOCK_HOST", "127.0.0.1")
+MOCK_PORT        = int(os.getenv("MOCK_PORT", "8003"))
+MOCK_REPLY_EVERY = int(os.getenv("MOCK_REPLY_EVERY", "15"))    # one "ok" reply per N frames
+MOCK_WINDOW_SEC  = float(os.getenv("MOCK_WINDOW_SEC", "10"))   # rppg history returned per reply
+MOCK_HR          = float(os.getenv("MOCK_HR", "68"))           # synthetic heart rate (bpm)
+MOCK_LATENCY_MS  = float(os.getenv("MOCK_LATENCY_MS", "80"))   # base reply delay
+MOCK_JITTER_MS   = float(os.getenv("MOCK_JITTER_MS", "20"))    # +/- uniform jitter on the delay
+MOCK_PROC_MS     = float(os.getenv("MOCK_PROC_MS", "0"))       # CPU burned per received frame
+WS_MAX_SIZE      = 2**22  # 4 MiB
+
+
+# -------------------- Decoding --------------------
+def decode_message(msg) -> tuple[dict, int, str]:
+    """Parse one client message (JSON text/bytes or binary frame).
+
+    Returns ``(payload, jpeg_bytes, wire)`` where ``wire`` is "binary" or "json".
+    """
+    if isinstance(msg, (bytes, bytearray)) and is_binary_frame(msg):
+        obj = unpack_frame(msg)
+        return obj, len(obj["frame_data"]), "binary"
+    obj = orjson.loads(msg)
+    return obj, len(base64.b64decode(obj.get("frame_data", ""))), "json"
+
+
+def burn_cpu(ms: float):
+    """Busy-wait to stand in for model inference cost."""
+    end = perf_counter() + ms / 1000.0
+    while perf_counter() < end:
+        pass
+
+
+# -------------------- Synthetic signal --------------------
+class SyntheticSession:
+    """rPPG-like waveform sampled at the client's frame timestamps."""
+
+    def __init__(self, base_hr: float, window_sec: float):
+        self.base_hr = base_hr
+        self.window_sec = window_sec
+        self.hr = base_hr
+        self.phase = 0.0
+        self.last_ts = None
+        self.rppg: deque = deque()
+        self.timestamps: deque = deque()
+
+    def add(self, ts: float):
+        if self.last_ts is not None:
+            dt = max(0.0, ts - self.last_ts)
+            # slow random walk around the base rate
+            self.hr += random.gauss(0.0, 0.05) + 0.01 * (self.base_hr - self.hr)
+            self.phase += 2.0 * math.pi * (self.hr / 60.0) * dt
+        self.last_ts = ts
+        value = math.sin(self.phase) + 0.3 * math.sin(2.0 * self.phase + 0.8) + random.gauss(0.0, 0.08)
+        self.rppg.append(round(value, 4))
+        self.timestamps.append(round(ts, 3))
+        while self.timestamps and self.timestamps[0] < ts - self.window_sec:
+            self.timestamps.popleft()
+            self.rppg.popleft()
+
+    def reply(self, state: str, socket_id: str, datapt_id: str, advanced: bool) -> bytes:
+        return orjson.dumps({
+            "state": state,  # "ok" | "finished"
+            "socket_id": socket_id,
+            "datapt_id": datapt_id,
+            "inference": {"hr": int(round(self.hr))},
+            "advanced": {
+                "rppg": list(self.rppg),
+                "rppg_timestamps": list(self.timestamps),
+            } if advanced else None,
+            "confidence": {},
+            "feedback": None,
+            "model_version": "mock",
+        })
+
+
+# -------------------- Server --------------------
+async def reply_sender(ws, outbox: asyncio.Queue):
+    """Send replies in order, each no earlier than its due time."""
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await outbox.get()
+        if item is None:
+            return
+        due, reply = item
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            await ws.send(reply)
+        except websockets.exceptions.ConnectionClosed:
+            return
+
+
+async def handler(ws):
+    loop = asyncio.get_running_loop()
+    socket_id = uuid.uuid4().hex[:8]
+    session = SyntheticSession(MOCK_HR, MOCK_WINDOW_SEC)
+    outbox: asyncio.Queue = asyncio.Queue()
+    sender = asyncio.create_task(reply_sender(ws, outbox))
+    last_due = 0.0
+
+    def schedule(reply: bytes):
+        nonlocal last_due
+        delay = max(0.0, MOCK_LATENCY_MS + random.uniform(-MOCK_JITTER_MS, MOCK_JITTER_MS)) / 1000.0
+        last_due = max(last_due, loop.time() + delay)  # never reorder replies
+        outbox.put_nowait((last_due, reply))
+
+    frames = 0
+    jpeg_total = 0
+    wire_total = 0
+    wires: dict[str, int] = {}
+    start = perf_counter()
+    print(f"[{socket_id}] connected")
+    try:
+        async for msg in ws:
+            try:
+                obj, jpeg_len, wire = decode_message(msg)
+                ts = float(obj["timestamp"])
+            except Exception as e:
+                print(f"[{socket_id}] bad message ({len(msg)} bytes): {e}")
+                continue
+            frames += 1
+            jpeg_total += jpeg_len
+            wire_total += len(msg)
+            wires[wire] = wires.get(wire, 0) + 1
+
+            if MOCK_PROC_MS > 0:
+                burn_cpu(MOCK_PROC_MS)  # blocks the loop like a synchronous model would
+            session.add(ts)
+
+            datapt_id = str(obj.get("datapt_id", ""))
+            advanced = bool(obj.get("advanced", True))
+            if obj.get("state") == "end":
+                schedule(session.reply("finished", socket_id, datapt_id, advanced))
+                break
+            if frames % MOCK_REPLY_EVERY == 0:
+                schedule(session.reply("ok", socket_id, datapt_id, advanced))
+    except websockets.exceptions.ConnectionClosed:
+        pass
+    finally:
+        outbox.put_nowait(None)
+        await sender
+
+    elapsed = perf_counter() - start
+    if frames:
+        print(f"[{socket_id}] {frames} frames in {elapsed:.1f}s ({wires}), "
+              f"avg {jpeg_total / frames / 1024:.1f} KiB image, "
+              f"{wire_total / frames / 1024:.1f} KiB on the wire")
+
+
+async def main():
+    async with websockets.serve(handler, MOCK_HOST, MOCK_PORT, max_size=WS_MAX_SIZE, compression=None):
+        print(f"Mock backend listening on ws://{MOCK_HOST}:{MOCK_PORT}/ws/ "
+              f"(latency {MOCK_LATENCY_MS:.0f}±{MOCK_JITTER_MS:.0f} ms, proc {MOCK_PROC_MS:.1f} ms/frame)")
+        await asyncio.Future()  # run forever
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,180 @@
+import asyncio
+import math
+import os
+import time
+from time import perf_counter
+from typing import Optional
+
+from latency import LatencyHistogram
+
+POLICIES = ("drop", "burst", "source")
+
+
+class Pacer:
+    """Release frames on a fixed schedule without accumulating drift.
+
+    Deadlines are computed from the first release (``start + i / fps``), never
+    from the previous wake-up, so oversleeping one frame does not push back
+    the rest. ``wait`` is hybrid: a coarse sleep until ``spin`` seconds before
+    the deadline, then a busy-wait on ``perf_counter``. ``wait_async`` only
+    sleeps; a busy-wait would stall every other task on the event loop.
+
+    What happens to a frame that is already late by more than one interval
+    depends on ``policy``:
+
+    - ``drop``: ``wait`` returns False without sleeping and every slot already
+      missed is given up, so the next call waits for the upcoming slot; the
+      caller should skip the frame (and its capture). The stream catches up by
+      dropping rather than bursting, even when the source is slower than ``fps``.
+    - ``burst``: late frames go out immediately, back to back, until the
+      schedule is caught up.
+    - ``source``: deadlines follow the frames' own timestamps (``source_ts``),
+      reproducing the recorded spacing; late frames burst like ``burst``.
+
+    In every mode a backlog longer than ``max_lag`` seconds (e.g. after a stall)
+    re-anchors the schedule at the current frame, which is released at once.
+    """
+
+    def __init__(self, fps: float, policy: str = "burst", spin: float = 0.0015, max_lag: float = 1.0,
+                 speed: float = 1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"pacing policy must be one of {POLICIES}, got: {policy}")
+        self.fps = float(fps)
+        self.interval = 1.0 / self.fps if self.fps > 0 else 0.0
+        self.policy = policy
+        self.spin = float(spin)
+        self.max_lag = float(max_lag)
+        self.speed = float(speed)  # source mode: 2.0 replays twice as fast
+
+        self.start: Optional[float] = None
+        self.index = 0
+        self._src0: Optional[float] = None
+        self._last: Optional[float] = None
+
+        # Stats
+        self.released = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self.lateness = LatencyHistogram()  # release time minus deadline
+        self.oversleep = 0.0                # worst wake-up after the coarse sleep target
+        self._gap_n = 0
+        self._gap_mean = 0.0
+        self._gap_m2 = 0.0
+
+    # -------------------- Schedule --------------------
+    def _deadline(self, now: float, source_ts: Optional[float]) -> float:
+        if self.start is None:
+            self.start = now
+        if self.policy == "source" and source_ts is not None:
+            if self._src0 is None:
+                self._src0 = source_ts
+            return self.start + (source_ts - self._src0) / self.speed
+        return self.start + self.index * self.interval
+
+    def _plan(self, source_ts: Optional[float]):
+        """Deadline for the next frame, or None if it should be dropped."""
+        now = perf_counter()
+        deadline = self._deadline(now, source_ts)
+        late = now - deadline
+        if late > self.max_lag:
+            # too far behind to catch up: this frame becomes the new slot 0
+            self.resyncs += 1
+            self.start, self.index = now, 0
+            if source_ts is not None:
+                self._src0 = source_ts
+            return now
+        if late > max(self.interval, 1e-3) and self.policy == "drop":
+            missed = math.ceil(late / self.interval) if self.interval > 0 else 1  # this slot and up to the next
+            self.index += missed
+            self.dropped += missed
+            return None
+        return deadline
+
+    def _released(self, deadline: float):
+        now = perf_counter()
+        self.index += 1
+        self.released += 1
+        self.lateness.add(max(0.0, now - deadline))
+        if self._last is not None:
+            gap = now - self._last
+            self._gap_n += 1
+            d = gap - self._gap_mean
+            self._gap_mean += d / self._gap_n
+            self._gap_m2 += d * (gap - self._gap_mean)
+        self._last = now
+
+    def _spin_until(self, deadline: float):
+        while perf_counter() < deadline:
+            pass
+
+    def shift(self, seconds: float):
+        """Push the whole schedule back, e.g. after the link was down for ``seconds``."""
+        if self.start is not None:
+            self.start += seconds
+        self._last = None  # the pause is not jitter
+
+    # -------------------- Waiting --------------------
+    def wait(self, source_ts: Optional[float] = None) -> bool:
+        """Block until the next frame is due; False means drop it (``drop`` policy only)."""
+        deadline = self._plan(source_ts)
+        if deadline is None:
+            return False
+        coarse = deadline - self.spin - perf_counter()
+        if coarse > 0:
+            time.sleep(coarse)
+            self.oversleep = max(self.oversleep, perf_counter() - (deadline - self.spin))
+        self._spin_until(deadline)
+        self._released(deadline)
+        return True
+
+    async def wait_async(self, source_ts: Optional[float] = None) -> bool:
+        """``wait`` for event-loop code: sleeps right up to the deadline and never spins."""
+        deadline = self._plan(source_ts)
+        if deadline is None:
+            return False
+        remaining = deadline - perf_counter()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+            # a busy loop (or the timer resolution) wakes us late; that lateness is what the stats show
+            self.oversleep = max(self.oversleep, perf_counter() - deadline)
+        self._released(deadline)
+        return True
+
+    # -------------------- Stats --------------------
+    @property
+    def jitter(self) -> float:
+        """Standard deviation of the interval between releases (s)."""
+        return math.sqrt(self._gap_m2 / self._gap_n) if self._gap_n > 1 else 0.0
+
+    def snapshot(self) -> dict:
+        late = self.lateness.snapshot()
+        return {
+            "released": self.released,
+            "dropped": self.dropped,
+            "resyncs": self.resyncs,
+            "interval_ms": 1000.0 * self._gap_mean,
+            "jitter_ms": 1000.0 * self.jitter,
+            "late_p50_ms": late["p50"],
+            "late_p99_ms": late["p99"],
+            "late_max_ms": late["max"],
+            "oversleep_ms": 1000.0 * self.oversleep,
+        }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        return (f"pacer ({self.policy}): {s['released']} released, {s['dropped']} dropped late, "
+                f"{s['resyncs']} resyncs; interval {s['interval_ms']:.2f} ms ± {s['jitter_ms']:.2f} ms, "
+                f"lateness p50 {s['late_p50_ms']:.2f} / p99 {s['late_p99_ms']:.2f} / max {s['late_max_ms']:.2f} ms, "
+                f"worst oversleep {s['oversleep_ms']:.2f} ms")
+
+    @classmethod
+    def from_env(cls, fps: float, default_policy: str = "burst") -> "Pacer":
+        """Policy and timing from PACE_* environment variables."""
+        env = os.getenv
+        return cls(
+            fps,
+            policy=env("PACE_POLICY", default_policy).lower(),
+            spin=float(env("PACE_SPIN_MS", "1.5")) / 1000.0,
+            max_lag=float(env("PACE_MAX_LAG_SEC", "1.0")),
+            speed=float(env("PACE_SPEED", "1.0")),
+        )
@@ -0,0 +1,440 @@
+"""The dashboard's capture → websocket → parse → HR pipeline, without Qt.
+
+``Pipeline`` captures from a camera on its own thread, encodes on a small
+thread pool, streams to the backend (reconnecting and re-sending as needed),
+optionally falls back to the local rPPG estimate, and turns every server or local result
+into the rPPG samples not seen before. Consumers get updates through
+callbacks (``on_result``, ``on_preview``, ``on_message``, ``on_latency``) or
+by iterating ``async for result in pipeline.results()``.
+
+The Qt dashboard wraps it in ``opencv_widget.CameraThread``; ``headless.py``
+runs it with no display at all.
+"""
+import asyncio
+import base64
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+import orjson
+import websockets
+
+from adaptive import AdaptiveController, write_buffer_size
+from face_roi import FaceCropper, SavingsMeter, crop_and_encode, encode_jpeg, scale_image
+from framing import backend_url, build_payload, pack_frame
+from hr_stream import StreamingHr
+from latency import LatencyTracker, LoopLagMonitor
+from live import LatestSlot
+from pacer import Pacer
+from resume import RECONNECT_ERRORS, Backoff, ReconnectStats, ReplayBuffer
+from rppg_local import LocalRppg
+
+# -------------------- Config (env overridable) --------------------
+BACKEND_WS_BASE      = os.getenv("BACKEND_WS_BASE", "CAIRE_WS_ENDPOINT")
+API_KEY              = os.getenv("API_KEY", "YOUR_CAIRE_API_KEY")
+FPS                  = float(os.getenv("FPS", "30"))  # capture / send rate
+JPEG_QUALITY         = int(os.getenv("JPEG_QUALITY", "70"))
+RESUME_BUFFER_SEC    = float(os.getenv("RESUME_BUFFER_SEC", "3"))  # seconds of frames kept for re-sending after a reconnect
+RECONNECT_INITIAL    = float(os.getenv("RECONNECT_INITIAL", "0.5"))  # first backoff delay (s)
+RECONNECT_MAX_DELAY  = float(os.getenv("RECONNECT_MAX_DELAY", "15"))  # backoff cap (s)
+WIRE_FORMAT          = os.getenv("WIRE_FORMAT", "json").lower()  # "json" | "binary" (see framing.py)
+ROI_CROP             = os.getenv("ROI_CROP", "0") not in ("0", "false", "False")  # send only the face crop
+ROI_MARGIN           = float(os.getenv("ROI_MARGIN", "0.25"))
+ROI_SIZE             = int(os.getenv("ROI_SIZE", "192"))
+ROI_STATS_EVERY      = int(os.getenv("ROI_STATS_EVERY", "30"))
+ROI_DETECT_EVERY     = int(os.getenv("ROI_DETECT_EVERY", "10"))  # face detector every N frames, tracked in between
+ROI_TRACK_MIN_CONF   = float(os.getenv("ROI_TRACK_MIN_CONF", "0.5"))  # re-detect when tracking confidence drops below
+ADAPTIVE             = os.getenv("ADAPTIVE", "0") not in ("0", "false", "False")  # ADAPT_* bounds in adaptive.py
+LATENCY_REPORT_EVERY = int(os.getenv("LATENCY_REPORT_EVERY", "10"))  # log latency stats every N results
+LOCAL_RPPG           = os.getenv("LOCAL_RPPG", "off").lower()  # "off" | "fallback" | "only" (see rppg_local.py)
+LOCAL_FALLBACK_SEC   = float(os.getenv("LOCAL_FALLBACK_SEC", "3"))  # use local results after this long without server ones
+LOCAL_RPPG_ENGINE    = os.getenv("LOCAL_RPPG_ENGINE", "stream").lower()  # "stream" (constant cost) | "window" (full recompute)
+ENCODE_WORKERS       = max(1, int(os.getenv("ENCODE_WORKERS", "2")))  # JPEG/base64/JSON encode threads
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "20"))  # event loop lag probe period
+PREVIEW_FPS          = float(os.getenv("PREVIEW_FPS", "15"))  # preview rate, independent of capture (0 = every frame)
+MAX_RPPG_SAMPLES     = 256  # most samples taken from one result (e.g. the first one)
+RPPG_CLOCK_RESET_SEC = 30.0  # a result this far behind the last one restarts delta tracking
+
+
+# -------------------- Helpers --------------------
+def encode_frame_bytes(frame: np.ndarray, quality: int, cropper=None, face=None, meter=None, scale: float = 1.0) -> bytes:
+    if cropper is not None:
+        return crop_and_encode(frame, quality, cropper, face, meter, scale)
+    return encode_jpeg(scale_image(frame, scale), quality)
+
+
+# -------------------- Results --------------------
+class Result:
+    """New rPPG samples (float64 arrays, oldest first) and the heart rate that came with them."""
+
+    __slots__ = ("rppg", "timestamps", "hr", "local")
+
+    def __init__(self, rppg: np.ndarray, timestamps: np.ndarray, hr: str, local: bool):
+        self.rppg = rppg
+        self.timestamps = timestamps
+        self.hr = hr
+        self.local = local  # from the on-device estimate rather than the server
+
+
+# -------------------- Pipeline --------------------
+class Pipeline:
+    """Camera in, deduplicated rPPG results out; see the module docstring.
+
+    Callbacks run on the capture thread (``on_preview``, local results) or the
+    event loop (server results, ``on_latency``); ``on_message`` on either.
+    ``on_preview`` gets every frame due at PREVIEW_FPS as a BGR array and
+    returns False if it skipped it. ``run`` is a coroutine; ``stop`` may be
+    called from any thread.
+    """
+
+    def __init__(self, camera_index: int = 0, client: str = "qtClient",
+                 on_result: Optional[Callable[[Result], None]] = None,
+                 on_preview: Optional[Callable[[np.ndarray], bool]] = None,
+                 on_message: Optional[Callable[[str], None]] = None,
+                 on_latency: Optional[Callable[[dict], None]] = None):
+        if LOCAL_RPPG not in {"off", "fallback", "only"}:
+            raise ValueError(f"LOCAL_RPPG must be 'off', 'fallback' or 'only', got: {LOCAL_RPPG}")
+        self.camera_index = camera_index
+        self.client = client
+        self.on_result = on_result
+        self.on_preview = on_preview
+        self.on_message = on_message
+        self.on_latency = on_latency
+        self.running = True
+        self.datapt_id = str(uuid.uuid4())  # one per session, kept across reconnects
+        self.ws = None  # current connection, None while reconnecting
+        self.frame_buffer = ReplayBuffer(max(1, int(FPS * RESUME_BUFFER_SEC)))  # re-sent after a reconnect
+        self.reconnect_stats = ReconnectStats()
+        # one cropper (and face tracker) serves both the ROI crop and the local estimator; the
+        # capture thread locates the face once per frame, in order, and passes the box to both
+        self.cropper = FaceCropper(ROI_MARGIN, ROI_SIZE, detect_every=ROI_DETECT_EVERY,
+                                   min_confidence=ROI_TRACK_MIN_CONF) if ROI_CROP or LOCAL_RPPG != "off" else None
+        self.roi_meter = SavingsMeter(ROI_STATS_EVERY)
+        self.latency = LatencyTracker()
+        self.controller = AdaptiveController.from_env(JPEG_QUALITY, FPS, log=self.log) if ADAPTIVE else None
+        self.pacer = Pacer.from_env(FPS, default_policy="drop")  # live: skip late sends rather than burst
+        engine = StreamingHr if LOCAL_RPPG_ENGINE == "stream" else LocalRppg
+        self.local = engine.from_env(FPS, self.cropper) if LOCAL_RPPG != "off" else None
+        self.local_active = False
+        self.last_remote = time.perf_counter()  # last server rPPG result, or start / connect (reset in run)
+        self.capture_stop = threading.Event()
+        self.result_lock = threading.Lock()  # results come from the loop (server) and capture thread (local)
+        self.last_rppg_ts = float("-inf")  # newest rPPG timestamp already published
+        self.last_hr = ""
+        self.rppg_new = 0
+        self.rppg_duplicates = 0  # samples dropped because an earlier result already carried them
+        self.previews_shown = 0
+        self.previews_skipped = 0
+        self.loop_lag = LoopLagMonitor(LOOP_LAG_INTERVAL_MS / 1000.0)
+        self._subscribers = []  # (loop, asyncio.Queue) per results() iterator
+
+    def stop(self):
+        self.running = False
+        self.capture_stop.set()
+
+    def log(self, msg: str):
+        if self.on_message is not None:
+            self.on_message(msg)
+        else:
+            print(">> " + msg)
+
+    # -------------------- Results --------------------
+    def handle_server_message(self, msg: str):
+        try:
+            data = orjson.loads(msg)
+            latency = self.latency.on_response(data)
+            if latency is not None:
+                if self.controller is not None:
+                    self.controller.observe_latency(latency)
+                snap = self.latency.snapshot()
+                if self.on_latency is not None:
+                    self.on_latency(snap)
+                if snap["count"] % LATENCY_REPORT_EVERY == 0:
+                    self.log(self.latency.summary())
+            if self.publish_result(data):
+                self.last_remote = time.perf_counter()
+                self.set_local_active(False)
+        except Exception as e:
+            print("Error parsing server message:", e)
+
+    def publish_result(self, data: dict, local: bool = False) -> bool:
+        """Publish the new part of a server-shaped result (remote or local); False if it had no rPPG data.
+
+        Consecutive results overlap almost entirely; only samples newer than the
+        last published timestamp are passed on, as contiguous float64 arrays.
+        """
+        advanced = data.get("advanced") or {}
+        rppg = advanced.get("rppg") or []
+        rppg_timestamps = advanced.get("rppg_timestamps") or []
+        heart_rate = str(data.get("inference", {}).get("hr", ""))
+        n = min(len(rppg), len(rppg_timestamps))
+        if not n:
+            return False
+        values = np.asarray(rppg[len(rppg) - n:], dtype=np.float64)
+        ts = np.asarray(rppg_timestamps[len(rppg_timestamps) - n:], dtype=np.float64)
+        with self.result_lock:
+            if ts[-1] < self.last_rppg_ts - RPPG_CLOCK_RESET_SEC:
+                self.last_rppg_ts = float("-inf")  # timestamps went back (clock change): start over
+            start = int(np.searchsorted(ts, self.last_rppg_ts, side="right"))
+            start = max(start, n - MAX_RPPG_SAMPLES)
+            self.rppg_duplicates += start
+            self.rppg_new += n - start
+            if start == n and heart_rate == self.last_hr:
+                return True  # nothing consumers do not already have
+            if start < n:
+                self.last_rppg_ts = float(ts[-1])
+            self.last_hr = heart_rate
+        result = Result(values[start:], ts[start:], heart_rate, local)
+        if self.on_result is not None:
+            self.on_result(result)
+        for loop, q in self._subscribers:
+            loop.call_soon_threadsafe(q.put_nowait, result)
+        return True
+
+    async def results(self):
+        """Every published :class:`Result` from now until the pipeline stops."""
+        loop = asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue()
+        sub = (loop, q)
+        self._subscribers.append(sub)
+        try:
+            while True:
+                result = await q.get()
+                if result is None:
+                    return
+                yield result
+        finally:
+            self._subscribers.remove(sub)
+
+    def __aiter__(self):
+        return self.results()
+
+    # -------------------- Local estimation (fallback) --------------------
+    def set_local_active(self, active: bool):
+        if active != self.local_active:
+            self.local_active = active
+            self.log("Using local rPPG estimate" if active else "Using server rPPG results")
+
+    def run_local(self, ts: float, frame: np.ndarray, face):
+        result = self.local.add_located(ts, frame, face)
+        if result is None:
+            return
+        stale = time.perf_counter() - self.last_remote > LOCAL_FALLBACK_SEC  # also true while the link is down
+        if LOCAL_RPPG == "only" or stale:
+            self.set_local_active(True)
+            self.publish_result(result, local=True)
+
+    # -------------------- Capture (own thread) --------------------
+    def capture_frames(self, cap, slot: LatestSlot):
+        """Read, preview and hand frames to the sender; never touches the event loop directly."""
+        frame_count = 0
+        preview_every = 1.0 / PREVIEW_FPS if PREVIEW_FPS > 0 else 0.0
+        next_preview = 0.0
+        try:
+            while self.running and not self.capture_stop.is_set():
+                if not self.pacer.wait():
+                    continue  # slot already passed: skip the read too, the next slot is on time
+                ret, frame = cap.read()
+                if not ret:
+                    time.sleep(0.01)
+                    continue
+                ts = time.time()
+
+                # Preview at PREVIEW_FPS; the consumer scales it on this thread
+                now = time.perf_counter()
+                if self.on_preview is not None and now >= next_preview:
+                    next_preview = max(next_preview + preview_every, now - preview_every)
+                    if self.on_preview(frame):
+                        self.previews_shown += 1
+                    else:
+                        self.previews_skipped += 1
+                frame_count += 1
+                if frame_count % max(1, int(10 * FPS)) == 0:
+                    self.log_stats(slot)
+
+                face = self.cropper.face(frame) if self.cropper is not None else None
+                if self.local is not None:
+                    self.run_local(ts, frame, face)
+                    if LOCAL_RPPG == "only":
+                        continue  # offline: nothing is sent
+
+                # Rate control: the preview keeps the capture rate, sends may be thinned
+                ctrl = self.controller
+                if ctrl is not None and not ctrl.admit(FPS):
+                    continue
+                slot.put((ts, frame, face))  # replaces a frame the sender has not picked up yet
+        finally:
+            cap.release()
+            slot.put(None)
+
+    def log_stats(self, slot: LatestSlot):
+        self.log(self.pacer.summary())
+        self.log(f"sender: {slot.offered} frames offered, {slot.superseded} superseded "
+                 f"by a newer frame; " + self.loop_lag.summary())
+        total = self.rppg_new + self.rppg_duplicates
+        self.log(f"results: {self.rppg_new} new rPPG samples, {self.rppg_duplicates} duplicates "
+                 f"discarded ({100.0 * self.rppg_duplicates / total if total else 0.0:.0f}%)")
+        if self.on_preview is not None:
+            self.log(f"preview: {self.previews_shown} frames shown at up to {PREVIEW_FPS:g} fps, "
+                     f"{self.previews_skipped} skipped (display busy)")
+        if ROI_CROP:
+            self.log(self.roi_meter.summary())
+        if self.cropper is not None and self.cropper.tracker is not None:
+            self.log(self.cropper.tracker.summary())
+
+    # -------------------- Encode (worker pool) --------------------
+    def encode_message(self, ts: float, jpeg: bytes):
+        if WIRE_FORMAT == "binary":
+            return pack_frame(self.datapt_id, "stream", ts, jpeg)
+        b64 = base64.b64encode(jpeg).decode("ascii")
+        return orjson.dumps(build_payload(self.datapt_id, "stream", str(ts), b64)).decode("utf-8")
+
+    def encode_frame(self, ts: float, frame: np.ndarray, face, quality: int, scale: float):
+        jpeg = encode_frame_bytes(frame, quality, self.cropper if ROI_CROP else None, face, self.roi_meter, scale)
+        return self.encode_message(ts, jpeg)
+
+    async def encode_frames(self, slot: LatestSlot, encoder, inflight: asyncio.Queue, window: asyncio.Semaphore):
+        """Take the newest captured frame whenever a worker is free and queue its encode."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await window.acquire()
+                item = await slot.get()
+                if item is None:
+                    window.release()
+                    return
+                ts, frame, face = item
+                ctrl = self.controller
+                quality, scale = (ctrl.quality, ctrl.scale) if ctrl is not None else (JPEG_QUALITY, 1.0)
+                inflight.put_nowait((ts, loop.run_in_executor(encoder, self.encode_frame, ts, frame, face, quality, scale)))
+        finally:
+            inflight.put_nowait(None)
+
+    # -------------------- Send frames to server --------------------
+    async def send_frames(self, inflight: asyncio.Queue, window: asyncio.Semaphore):
+        """Send encoded frames in capture order; keeps buffering them while the link is down."""
+        while True:
+            item = await inflight.get()
+            if item is None:
+                return
+            ts, fut = item
+            try:
+                msg = await fut
+            except Exception as e:
+                self.log(f"Encoding failed: {e}")
+                continue
+            finally:
+                window.release()
+            entry = self.frame_buffer.add(ts, msg)
+            ws = self.ws
+            if ws is not None:
+                self.latency.mark_sent(ts)
+                t0 = time.perf_counter()
+                try:
+                    await ws.send(msg)
+                    self.frame_buffer.mark_sent(entry)
+                except websockets.exceptions.ConnectionClosed:
+                    self.ws = None  # the connection task notices and reconnects
+                if self.controller is not None:
+                    self.controller.observe_send(time.perf_counter() - t0, write_buffer_size(ws))
+
+    # -------------------- Receive server messages --------------------
+    async def listen_to_server(self, ws):
+        try:
+            async for msg in ws:
+                if isinstance(msg, (bytes, bytearray)):
+                    msg = msg.decode("utf-8", errors="ignore")
+                self.handle_server_message(msg)
+        except Exception as e:
+            self.log(f"Server connection closed: {e}")
+
+    # -------------------- Connection (reconnect & resume) --------------------
+    async def maintain_connection(self):
+        ws_url = backend_url(BACKEND_WS_BASE, API_KEY, self.client)
+        backoff = Backoff(RECONNECT_INITIAL, RECONNECT_MAX_DELAY)
+        stats = self.reconnect_stats
+        while self.running:
+            self.log(f"Connecting to {ws_url}")
+            try:
+                async with websockets.connect(ws_url, max_size=2**22, compression=None) as ws:
+                    gap = stats.connected()  # None the first time: not a reconnect
+                    if gap is not None:
+                        resent = await self.frame_buffer.resend(ws)
+                        stats.replayed += resent
+                        self.log(f"Reconnected after {gap:.1f}s, re-sent {resent} frames; "
+                                 + stats.summary(self.frame_buffer.lost))
+                    else:
+                        self.log("Connected to server")
+                    backoff.reset()
+                    if not self.local_active:
+                        self.last_remote = time.perf_counter()  # give the server LOCAL_FALLBACK_SEC to answer
+                    self.ws = ws
+                    await self.listen_to_server(ws)  # returns when the connection closes
+            except RECONNECT_ERRORS as e:
+                self.log(f"WebSocket error: {e}")
+            finally:
+                self.ws = None
+            if not self.running:
+                break
+            stats.disconnected()
+            delay = backoff.next()
+            self.log(f"Connection lost; reconnecting in {delay:.1f}s" if stats.ever_up
+                     else f"Could not connect; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    # -------------------- Run --------------------
+    async def run(self):
+        """Capture and stream until ``stop`` (or the camera fails); ends every ``results()`` iterator."""
+        try:
+            await self._run()
+        finally:
+            for loop, q in list(self._subscribers):
+                loop.call_soon_threadsafe(q.put_nowait, None)
+
+    async def _run(self):
+        self.last_remote = time.perf_counter()
+        cap = cv2.VideoCapture(self.camera_index)
+        if not cap.isOpened():
+            self.log("Cannot open camera")
+            return
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap.set(cv2.CAP_PROP_FPS, FPS)
+
+        # capture thread -> latest-frame slot -> encode pool -> in-order sender on this loop
+        slot = LatestSlot(asyncio.get_running_loop())
+        inflight = asyncio.Queue()
+        window = asyncio.Semaphore(ENCODE_WORKERS)
+        encoder = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix="encode")
+        self.capture_stop.clear()
+        capture = threading.Thread(target=self.capture_frames, args=(cap, slot), name="capture", daemon=True)
+        capture.start()
+        tasks = [asyncio.create_task(self.loop_lag.run())]
+        try:
+            if LOCAL_RPPG == "only":
+                stages = [asyncio.create_task(self.drain(slot))]
+            else:
+                stages = [asyncio.create_task(self.encode_frames(slot, encoder, inflight, window)),
+                          asyncio.create_task(self.send_frames(inflight, window)),
+                          asyncio.create_task(self.maintain_connection())]
+            tasks += stages
+            done, pending = await asyncio.wait(stages, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # surface errors to the caller
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.capture_stop.set()
+            await asyncio.get_running_loop().run_in_executor(None, capture.join)
+            encoder.shutdown(wait=True)
+
+    async def drain(self, slot: LatestSlot):
+        """Local-only mode: nothing is sent, but the capture thread's end of stream still ends the task."""
+        while await slot.get() is not None:
+            pass
@@ -1,8 +1,15 @@
 import os
+import queue
+import statistics
+import threading
 import time
 from pathlib import Path
 import cv2
 
+from framestore import FrameStoreWriter
+from latency import percentile
+from pacer import Pacer
+
 # -------------------- Config (env) --------------------
 OUT_DIR      = Path(os.getenv("IMAGES_DIR", "images"))
 FPS          = float(os.getenv("FPS", "30"))
@@ -11,9 +18,156 @@ CAMERA_INDEX = int(os.getenv("CAMERA_INDEX", "0"))
 RES_WIDTH    = int(os.getenv("RES_WIDTH", "640"))
 RES_HEIGHT   = int(os.getenv("RES_HEIGHT", "480"))
 SHOW_PREVIEW = os.getenv("SHOW_PREVIEW", "1") not in ("0", "false", "False")
+REC_FORMAT   = os.getenv("REC_FORMAT", "store").lower()  # "store" (frames.bin + frames.idx) | "png" (file per frame)
+REC_CODEC    = os.getenv("REC_CODEC", "png").lower()     # image codec inside the store: "png" | "jpeg"
+REC_EXISTING = os.getenv("REC_EXISTING", "fail").lower()  # store already in IMAGES_DIR: "fail" | "append" | "overwrite"
+REC_PNG_LEVEL    = int(os.getenv("REC_PNG_LEVEL", "1"))      # 0-9, lower is faster
+REC_JPEG_QUALITY = int(os.getenv("REC_JPEG_QUALITY", "95"))
+REC_WRITERS      = int(os.getenv("REC_WRITERS", str(max(2, (os.cpu_count() or 4) // 2))))
+REC_QUEUE_SIZE   = int(os.getenv("REC_QUEUE_SIZE", str(int(FPS * 4))))  # frames held between capture and writers
+
+PREVIEW_WINDOW = "Recording (Q/Esc to stop)"
+
+def encode_frame(frame):
+    if REC_CODEC == "jpeg":
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), REC_JPEG_QUALITY])
+    else:
+        ok, buf = cv2.imencode(".png", frame, [int(cv2.IMWRITE_PNG_COMPRESSION), REC_PNG_LEVEL])
+    if not ok:
+        raise RuntimeError(f"Failed to encode frame as {REC_CODEC}")
+    return buf
+
+# -------------------- Stats --------------------
+class RecordStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.captured = 0
+        self.read_failures = 0
+        self.dropped = 0          # queue full: capture outran the writers
+        self.queue_hwm = 0
+        self.written = 0
+        self.write_times = []     # encode + write per frame (s)
+        self.timestamps = []      # capture time.time() per frame
+
+    def capture(self, ts: float, qsize: int):
+        self.captured += 1
+        self.timestamps.append(ts)
+        self.queue_hwm = max(self.queue_hwm, qsize)
+
+    def wrote(self, seconds: float):
+        with self.lock:
+            self.written += 1
+            self.write_times.append(seconds)
+
+    def report(self, elapsed: float):
+        avg_fps = (self.written / elapsed) if elapsed > 0 else 0.0
+        print(f"Done. Saved {self.written} frames in {elapsed:.2f}s (avg {avg_fps:.2f} fps).")
+        print(f"  captured {self.captured}, dropped {self.dropped} (writer queue full), "
+              f"read failures {self.read_failures}, queue high-water {self.queue_hwm}/{REC_QUEUE_SIZE}")
+        wt = sorted(1000.0 * t for t in self.write_times)
+        if wt:
+            print(f"  write latency ms: p50 {percentile(wt, 50):.1f}  p95 {percentile(wt, 95):.1f}  "
+                  f"p99 {percentile(wt, 99):.1f}  max {wt[-1]:.1f}  ({REC_WRITERS} writers)")
+        gaps = [1000.0 * (b - a) for a, b in zip(self.timestamps, self.timestamps[1:])]
+        if len(gaps) > 1:
+            target = 1000.0 / FPS
+            late = sum(1 for g in gaps if g > 1.5 * target)
+            print(f"  inter-frame ms: mean {statistics.fmean(gaps):.2f}  jitter (stdev) {statistics.pstdev(gaps):.2f}  "
+                  f"min {min(gaps):.2f}  max {max(gaps):.2f}  gaps >1.5x target: {late}")
+
+# -------------------- Ordered store appends --------------------
+class OrderedAppender:
+    """Lets parallel writers finish out of order while the store is appended in capture order."""
+
+    def __init__(self, store: FrameStoreWriter):
+        self.store = store
+        self.lock = threading.Lock()
+        self.next_seq = 0
+        self.pending = {}
+        self.failed = 0  # frames the store failed to append
+
+    def put(self, seq: int, ts: float, data):
+        """``data=None`` marks a frame that failed to encode so it does not block the ones after it.
+
+        Never raises: a frame the store fails to append (possibly another
+        writer's) is counted in ``failed`` and skipped.
+        """
+        with self.lock:
+            self.pending[seq] = (ts, data)
+            while self.next_seq in self.pending:
+                seq = self.next_seq
+                ts, data = self.pending.pop(seq)
+                self.next_seq += 1
+                if data is None:
+                    continue
+                try:
+                    self.store.append(ts, data)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Failed to append frame {seq}: {e}")
+
+# -------------------- Threads --------------------
+def capture_loop(cap, q: queue.Queue, stats: RecordStats, stop: threading.Event, latest: list, pacer: Pacer):
+    """Read frames at FPS and hand them to the writers; never blocks on disk."""
+    total_frames = int(round(FPS * DURATION_SEC))
+    seq = 0
+    for _ in range(total_frames):
+        if stop.is_set():
+            break
+        if not pacer.wait():
+            continue  # PACE_POLICY=drop: this slot has passed
+
+        ok, frame = cap.read()
+        if not ok:
+            stats.read_failures += 1
+            time.sleep(0.001)
+            continue
+
+        ts = time.time()
+        latest[0] = frame
+        try:
+            q.put_nowait((seq, ts, frame))
+            seq += 1
+        except queue.Full:
+            stats.dropped += 1
+        stats.capture(ts, q.qsize())
+    stop.set()
+
+def writer_loop(q: queue.Queue, stats: RecordStats, appender):
+    while True:
+        item = q.get()
+        if item is None:
+            return
+        seq, ts, frame = item
+        t0 = time.perf_counter()
+        try:
+            if appender is not None:
+                data = encode_frame(frame)
+            else:
+                cv2.imwrite(str(OUT_DIR / f"{ts}.png"), frame)
+        except Exception as e:
+            print(f"Failed to write frame {seq}: {e}")
+            if appender is not None:
+                appender.put(seq, None, None)  # encode failed: do not hold up later frames
+            continue
+        if appender is not None:
+            appender.put(seq, ts, data)
+        stats.wrote(time.perf_counter() - t0)
 
 def main():
+    if REC_FORMAT not in {"store", "png"}:
+        raise ValueError(f"REC_FORMAT must be 'store' or 'png', got: {REC_FORMAT}")
+    if REC_CODEC not in {"png", "jpeg"}:
+        raise ValueError(f"REC_CODEC must be 'png' or 'jpeg', got: {REC_CODEC}")
     OUT_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        store = FrameStoreWriter(OUT_DIR, existing=REC_EXISTING) if REC_FORMAT == "store" else None
+    except FileExistsError as e:
+        print(f"{e}; set REC_EXISTING=append or REC_EXISTING=overwrite, or pick another IMAGES_DIR")
+        return
+    if store is not None and store.existing_frames:
+        action = "appending to" if REC_EXISTING == "append" else "overwrote"
+        print(f">> {action} the {store.existing_frames} frames already in {OUT_DIR}/ (REC_EXISTING={REC_EXISTING})")
 
     cap = cv2.VideoCapture(CAMERA_INDEX, cv2.CAP_ANY)
     if not cap.isOpened():
@@ -27,37 +181,57 @@ def main():
     show_preview = SHOW_PREVIEW
     if show_preview:
         try:
-            cv2.namedWindow("Recording (Q/Esc to stop)", cv2.WINDOW_NORMAL)
+            cv2.namedWindow(PREVIEW_WINDOW, cv2.WINDOW_NORMAL)
         except Exception:
             show_preview = False
 
     total_frames = int(round(FPS * DURATION_SEC))
-    print(f"Recording ~{total_frames} frames @ {FPS} FPS for {DURATION_SEC}s → {OUT_DIR}/")
-
-    start = time.perf_counter()
-    saved = 0
+    print(f"Recording ~{total_frames} frames @ {FPS} FPS for {DURATION_SEC}s → {OUT_DIR}/ "
+          f"({REC_WRITERS} writers, queue {REC_QUEUE_SIZE})")
 
-    for i in range(total_frames):
-        next_time = start + (i / FPS)
+    appender = OrderedAppender(store) if store is not None else None
+    stats = RecordStats()
+    q: queue.Queue = queue.Queue(maxsize=REC_QUEUE_SIZE)
+    stop = threading.Event()
+    latest = [None]  # most recent frame, for the preview
+    pacer = Pacer.from_env(FPS)
 
-        ok, frame = cap.read()
-        if not ok:
-            time.sleep(0.001)
-            continue
+    writers = [threading.Thread(target=writer_loop, args=(q, stats, appender), daemon=True)
+               for _ in range(REC_WRITERS)]
+    for t in writers:
+        t.start()
+    capture = threading.Thread(target=capture_loop, args=(cap, q, stats, stop, latest, pacer), daemon=True)
+    start = time.perf_counter()
+    capture.start()
 
-        ts = time.time()
-        cv2.imwrite(str(OUT_DIR / f"{ts}.png"), frame)
-        saved += 1
+    # Main thread: preview window (HighGUI wants the main thread) or just wait
+    try:
+        while capture.is_alive():
+            if show_preview and latest[0] is not None:
+                cv2.imshow(PREVIEW_WINDOW, latest[0])
+                if cv2.waitKey(30) & 0xFF in (ord("q"), 27):
+                    stop.set()
+            else:
+                capture.join(timeout=0.1)
+    except KeyboardInterrupt:
+        stop.set()
+    capture.join()
+    cap.release()
+    if show_preview:
+        cv2.destroyAllWindows()
 
-        delay = next_time - time.perf_counter()
-        if delay > 0:
-            time.sleep(delay)
+    # Drain: writers finish everything already queued
+    for _ in writers:
+        q.put(None)
+    for t in writers:
+        t.join()
+    if store is not None:
+        store.close()
 
-    cap.release()
-    
-    elapsed = time.perf_counter() - start
-    avg_fps = (saved / elapsed) if elapsed > 0 else 0.0
-    print(f"Done. Saved {saved} frames in {elapsed:.2f}s (avg {avg_fps:.2f} fps).")
+    stats.report(time.perf_counter() - start)
+    if appender is not None and appender.failed:
+        print(f"  store append failures: {appender.failed} frames left out")
+    print("  " + pacer.summary())
 
 if __name__ == "__main__":
     try:
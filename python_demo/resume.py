@@ -0,0 +1,122 @@
+import random
+from collections import deque
+from time import perf_counter
+from typing import Optional
+
+import websockets
+import websockets.exceptions  # not loaded by ``import websockets`` alone (lazy imports)
+
+# Errors that mean "the link is gone, try again" rather than a bug
+RECONNECT_ERRORS = (OSError, EOFError, websockets.exceptions.WebSocketException)
+
+
+class Backoff:
+    """Exponential backoff with full jitter: initial, initial*factor, ... capped at ``maximum``."""
+
+    def __init__(self, initial: float = 0.5, maximum: float = 15.0, factor: float = 2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.attempts = 0
+
+    def next(self) -> float:
+        ceiling = min(self.maximum, self.initial * self.factor ** self.attempts)
+        self.attempts += 1
+        return random.uniform(ceiling / 2, ceiling)
+
+    def reset(self):
+        self.attempts = 0
+
+
+class ReplayBuffer:
+    """Bounded ring of the most recent wire messages, re-sent after a reconnect.
+
+    Messages are added before they are sent. If the ring overflows while
+    messages in it were never sent (the link was down), those frames are
+    counted as lost.
+    """
+
+    def __init__(self, maxlen: int):
+        self._items: deque = deque(maxlen=max(1, int(maxlen)))  # [ts, message, sent]
+        self.lost = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, ts, message) -> list:
+        """Append ``message``; returns the entry so the caller can mark it sent."""
+        if len(self._items) == self._items.maxlen and not self._items[0][2]:
+            self.lost += 1
+        entry = [ts, message, False]
+        self._items.append(entry)
+        return entry
+
+    @staticmethod
+    def mark_sent(entry: list):
+        entry[2] = True
+
+    async def resend(self, ws) -> int:
+        """Send every buffered message, then any added meanwhile; returns how many were sent.
+
+        Already-sent messages go out again too: they may have been lost in flight.
+        """
+        count = 0
+        entries = list(self._items)
+        while entries:
+            for entry in entries:
+                await ws.send(entry[1])
+                entry[2] = True
+                count += 1
+            entries = [e for e in self._items if not e[2]]
+        return count
+
+
+class ReconnectStats:
+    """Outages of a link that has been up at least once.
+
+    Failed attempts before the first connection are counted in
+    ``failed_connects``; they are not outages, and the first successful
+    connection is not a reconnect.
+    """
+
+    def __init__(self):
+        self.reconnects = 0
+        self.downtime = 0.0
+        self.longest = 0.0
+        self.replayed = 0
+        self.failed_connects = 0
+        self.ever_up = False
+        self.down_since: Optional[float] = None
+
+    @property
+    def down(self) -> bool:
+        return self.down_since is not None
+
+    def disconnected(self):
+        if not self.ever_up:
+            self.failed_connects += 1
+        elif self.down_since is None:
+            self.down_since = perf_counter()
+
+    def connected(self) -> Optional[float]:
+        """Mark the link up; returns how long it was down (s), or None for the first connection."""
+        if not self.ever_up:
+            self.ever_up = True
+            return None
+        return self.reconnected()
+
+    def reconnected(self) -> float:
+        """Mark the link back up; returns how long it was down (s)."""
+        if self.down_since is None:
+            return 0.0
+        gap = perf_counter() - self.down_since
+        self.down_since = None
+        self.reconnects += 1
+        self.downtime += gap
+        self.longest = max(self.longest, gap)
+        return gap
+
+    def summary(self, lost: int) -> str:
+        failed = f", {self.failed_connects} failed attempts before the first connect" if self.failed_connects else ""
+        return (f"reconnects: {self.reconnects} (total down {self.downtime:.1f}s, longest {self.longest:.1f}s), "
+                f"{self.replayed} frames re-sent, {lost} frames lost" + failed)
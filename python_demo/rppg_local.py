@@ -0,0 +1,235 @@
+"""Local rPPG estimation: face-ROI mean RGB traces -> pulse signal -> heart rate.
+
+Implements POS (Wang et al., 2017) and CHROM (de Haan & Jeanne, 2013) in
+NumPy. SciPy is used for the band-pass filter when installed; otherwise an
+FFT mask does the same job. Results use the server response shape::
+
+    {"state": "ok", "inference": {"hr": 71.3},
+     "advanced": {"rppg": [...], "rppg_timestamps": [...]}}
+
+so anything that consumes server messages can consume these too.
+"""
+import os
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+try:
+    from scipy import signal as _sps
+except ImportError:  # optional
+    _sps = None
+
+from face_roi import Box, FaceCropper
+
+METHODS = ("pos", "chrom")
+HR_MIN_BPM = 42.0
+HR_MAX_BPM = 240.0
+
+
+# -------------------- ROI → RGB --------------------
+def skin_box(face: Box) -> Box:
+    """Cheeks-and-forehead part of a face box: drops hair, background and the mouth."""
+    x, y, w, h = face
+    return (x + int(0.2 * w), y + int(0.1 * h), max(1, int(0.6 * w)), max(1, int(0.6 * h)))
+
+
+def mean_rgb(img: np.ndarray, box: Optional[Box] = None) -> np.ndarray:
+    """Mean (R, G, B) of a BGR image inside ``box`` (whole image if None)."""
+    if box is not None:
+        x, y, w, h = box
+        img = img[max(0, y):y + h, max(0, x):x + w]
+    b, g, r = img.reshape(-1, img.shape[-1])[:, :3].mean(axis=0)
+    return np.array([r, g, b], dtype=np.float64)
+
+
+# -------------------- Signal --------------------
+def resample(ts: np.ndarray, values: np.ndarray, fs: float):
+    """Values at uniform ``1/fs`` spacing over the span of ``ts`` (frames rarely arrive evenly)."""
+    grid = np.arange(ts[0], ts[-1], 1.0 / fs)
+    if values.ndim == 1:
+        return grid, np.interp(grid, ts, values)
+    return grid, np.stack([np.interp(grid, ts, values[:, k]) for k in range(values.shape[1])], axis=1)
+
+
+def bandpass(x: np.ndarray, fs: float, lo: float = HR_MIN_BPM / 60.0, hi: float = HR_MAX_BPM / 60.0) -> np.ndarray:
+    hi = min(hi, 0.45 * fs)
+    if _sps is not None and len(x) > 27:
+        sos = _sps.butter(3, [lo, hi], btype="bandpass", fs=fs, output="sos")
+        return _sps.sosfiltfilt(sos, x)
+    spec = np.fft.rfft(x - x.mean())
+    freqs = np.fft.rfftfreq(len(x), 1.0 / fs)
+    spec[(freqs < lo) | (freqs > hi)] = 0
+    return np.fft.irfft(spec, n=len(x))
+
+
+def pos(rgb: np.ndarray, fs: float, window_sec: float = 1.6) -> np.ndarray:
+    """Plane-Orthogonal-to-Skin pulse from an (N, 3) RGB trace sampled at ``fs``."""
+    n = len(rgb)
+    win = max(2, int(window_sec * fs))
+    out = np.zeros(n)
+    proj = np.array([[0.0, 1.0, -1.0], [-2.0, 1.0, 1.0]])
+    for start in range(0, max(1, n - win + 1)):
+        c = rgb[start:start + win]
+        cn = c / (c.mean(axis=0) + 1e-9)
+        s = cn @ proj.T
+        h = s[:, 0] + (s[:, 0].std() / (s[:, 1].std() + 1e-9)) * s[:, 1]
+        out[start:start + len(h)] += h - h.mean()  # overlap-add
+    return out
+
+
+def chrom(rgb: np.ndarray, fs: float) -> np.ndarray:
+    """Chrominance-based pulse from an (N, 3) RGB trace sampled at ``fs``."""
+    cn = rgb / (rgb.mean(axis=0) + 1e-9)
+    x = bandpass(3.0 * cn[:, 0] - 2.0 * cn[:, 1], fs)
+    y = bandpass(1.5 * cn[:, 0] + cn[:, 1] - 1.5 * cn[:, 2], fs)
+    return x - (x.std() / (y.std() + 1e-9)) * y
+
+
+def heart_rate(pulse: np.ndarray, fs: float) -> Optional[float]:
+    """Dominant frequency in the heart-rate band, in bpm (zero-padded FFT + parabolic peak)."""
+    if len(pulse) < int(2 * fs):
+        return None
+    nfft = 1 << max(12, int(np.ceil(np.log2(len(pulse)))))
+    spec = np.abs(np.fft.rfft((pulse - pulse.mean()) * np.hanning(len(pulse)), n=nfft))
+    freqs = np.fft.rfftfreq(nfft, 1.0 / fs)
+    band = np.flatnonzero((freqs >= HR_MIN_BPM / 60.0) & (freqs <= HR_MAX_BPM / 60.0))
+    if not len(band):
+        return None
+    i = band[int(np.argmax(spec[band]))]
+    if 0 < i < len(spec) - 1:
+        a, b, c = spec[i - 1], spec[i], spec[i + 1]
+        denom = a - 2 * b + c
+        shift = 0.5 * (a - c) / denom if denom else 0.0
+    else:
+        shift = 0.0
+    return float(60.0 * (i + shift) * fs / nfft)
+
+
+def to_response(ts: np.ndarray, pulse: np.ndarray, hr: Optional[float], state: str = "ok",
+                normalize: bool = True) -> dict:
+    """Server-shaped result; timestamps are echoed at ms precision like the backend does.
+
+    ``normalize`` scales ``pulse`` to a peak of 1; pass False for samples already scaled.
+    """
+    peak = float(np.max(np.abs(pulse))) if normalize and len(pulse) else 0.0
+    norm = pulse / peak if peak > 0 else pulse
+    return {
+        "state": state,
+        "inference": {"hr": round(hr, 1) if hr is not None else ""},
+        "advanced": {
+            "rppg": [round(float(v), 4) for v in norm],
+            "rppg_timestamps": [round(float(t), 3) for t in ts],
+        },
+    }
+
+
+def analyze(ts, rgb, fs: float, method: str = "pos") -> Optional[dict]:
+    """One-shot estimate over a whole trace: ``ts`` (N,) seconds, ``rgb`` (N, 3) means."""
+    ts = np.asarray(ts, dtype=np.float64)
+    rgb = np.asarray(rgb, dtype=np.float64)
+    if len(ts) < 2 or ts[-1] - ts[0] < 2.0:
+        return None
+    grid, uniform = resample(ts, rgb, fs)
+    if method == "chrom":
+        pulse = chrom(uniform, fs)
+    else:
+        pulse = bandpass(pos(uniform, fs), fs)
+    return to_response(grid, pulse, heart_rate(pulse, fs))
+
+
+# -------------------- Streaming engine --------------------
+class LocalRppg:
+    """Per-frame face-ROI traces in, server-shaped results out.
+
+    Feed frames with ``add_frame`` (or precomputed means with ``add_sample``);
+    every ``update_every`` samples, once ``min_sec`` of signal is buffered, a
+    result over the last ``window_sec`` seconds is returned. The face is
+    located with the cropper's tracker; without a cropper, one is created that
+    detects every ``detect_every`` frames and tracks in between.
+    """
+
+    def __init__(self, fps: float, method: str = "pos", window_sec: float = 10.0, min_sec: float = 5.0,
+                 update_every: int = 15, detect_every: int = 10, cropper: Optional[FaceCropper] = None):
+        if method not in METHODS:
+            raise ValueError(f"rPPG method must be one of {METHODS}, got: {method}")
+        self.fps = float(fps)
+        self.method = method
+        self.window_sec = float(window_sec)
+        self.min_sec = float(min_sec)
+        self.update_every = max(1, int(update_every))
+        self.detect_every = max(1, int(detect_every))
+        self.cropper = cropper if cropper is not None else FaceCropper(detect_every=detect_every)
+        self._ts: deque = deque(maxlen=int(self.window_sec * self.fps * 2))
+        self._rgb: deque = deque(maxlen=self._ts.maxlen)
+        self._since_update = 0
+
+    def roi_mean(self, img: np.ndarray) -> Optional[np.ndarray]:
+        """Mean skin RGB of ``img``, or None until a face has been seen."""
+        face = self.cropper.face(img)
+        return None if face is None else mean_rgb(img, skin_box(face))
+
+    def add_frame(self, ts: float, img: np.ndarray) -> Optional[dict]:
+        return self.add_located(ts, img, self.cropper.face(img))
+
+    def add_located(self, ts: float, img: np.ndarray, face: Optional[Box]) -> Optional[dict]:
+        """``add_frame`` with the face box already found by the caller (who shares it with the encoder)."""
+        return None if face is None else self.add_sample(ts, mean_rgb(img, skin_box(face)))
+
+    def add_sample(self, ts: float, rgb) -> Optional[dict]:
+        self._ts.append(float(ts))
+        self._rgb.append(rgb)
+        self._since_update += 1
+        if self._since_update < self.update_every:
+            return None
+        if self._ts[-1] - self._ts[0] < self.min_sec:
+            return None
+        self._since_update = 0
+        return self.estimate()
+
+    def estimate(self) -> Optional[dict]:
+        ts = np.fromiter(self._ts, dtype=np.float64, count=len(self._ts))
+        keep = ts >= ts[-1] - self.window_sec
+        return analyze(ts[keep], np.asarray(self._rgb, dtype=np.float64)[keep], self.fps, self.method)
+
+    def reset(self):
+        self._ts.clear()
+        self._rgb.clear()
+        self._since_update = 0
+
+    @classmethod
+    def from_env(cls, fps: float, cropper: Optional[FaceCropper] = None) -> "LocalRppg":
+        """Method and window from LOCAL_RPPG_* environment variables."""
+        env = os.getenv
+        return cls(
+            fps,
+            method=env("LOCAL_RPPG_METHOD", "pos").lower(),
+            window_sec=float(env("LOCAL_RPPG_WINDOW_SEC", "10")),
+            update_every=int(env("LOCAL_RPPG_UPDATE_EVERY", "15")),
+            detect_every=int(env("ROI_DETECT_EVERY", "10")),
+            cropper=cropper,
+        )
+
+
+# -------------------- Offline --------------------
+def main():
+    """Estimate heart rate for the recording in IMAGES_DIR without a backend."""
+    from client import FPS, IMAGES_DIR, decode_image, list_frames
+
+    engine = LocalRppg.from_env(FPS)
+    ts, rgb = [], []
+    for src in list_frames():
+        img = decode_image(src)
+        mean = engine.roi_mean(img) if img is not None else None
+        if mean is not None:
+            ts.append(float(src.stem))
+            rgb.append(mean)
+    result = analyze(ts, rgb, FPS, engine.method)
+    if result is None:
+        print(f"Not enough face frames under {IMAGES_DIR}/ (need at least 2 s)")
+        return
+    print(f">> {engine.method}: {len(ts)} frames, HR {result['inference']['hr']} bpm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the demo modules import each other as top-level modules (run from python_demo/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
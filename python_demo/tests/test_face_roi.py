@@ -0,0 +1,120 @@
+import asyncio
+import random
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("orjson")
+pytest.importorskip("websockets")
+
+import client  # noqa: E402
+from face_roi import FaceCropper, SavingsMeter  # noqa: E402
+from live import LiveFrame  # noqa: E402
+
+SIDE = 64
+
+
+class SquareCropper(FaceCropper):
+    """"Detects" the bright textured square; the box size encodes the frame index so stale boxes show."""
+
+    def detect(self, img):
+        ys, xs = np.nonzero(img[1:, :, 1] > 140)
+        if not len(xs):
+            return None
+        size = SIDE - int(img[0, 0, 0]) % 5
+        return (int(xs.min()), int(ys.min()) + 1, size, size)
+
+
+def make_frames(n: int = 60):
+    rng = np.random.default_rng(7)
+    texture = rng.integers(150, 256, size=(SIDE, SIDE, 3), dtype=np.uint8)
+    frames = []
+    for i in range(n):
+        img = rng.integers(0, 80, size=(240, 320, 3), dtype=np.uint8)
+        x, y = 20 + 3 * i % 200, 30 + 2 * i % 120
+        img[y:y + SIDE, x:x + SIDE] = texture
+        img[0, 0] = i % 256  # frame index, read by the fake detector
+        frames.append(LiveFrame(1000.0 + i / 30.0, img))
+    return frames
+
+
+def encoded_boxes(monkeypatch, frames, workers: int) -> list:
+    """Face box each frame was cropped to when encoded with ``workers`` threads."""
+    boxes = {}
+    real = client.crop_and_encode
+
+    def spy(img, quality, cropper, face, *args):
+        time.sleep(random.uniform(0, 0.003))  # let workers finish out of order
+        boxes[id(img)] = face
+        return real(img, quality, cropper, face, *args)
+
+    monkeypatch.setattr(client, "ROI_CROPPER", SquareCropper(detect_every=5))
+    monkeypatch.setattr(client, "crop_and_encode", spy)
+    monkeypatch.setattr(client, "FRAME_CACHE", None)
+    monkeypatch.setattr(client, "FRAME_FORMAT", "jpeg")
+    monkeypatch.setattr(client, "WIRE_FORMAT", "binary")
+    monkeypatch.setattr(client, "ENC_WORKERS", workers)
+    monkeypatch.setattr(client, "ENC_WINDOW", 2 * workers)
+
+    async def run():
+        q: asyncio.Queue = asyncio.Queue()
+        stats = await client.encoder_producer(frames, q, asyncio.get_running_loop())
+        names = []
+        while True:
+            item = await q.get()
+            if item is None:
+                return stats, names
+            names.append(item[0])
+
+    stats, names = asyncio.run(run())
+    assert names == [f.name for f in frames]  # still sent in capture order
+    assert stats["frames"] == len(frames)
+    return [boxes[id(f.image)] for f in frames]
+
+
+def test_boxes_do_not_depend_on_encode_workers(monkeypatch):
+    frames = make_frames()
+    expected_cropper = SquareCropper(detect_every=5)
+    expected = [expected_cropper.face(f.image) for f in frames]  # one thread, capture order
+
+    assert encoded_boxes(monkeypatch, frames, 1) == expected
+    assert encoded_boxes(monkeypatch, frames, 4) == expected
+    assert expected_cropper.tracker.detections < len(frames)  # tracked in between, not detected every frame
+
+
+def test_crop_box_without_face_passes_frame_through():
+    img = np.zeros((48, 64, 3), dtype=np.uint8)
+    cropper = FaceCropper(size=32)
+    assert cropper.crop_box(img, None) is img
+    assert cropper.crop_box(img, (10, 10, 20, 20)).shape == (32, 32, 3)
+
+
+def test_savings_meter_samples_exactly_one_frame_in_n_across_workers():
+    meter = SavingsMeter(sample_every=7)
+    per_worker = 700
+
+    def worker():
+        for _ in range(per_worker):
+            full = 1000 if meter.should_sample() else None
+            meter.record(100, full)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert meter.frames == 8 * per_worker
+    assert meter.full_samples == 8 * per_worker // 7
+    assert meter.sent_bytes == 100 * meter.frames
+
+
+def test_savings_meter_counts_cache_hits_without_sampling_them():
+    meter = SavingsMeter(sample_every=1)
+    meter.record(100, 1000 if meter.should_sample() else None)
+    meter.record(300, cached=True)
+    assert meter.frames == 2 and meter.cached == 1 and meter.full_samples == 1
+    assert meter.sent_bytes / meter.frames == 200  # the cached frame's bytes count as sent
+    assert "1 frames from the frame cache" in meter.summary()
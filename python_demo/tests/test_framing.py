@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+
+from framing import HEADER, backend_url, build_payload, is_binary_frame, pack_frame, unpack_frame
+
+
+@pytest.mark.parametrize("state", ["stream", "end"])
+@pytest.mark.parametrize("advanced", [True, False])
+@pytest.mark.parametrize("jpeg", [b"", b"\xff\xd8jpeg\xff\xd9", bytes(range(256)) * 40])
+def test_pack_unpack_round_trip(state, advanced, jpeg):
+    datapt_id = str(uuid.uuid4())
+    buf = pack_frame(datapt_id, state, "1747154380.5511632", jpeg, advanced)
+    assert len(buf) == HEADER.size + len(jpeg)
+    assert is_binary_frame(buf)
+
+    frame = unpack_frame(buf)
+    assert frame["datapt_id"] == datapt_id
+    assert frame["state"] == state
+    assert frame["advanced"] is advanced
+    assert frame["timestamp"] == 1747154380.5511632
+    assert bytes(frame["frame_data"]) == jpeg
+
+
+def test_unpack_accepts_memoryview_without_copying():
+    buf = bytearray(pack_frame(str(uuid.uuid4()), "stream", 1.5, b"abc"))
+    frame = unpack_frame(memoryview(buf))
+    buf[-1:] = b"z"
+    assert bytes(frame["frame_data"]) == b"abz"
+
+
+def test_unpack_rejects_other_messages():
+    assert not is_binary_frame(b'{"state": "stream"}')
+    with pytest.raises(ValueError):
+        unpack_frame(b'{"state": "stream", "frame_data": "..."}')
+    bad_version = bytearray(pack_frame(str(uuid.uuid4()), "stream", 1.0, b"x"))
+    bad_version[2] = 99
+    with pytest.raises(ValueError):
+        unpack_frame(bad_version)
+
+
+def test_json_payload_and_url():
+    payload = build_payload("id", "end", "12.5", "b64", advanced=False)
+    assert payload == {"datapt_id": "id", "state": "end", "advanced": False,
+                       "timestamp": "12.5", "frame_data": "b64"}
+    assert backend_url("ws://host/ws/", "k", "c") == "ws://host/ws/?api_key=k&client=c"
+    assert backend_url("ws://host/ws", "k", "c", object_id="o", callback_url="http://cb") == \
+        "ws://host/ws/?api_key=k&client=c&objectId=o&callback_url=http%3A%2F%2Fcb"
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from hr_stream import SlidingDft, StreamingHr
+
+
+def full_window_power(window: np.ndarray, freqs: np.ndarray, fs: float, n: int, r: float) -> np.ndarray:
+    """The same Hann-windowed, damped spectrum recomputed from the last ``n`` samples."""
+    m = np.arange(n)  # 0 = newest sample
+    newest_first = window[::-1]
+    delta = 2.0 * np.pi / n
+
+    def dft(omega):
+        return np.array([np.sum(r ** m * newest_first * np.exp(-1j * w * m)) for w in omega])
+
+    w = 2.0 * np.pi * freqs / fs
+    x0, xm, xp = dft(w), dft(w - delta), dft(w + delta)
+    return np.abs(0.5 * x0 - 0.25 * xm - 0.25 * xp) ** 2
+
+
+@pytest.mark.parametrize("n", [16, 64, 300])
+def test_sliding_dft_matches_full_window_recompute(n):
+    fs = 30.0
+    freqs = np.linspace(0.7, 3.0, 24)
+    rng = np.random.default_rng(n)
+    x = rng.standard_normal(3 * n + 7)
+    dft = SlidingDft(n, freqs, fs)
+    for i, v in enumerate(x):
+        dft.push(v)
+        if i + 1 >= n and (i + 1) % (n // 2) == 0:
+            expected = full_window_power(x[i + 1 - n:i + 1], freqs, fs, n, 0.99999)
+            np.testing.assert_allclose(dft.power(), expected, rtol=1e-6, atol=1e-9 * expected.max())
+
+
+def test_sliding_dft_finds_a_sine():
+    fs, n = 30.0, 300
+    freqs = np.arange(0.7, 3.0, 0.05)
+    dft = SlidingDft(n, freqs, fs)
+    assert dft.peak() is None  # not enough samples yet
+    t = np.arange(2 * n) / fs
+    for v in np.sin(2 * np.pi * 1.23 * t):
+        dft.push(v)
+    assert dft.peak() == pytest.approx(1.23, abs=0.02)
+
+
+def test_estimate_returns_only_new_samples_at_a_stable_scale():
+    fs = 30.0
+    engine = StreamingHr(fs, window_sec=10.0, min_sec=5.0, update_every=15)
+    t = 1.7e9 + np.arange(int(40 * fs)) / fs
+    pulse = np.sin(2 * np.pi * 1.2 * (t - t[0]))
+    rgb = np.array([160.0, 110.0, 90.0]) * (1 + 0.003 * pulse[:, None] * np.array([0.33, 0.77, 0.53]))
+    results = [r for r in (engine.add_sample(ts, c) for ts, c in zip(t, rgb)) if r is not None]
+    assert results
+    stamps = [ts for r in results for ts in r["advanced"]["rppg_timestamps"]]
+    assert stamps == sorted(set(stamps))  # no sample is returned twice
+    assert all(len(r["advanced"]["rppg"]) <= 16 for r in results[1:])
+    late = np.concatenate([r["advanced"]["rppg"] for r in results[-10:]])
+    assert 0.7 < np.max(np.abs(late)) < 1.6  # about ±1 without a whole-window rescale
+    assert results[-1]["inference"]["hr"] == pytest.approx(72.0, abs=2.0)
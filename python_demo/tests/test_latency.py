@@ -0,0 +1,53 @@
+import math
+import random
+
+import pytest
+
+from latency import LatencyHistogram, LatencyTracker, percentile
+
+
+def test_histogram_percentiles_within_bin_width():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(math.log(0.15), 0.8) for _ in range(20000)]
+    hist = LatencyHistogram()
+    for v in values:
+        hist.add(v)
+    exact = sorted(values)
+    for q in (1, 10, 50, 90, 95, 99, 99.9):
+        assert hist.percentile(q) == pytest.approx(percentile(exact, q), rel=0.05)
+    assert hist.percentile(100) == max(values)
+    assert hist.count == len(values)
+    assert hist.total == pytest.approx(sum(values))
+
+
+def test_histogram_merge_equals_adding_everything():
+    rng = random.Random(5)
+    a, b, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i in range(2000):
+        v = rng.uniform(0.001, 2.0)
+        (a if i % 3 else b).add(v)
+        both.add(v)
+    a.merge(b)
+    assert a.counts == both.counts
+    assert a.count == both.count and a.max == both.max
+    assert a.percentile(95) == both.percentile(95)
+
+
+def test_histogram_edges():
+    hist = LatencyHistogram()
+    assert math.isnan(hist.percentile(50))
+    hist.add(0.0)  # below the first bin
+    hist.add(1e6)  # above the last one
+    assert hist.percentile(0) == pytest.approx(1e-4, rel=0.05)  # first bin
+    assert hist.percentile(100) == pytest.approx(100.0, rel=0.05)  # last bin: the 100 s range limit
+    assert hist.max == 1e6
+
+
+def test_tracker_matches_newest_result_to_latest_frame_sent_before_it():
+    tracker = LatencyTracker(tolerance=0.5)
+    for i in range(5):
+        tracker.mark_sent(100.0 + i * 0.1, at=10.0 + i)
+    latency = tracker.on_response({"advanced": {"rppg_timestamps": [100.0, 100.2]}}, at=20.0)
+    assert latency == pytest.approx(20.0 - 12.0)
+    assert tracker.on_response({"advanced": {"rppg_timestamps": [100.2]}}, at=21.0) is None  # already matched
+    assert tracker.on_response({"advanced": {}}, at=21.0) is None
@@ -0,0 +1,50 @@
+import time
+
+from pacer import Pacer
+
+
+def run_slow_source(pacer: Pacer, read_sec: float, calls: int) -> list:
+    """A capture loop like CameraSource's: wait, and read only when the frame is released."""
+    released = []
+    for _ in range(calls):
+        if not pacer.wait():
+            released.append(False)
+            continue
+        time.sleep(read_sec)  # the camera delivers frames slower than the pacer's rate
+        released.append(True)
+    return released
+
+
+def test_drop_keeps_releasing_when_the_source_is_slower_than_fps():
+    pacer = Pacer(100.0, policy="drop", spin=0.0)
+    released = run_slow_source(pacer, read_sec=0.013, calls=60)
+    assert sum(released) >= 40
+    assert sum(released[-10:]) >= 7  # no growing delay that ends in drops only
+    assert pacer.lateness.percentile(99) < 2 * pacer.interval
+
+
+def test_drop_keeps_releasing_when_every_call_is_slow():
+    pacer = Pacer(100.0, policy="drop", spin=0.0)
+    released = []
+    for _ in range(40):
+        released.append(pacer.wait())
+        time.sleep(0.013)  # the read happens even for a dropped frame
+    assert sum(released) >= 25
+    assert any(released[-5:])
+
+
+def test_drop_recovers_after_a_stall():
+    pacer = Pacer(100.0, policy="drop", spin=0.0)
+    assert pacer.wait()
+    time.sleep(0.1)  # ten slots missed
+    released = [pacer.wait() for _ in range(5)]
+    assert released.count(False) <= 1
+    assert pacer.dropped >= 9
+
+
+def test_long_stall_resyncs_in_drop_mode():
+    pacer = Pacer(100.0, policy="drop", spin=0.0, max_lag=0.05)
+    assert pacer.wait()
+    time.sleep(0.08)
+    assert pacer.wait()  # re-anchored and released at once
+    assert pacer.resyncs == 1
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("orjson")
+pytest.importorskip("websockets")
+
+from pipeline import MAX_RPPG_SAMPLES, RPPG_CLOCK_RESET_SEC, Pipeline  # noqa: E402
+
+
+def server_result(timestamps, hr="72"):
+    timestamps = list(timestamps)
+    return {"advanced": {"rppg": [0.1 * t for t in timestamps], "rppg_timestamps": timestamps},
+            "inference": {"hr": hr}}
+
+
+@pytest.fixture
+def pipeline():
+    results = []
+    p = Pipeline(on_result=results.append)
+    p.published = results
+    return p
+
+
+def test_only_new_samples_are_published(pipeline):
+    assert pipeline.publish_result(server_result(range(0, 10)))
+    assert pipeline.publish_result(server_result(range(5, 15)))
+    first, second = pipeline.published
+    np.testing.assert_array_equal(first.timestamps, np.arange(0, 10))
+    np.testing.assert_array_equal(second.timestamps, np.arange(10, 15))
+    np.testing.assert_allclose(second.rppg, 0.1 * np.arange(10, 15))
+    assert second.rppg.dtype == np.float64 and second.rppg.flags.c_contiguous
+    assert pipeline.rppg_new == 15 and pipeline.rppg_duplicates == 5
+
+
+def test_repeated_result_is_not_published_again(pipeline):
+    data = server_result(range(0, 10))
+    assert pipeline.publish_result(data)
+    assert pipeline.publish_result(data)  # has data, but nothing new
+    assert len(pipeline.published) == 1
+    assert pipeline.rppg_duplicates == 10
+
+
+def test_heart_rate_change_alone_is_published(pipeline):
+    pipeline.publish_result(server_result(range(0, 10), hr="70"))
+    pipeline.publish_result(server_result(range(0, 10), hr="71"))
+    assert [r.hr for r in pipeline.published] == ["70", "71"]
+    assert len(pipeline.published[1].rppg) == 0
+
+
+def test_result_without_rppg_data_is_rejected(pipeline):
+    assert not pipeline.publish_result({"inference": {"hr": "70"}})
+    assert not pipeline.publish_result({"advanced": {"rppg": [1.0], "rppg_timestamps": []}})
+    assert pipeline.published == []
+
+
+def test_first_result_is_capped(pipeline):
+    pipeline.publish_result(server_result(range(0, MAX_RPPG_SAMPLES + 50)))
+    (result,) = pipeline.published
+    assert len(result.rppg) == MAX_RPPG_SAMPLES
+    assert result.timestamps[-1] == MAX_RPPG_SAMPLES + 49
+
+
+def test_clock_going_back_restarts_delta_tracking(pipeline):
+    pipeline.publish_result(server_result(np.arange(10) + 1000.0))
+    pipeline.publish_result(server_result(np.arange(10) + 1000.0 - RPPG_CLOCK_RESET_SEC - 100.0))
+    assert len(pipeline.published) == 2
+    assert len(pipeline.published[1].rppg) == 10
+
+
+def test_local_flag_is_passed_on(pipeline):
+    pipeline.publish_result(server_result(range(0, 5)), local=True)
+    assert pipeline.published[0].local
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("cv2")
+
+from record import OrderedAppender  # noqa: E402
+
+
+class FlakyStore:
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.frames = []
+
+    def append(self, ts, data):
+        if data in self.fail_on:
+            raise OSError("disk full")
+        self.frames.append((ts, data))
+
+
+def test_frames_are_appended_in_capture_order():
+    store = FlakyStore()
+    appender = OrderedAppender(store)
+    for seq in (2, 0, 3, 1):
+        appender.put(seq, float(seq), f"f{seq}")
+    assert store.frames == [(0.0, "f0"), (1.0, "f1"), (2.0, "f2"), (3.0, "f3")]
+
+
+def test_encode_failure_does_not_block_later_frames():
+    store = FlakyStore()
+    appender = OrderedAppender(store)
+    appender.put(1, 1.0, "f1")
+    appender.put(0, None, None)
+    assert store.frames == [(1.0, "f1")]
+    assert appender.next_seq == 2
+
+
+def test_append_failure_of_an_earlier_frame_is_contained():
+    store = FlakyStore(fail_on={"f0"})
+    appender = OrderedAppender(store)
+    appender.put(1, 1.0, "f1")
+    appender.put(2, 2.0, "f2")
+    appender.put(0, 0.0, "f0")  # flushes 0 (fails), then 1 and 2
+    appender.put(3, 3.0, "f3")
+    assert store.frames == [(1.0, "f1"), (2.0, "f2"), (3.0, "f3")]
+    assert appender.failed == 1
+    assert not appender.pending
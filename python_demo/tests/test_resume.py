@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from resume import Backoff, ReconnectStats, ReplayBuffer  # noqa: E402
+
+
+class FakeWs:
+    def __init__(self, buffer=None, add_during_send=0):
+        self.sent = []
+        self.buffer = buffer
+        self.add_during_send = add_during_send
+
+    async def send(self, msg):
+        self.sent.append(msg)
+        if self.add_during_send:  # a frame captured while re-sending
+            self.add_during_send -= 1
+            self.buffer.add(99, f"late-{self.add_during_send}")
+
+
+def test_replay_buffer_counts_unsent_overflow_as_lost():
+    buf = ReplayBuffer(3)
+    for i in range(3):
+        buf.mark_sent(buf.add(i, f"m{i}"))
+    buf.add(3, "m3")  # pushes out m0, which was sent
+    assert buf.lost == 0
+    buf.add(4, "m4")  # pushes out m1 (sent)
+    buf.add(5, "m5")  # pushes out m2 (sent)
+    buf.add(6, "m6")  # pushes out m3, never sent
+    assert buf.lost == 1
+    assert len(buf) == 3
+
+
+def test_replay_buffer_resends_everything_including_frames_added_meanwhile():
+    buf = ReplayBuffer(10)
+    buf.mark_sent(buf.add(0, "a"))
+    buf.add(1, "b")
+    ws = FakeWs(buf, add_during_send=2)
+    count = asyncio.run(buf.resend(ws))
+    assert ws.sent[:2] == ["a", "b"]
+    assert sorted(ws.sent[2:]) == ["late-0", "late-1"]
+    assert count == 4
+
+
+def test_backoff_grows_with_jitter_up_to_the_cap_and_resets():
+    backoff = Backoff(initial=0.5, maximum=4.0)
+    delays = [backoff.next() for _ in range(8)]
+    ceilings = [0.5, 1.0, 2.0, 4.0, 4.0, 4.0, 4.0, 4.0]
+    for delay, ceiling in zip(delays, ceilings):
+        assert ceiling / 2 <= delay <= ceiling
+    assert backoff.attempts == 8
+    backoff.reset()
+    assert 0.25 <= backoff.next() <= 0.5
+
+
+def test_reconnect_stats_ignore_failures_before_the_first_connection():
+    stats = ReconnectStats()
+    stats.disconnected()
+    stats.disconnected()
+    assert not stats.down
+    assert stats.connected() is None  # first connection, not a reconnect
+    assert stats.failed_connects == 2 and stats.reconnects == 0
+
+    stats.disconnected()
+    assert stats.down
+    gap = stats.connected()
+    assert gap is not None and gap >= 0.0
+    assert stats.reconnects == 1 and not stats.down
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from vitals import RingSeries, Vitals
+
+
+@pytest.mark.parametrize("capacity", [1, 2, 5, 16, 100])
+@pytest.mark.parametrize("chunk", [1, 3, 7, 16, 250])
+def test_ring_series_matches_plain_list(capacity, chunk):
+    rng = np.random.default_rng(capacity * 1000 + chunk)
+    ring = RingSeries(capacity)
+    ts, ys = [], []
+    t = 0.0
+    for _ in range(12):
+        n = int(rng.integers(0, chunk + 1))  # includes empty chunks and chunks > capacity
+        new_t = t + np.arange(1, n + 1, dtype=np.float64)
+        new_y = rng.standard_normal(n)
+        t = new_t[-1] if n else t
+        ring.extend(new_t, new_y)
+        ts.extend(new_t)
+        ys.extend(new_y)
+
+        vt, vy = ring.view()
+        assert list(vt) == ts[-capacity:]
+        assert list(vy) == ys[-capacity:]
+        assert ring.last_time() == (ts[-1] if ts else 0.0)
+
+
+def test_ring_series_uses_the_shorter_of_t_and_y():
+    ring = RingSeries(4)
+    ring.extend(np.array([1.0, 2.0, 3.0]), np.array([10.0, 20.0]))
+    vt, vy = ring.view()
+    assert list(vt) == [1.0, 2.0]
+    assert list(vy) == [10.0, 20.0]
+
+
+def test_ring_series_view_is_not_a_copy():
+    ring = RingSeries(8)
+    ring.extend(np.arange(5.0), np.arange(5.0))
+    vt, _ = ring.view()
+    assert vt.base is ring.t
+
+
+def test_vitals_times_are_relative_to_first_sample():
+    vitals = Vitals(10)
+    vitals.add(np.array([0.1, 0.2]), np.array([100.0, 100.5]), "70")
+    vitals.add(np.array([0.3]), np.array([101.0]), "72", local=True)
+    vt, vy = vitals.series.view()
+    assert list(vt) == [0.0, 0.5, 1.0]
+    assert list(vy) == [0.1, 0.2, 0.3]
+    assert vitals.hr == "72" and vitals.local
+    assert vitals.dirty and vitals.hr_changed
@@ -0,0 +1,74 @@
+"""Display-side model of the pipeline's output: rPPG history and the latest heart rate.
+
+NumPy only, so the dashboard can import it without pulling in the camera or
+network stack.
+"""
+from typing import Optional
+
+import numpy as np
+
+
+class RingSeries:
+    """The last ``capacity`` (t, y) samples in preallocated NumPy arrays.
+
+    Every sample is written twice, at ``i`` and ``i + capacity``, so the
+    newest samples are always one contiguous slice: ``view`` returns views
+    in time order without copying or rolling anything.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self.t = np.zeros(2 * self.capacity)
+        self.y = np.zeros(2 * self.capacity)
+        self.head = 0  # next write position in [0, capacity)
+        self.size = 0
+
+    def extend(self, t: np.ndarray, y: np.ndarray) -> None:
+        cap = self.capacity
+        n = min(len(t), len(y))
+        t, y = t[n - min(n, cap):n], y[n - min(n, cap):n]
+        n = len(t)
+        first = min(n, cap - self.head)
+        for buf, src in ((self.t, t), (self.y, y)):
+            buf[self.head:self.head + first] = src[:first]
+            buf[self.head + cap:self.head + cap + first] = src[:first]
+            buf[:n - first] = src[first:]
+            buf[cap:cap + n - first] = src[first:]
+        self.head = (self.head + n) % cap
+        self.size = min(cap, self.size + n)
+
+    def view(self):
+        end = self.head + self.capacity
+        return self.t[end - self.size:end], self.y[end - self.size:end]
+
+    def last_time(self) -> float:
+        return float(self.t[self.head + self.capacity - 1]) if self.size else 0.0
+
+
+class Vitals:
+    """What the dashboard shows, minus the widgets: rPPG history and the latest heart rate.
+
+    ``dirty`` and ``hr_changed`` are set by ``add`` and cleared by whoever
+    draws them. Times in ``series`` are seconds since the first sample.
+    """
+
+    def __init__(self, capacity: int):
+        self.series = RingSeries(capacity)
+        self.begin_time: Optional[float] = None
+        self.hr = ""
+        self.local = False
+        self.samples = 0
+        self.dirty = False
+        self.hr_changed = False
+
+    def add(self, rppg: np.ndarray, timestamps: np.ndarray, hr: str, local: bool = False):
+        if len(rppg):
+            if self.begin_time is None:
+                self.begin_time = float(timestamps[0])
+            self.series.extend(timestamps - self.begin_time, rppg)
+            self.samples += len(rppg)
+            self.dirty = True
+        if hr:
+            self.hr_changed = self.hr_changed or hr != self.hr
+            self.hr = hr
+            self.local = local
@@ -0,0 +1,193 @@
+import math
+import os
+from time import perf_counter
+
+from PyQt5.QtCore import QEvent, QObject, QTimer, Qt
+from PyQt5.QtWidgets import QLabel
+
+from latency import LatencyHistogram  # python_demo/, put on sys.path by opencv_widget
+
+# ---------------- Config ----------------
+RENDER_FPS = float(os.getenv("RENDER_FPS", "0"))  # 0 = the screen's refresh rate
+RENDER_DEBUG = os.getenv("RENDER_DEBUG", "0") not in ("0", "false", "False")  # frame-time overlay (F12 toggles)
+RENDER_LOG_SEC = float(os.getenv("RENDER_LOG_SEC", "10"))  # log frame stats every N seconds (0 = off)
+
+
+class Job:
+    """A widget update run by the scheduler: when requested, or every ``interval`` seconds."""
+
+    def __init__(self, name: str, callback, interval: float = 0.0):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.next_due = perf_counter() + interval if interval > 0 else float("inf")
+        self.requested = False
+        self.cost = LatencyHistogram()
+
+
+class RenderScheduler(QObject):
+    """Run every widget update on display-rate ticks, and measure the GUI thread.
+
+    Widgets register their update callbacks instead of owning timers; data
+    handlers call ``request(name)`` instead of updating widgets directly. On
+    each tick the due jobs run back to back, so their ``update()`` calls merge
+    into a single paint. Ticks are at most one per frame and only happen when
+    something is due: a single-shot timer is armed by ``request`` and for the
+    next interval job, so an idle dashboard does not wake up every frame.
+    Recorded per tick:
+
+    - event-loop latency: how late the tick fired (time the GUI thread was busy)
+    - frame cost: all jobs of the tick together, and the share over budget
+    - per-job update cost, and paint cost of widgets passed to ``watch_paint``
+    """
+
+    def __init__(self, fps: float = 60.0, log_every: float = RENDER_LOG_SEC, parent=None):
+        super().__init__(parent)
+        self.fps = float(fps)
+        self.budget = 1.0 / self.fps
+        self.log_every = float(log_every)
+        self.jobs = {}
+        self.paint = {}  # name -> LatencyHistogram
+        self._watched = {}  # widget -> name, for the paint-timing event filter
+        self.loop_latency = LatencyHistogram()
+        self.frame_cost = LatencyHistogram()
+        self.ticks = 0
+        self.over_budget = 0
+        self.overlay = None
+        self.running = False
+        self._due = None  # when the armed timer should fire, from the whole-ms delay it was given
+        self._last_tick = float("-inf")
+        self._next_log = perf_counter() + self.log_every if self.log_every > 0 else float("inf")
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.running = True
+        self._arm_next()
+
+    def stop(self):
+        self.running = False
+        self.timer.stop()
+        self._due = None
+
+    def _arm(self, at: float):
+        """Make sure a tick runs at ``at`` (a perf_counter time) or earlier."""
+        if not self.running or at == float("inf") or (self.timer.isActive() and self._due <= at):
+            return
+        now = perf_counter()
+        delay_ms = math.ceil(1000.0 * max(0.0, at - now))
+        self._due = now + delay_ms / 1000.0
+        self.timer.start(delay_ms)
+
+    def _arm_next(self):
+        at = min([job.next_due for job in self.jobs.values()] + [self._next_log])
+        if any(job.requested for job in self.jobs.values()):
+            at = min(at, self._last_tick + self.budget)
+        self._arm(at)
+
+    # ---------------- Jobs ----------------
+    def register(self, name: str, callback, interval_ms: float = 0.0):
+        """``callback`` runs on the next tick after ``request(name)``, or every ``interval_ms``."""
+        job = self.jobs[name] = Job(name, callback, interval_ms / 1000.0)
+        self._arm(job.next_due)
+
+    def request(self, name: str):
+        """Run ``name`` on the next tick: now, or one frame after the last tick."""
+        self.jobs[name].requested = True
+        self._arm(self._last_tick + self.budget)
+
+    def watch_paint(self, name: str, widget):
+        """Time ``widget``'s paint events under ``name``."""
+        self.paint.setdefault(name, LatencyHistogram())
+        self._watched[widget] = name
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and obj in self._watched:
+            t0 = perf_counter()
+            obj.event(event)  # the widget's own paint, run here so it can be timed
+            self.paint[self._watched[obj]].add(perf_counter() - t0)
+            return True
+        return False
+
+    # ---------------- Tick ----------------
+    def tick(self):
+        now = perf_counter()
+        if self._due is not None:
+            self.loop_latency.add(max(0.0, now - self._due))
+        self._due = None
+        self._last_tick = now
+        self.ticks += 1
+
+        for job in self.jobs.values():
+            if not job.requested and now < job.next_due:
+                continue
+            job.requested = False
+            if job.interval > 0:
+                job.next_due = max(job.next_due + job.interval, now)
+            t0 = perf_counter()
+            try:
+                job.callback()
+            except Exception as e:
+                print(f">> render: {job.name} update failed: {e}")
+            job.cost.add(perf_counter() - t0)
+
+        cost = perf_counter() - now
+        self.frame_cost.add(cost)
+        if cost > self.budget:
+            self.over_budget += 1
+        if now >= self._next_log:
+            self._next_log = now + self.log_every
+            print(">> " + self.summary().replace("\n", "\n>>   "))
+        self._arm_next()
+
+    # ---------------- Stats ----------------
+    def lines(self) -> list:
+        lat = self.loop_latency.snapshot()
+        frame = self.frame_cost.snapshot()
+        over = 100.0 * self.over_budget / self.ticks if self.ticks else 0.0
+        out = [f"frame budget {1000.0 * self.budget:.1f} ms: cost p50 {frame['p50']:.2f} / p99 {frame['p99']:.2f} / "
+               f"max {frame['max']:.1f} ms, {over:.1f}% over",
+               f"event loop latency p50 {lat['p50']:.1f} / p99 {lat['p99']:.1f} / max {lat['max']:.1f} ms"]
+        named = [(f"{name} update", job.cost) for name, job in self.jobs.items()]
+        named += [(f"{name} paint", hist) for name, hist in self.paint.items()]
+        for name, hist in named:
+            if hist.count:
+                s = hist.snapshot()
+                out.append(f"{name}: mean {s['mean']:.2f} / p99 {s['p99']:.2f} / max {s['max']:.1f} ms (n={s['count']})")
+        return out
+
+    def summary(self) -> str:
+        return "render: " + "\n".join(self.lines())
+
+    # ---------------- Debug overlay ----------------
+    def show_overlay(self, window, visible: bool = True):
+        """Frame stats in the top-left corner of ``window``, refreshed twice a second."""
+        if self.overlay is None:
+            self.overlay = QLabel(window)
+            self.overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+            self.overlay.setStyleSheet("background-color: rgba(0, 0, 0, 160); color: #00ffea; "
+                                       "font-family: monospace; font-size: 12px; padding: 6px;")
+            self.register("debug overlay", self.update_overlay, interval_ms=500)
+        self.overlay.setVisible(visible)
+        if visible:
+            self.update_overlay()
+            self.overlay.raise_()
+
+    def toggle_overlay(self, window):
+        self.show_overlay(window, self.overlay is None or not self.overlay.isVisible())
+
+    def update_overlay(self):
+        if self.overlay is not None and self.overlay.isVisible():
+            self.overlay.setText("\n".join(self.lines()))
+            self.overlay.adjustSize()
+
+    @classmethod
+    def for_screen(cls, screen=None, parent=None) -> "RenderScheduler":
+        """One tick per display refresh (RENDER_FPS overrides)."""
+        fps = RENDER_FPS
+        if fps <= 0:
+            fps = screen.refreshRate() if screen is not None else 60.0
+        return cls(fps if fps > 0 else 60.0, parent=parent)
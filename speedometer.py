@@ -1,39 +1,69 @@
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QFont
+from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QFont, QPixmap
 import random
 import math
 
 class Speedometer(QWidget):
     """A widget used to simulate a speedometer display."""
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, scheduler=None):
         super().__init__(parent)
         self.speed = 0
         self.max_speed = 240
 
-        # Timer to simulate speed
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_speed)
-        self.timer.start(500)
+        # Simulated speed every 500 ms: on the shared render tick if there is one, else on an own timer
+        if scheduler is not None:
+            scheduler.register("speedometer", self.update_speed, interval_ms=500)
+        else:
+            self.timer = QTimer()
+            self.timer.timeout.connect(self.update_speed)
+            self.timer.start(500)
 
         # Arc settings for 120° sweep
         self.start_angle = 210   # starting angle in degrees (left side)
         self.arc_span = 120      # sweep angle in degrees
 
+        # Arc, ticks and numbers never change: drawn once per (size, device pixel ratio)
+        self.tick_font = QFont("Segoe UI", 10)
+        self.speed_font = QFont("Segoe UI", 18, QFont.Bold)
+        self.static_layer = None
+        self.static_key = None
+
     def update_speed(self):
         self.speed = random.randint(60, 80)
         self.update()  # trigger repaint
 
 
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+    def resizeEvent(self, event):
+        self.static_layer = None  # re-rendered at the new size on the next paint
+        super().resizeEvent(event)
 
+    def geometry_values(self):
         rect = self.rect()
         cx = rect.width() / 2
         cy = rect.height() / 2
         radius = min(cx, cy) * 0.95
+        return rect, cx, cy, radius
+
+    def static_pixmap(self):
+        """Outer arc, ticks and numbers, cached until the size or device pixel ratio changes."""
+        dpr = self.devicePixelRatioF()
+        key = (self.width(), self.height(), dpr)
+        if self.static_layer is not None and self.static_key == key:
+            return self.static_layer
+        pixmap = QPixmap(max(1, int(self.width() * dpr)), max(1, int(self.height() * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.draw_static(painter)
+        painter.end()
+        self.static_layer, self.static_key = pixmap, key
+        return pixmap
+
+    def draw_static(self, painter):
+        rect, cx, cy, radius = self.geometry_values()
 
         # Draw outer arc (neon glow)
         pen = QPen(QColor("#00ffea"), 4)
@@ -46,8 +76,7 @@ class Speedometer(QWidget):
 
         # Draw ticks and numbers
         painter.setPen(QPen(QColor("#00ffea"), 2))
-        font = QFont("Segoe UI", 10)
-        painter.setFont(font)
+        painter.setFont(self.tick_font)
 
         for i in range(0, self.max_speed+1, 60):
             # Map speed to arc span
@@ -67,6 +96,12 @@ class Speedometer(QWidget):
             y_text = cy + num_radius * math.sin(angle_rad)
             painter.drawText(int(x_text)-10, int(y_text)+5, str(i))
 
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.static_pixmap())
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect, cx, cy, radius = self.geometry_values()
+
         # Draw needle
         needle_angle_deg = self.start_angle + (self.speed / self.max_speed) * self.arc_span
         needle_angle_rad = math.radians(needle_angle_deg)
@@ -83,6 +118,6 @@ class Speedometer(QWidget):
 
         # Digital speed text
         painter.setPen(QColor("#f5f5f5"))
-        painter.setFont(QFont("Segoe UI", 18, QFont.Bold))
+        painter.setFont(self.speed_font)
         text_rect = rect.adjusted(0, 50, 0, 0)  # left, top, right, bottom offsets^
-        painter.drawText(text_rect, Qt.AlignCenter, f"{self.speed} km/h")
\ No newline at end of file
+        painter.drawText(text_rect, Qt.AlignCenter, f"{self.speed} km/h")
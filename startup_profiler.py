@@ -0,0 +1,77 @@
+import os
+from time import perf_counter
+
+T0 = perf_counter()  # import this module first: every startup time is measured from here
+
+from PyQt5.QtCore import QEvent, QObject, QTimer  # noqa: E402
+
+STARTUP_REPORT_SEC = float(os.getenv("STARTUP_REPORT_SEC", "30"))  # report by then even without a server result
+STARTUP_MILESTONES = ("imports", "window built", "first paint", "panels ready",
+                      "pipeline ready", "first camera frame", "first rPPG result")
+
+
+class StartupProfiler(QObject):
+    """Time from launch to each startup milestone, printed once as a single ``>> startup:`` line.
+
+    ``mark`` records the first time a milestone is reached (later calls are
+    ignored); the report goes out when the first rPPG result arrives or
+    STARTUP_REPORT_SEC after ``start``, whichever is first.
+    """
+
+    def __init__(self, t0: float = T0):
+        super().__init__()
+        self.t0 = t0
+        self.marks = {}  # milestone -> seconds since t0
+        self.reported = False
+        self.paint_window = None
+        self.on_first_paint = None
+
+    def mark(self, name: str, at: float = None) -> None:
+        if name not in self.marks:
+            self.marks[name] = (perf_counter() if at is None else at) - self.t0
+        if name == "first rPPG result":
+            self.report()
+
+    def start(self) -> None:
+        QTimer.singleShot(int(STARTUP_REPORT_SEC * 1000), self.report)
+
+    # ---------------- First paint ----------------
+    def watch_first_paint(self, window, callback=None) -> None:
+        """Mark "first paint" once ``window`` has been painted, then call ``callback``."""
+        self.paint_window = window
+        self.on_first_paint = callback
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if obj is self.paint_window and event.type() in (QEvent.Paint, QEvent.UpdateRequest):
+            obj.removeEventFilter(self)
+            self.paint_window = None
+            QTimer.singleShot(0, self.first_paint_done)  # after the paint has actually run
+        return False
+
+    def first_paint_done(self) -> None:
+        self.mark("first paint")
+        if self.on_first_paint is not None:
+            callback, self.on_first_paint = self.on_first_paint, None
+            callback()
+
+    # ---------------- Report ----------------
+    def lines(self) -> list:
+        parts, last = [], 0.0
+        for name in sorted(STARTUP_MILESTONES, key=lambda n: self.marks.get(n, float("inf"))):
+            t = self.marks.get(name)
+            if t is None:
+                parts.append(f"{name} --")
+            else:
+                parts.append(f"{name} {t * 1000:.0f} ms (+{(t - last) * 1000:.0f})")
+                last = t
+        return parts
+
+    def report(self) -> None:
+        if self.reported:
+            return
+        self.reported = True
+        print(">> startup: " + " | ".join(self.lines()))
+
+
+PROFILER = StartupProfiler()